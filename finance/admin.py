@@ -1,14 +1,148 @@
+from django import forms
 from django.contrib import admin
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
 
+from .deletion import soft_delete_account, soft_delete_transactions
 from .forms import AccountForm, TransactionForm
-from .models import Account, Transaction
+from .models import (
+	Account,
+	BackgroundTask,
+	CategorizationRule,
+	ChangeLog,
+	Household,
+	RecurringPattern,
+	Transaction,
+)
+
+RECENT_INLINE_TRANSACTIONS = 20
+
+
+def estimated_row_count(model, using="default") -> int:
+	"""Cheap row estimate: PostgreSQL's planner statistics, elsewhere the highest primary key.
+
+	A partitioned parent holds no rows of its own (its ``reltuples`` is 0 or
+	-1), so the statistics of every leaf partition under it are summed.
+	Partitions that have never been analyzed count as empty.
+	"""
+	connection = connections[using]
+	if connection.vendor == "postgresql":
+		with connection.cursor() as cursor:
+			cursor.execute(
+				"""
+				WITH RECURSIVE tree(oid) AS (
+					SELECT %s::regclass::oid
+					UNION ALL
+					SELECT inherits.inhrelid FROM pg_inherits inherits JOIN tree ON inherits.inhparent = tree.oid
+				)
+				SELECT COALESCE(SUM(GREATEST(class.reltuples, 0)), 0)::bigint
+				FROM tree JOIN pg_class class ON class.oid = tree.oid
+				WHERE class.relkind <> 'p'
+				""",
+				[model._meta.db_table],
+			)
+			return cursor.fetchone()[0]
+	return model._base_manager.using(using).aggregate(top=Max("pk"))["top"] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+	"""Skip ``COUNT(*)`` on large, unfiltered change lists.
+
+	An exact count is a full scan at millions of rows. When no filter or
+	search narrows the default queryset, the page count only needs to be
+	roughly right, so a row estimate is used once it passes ``exact_below``.
+	"""
+
+	exact_below = 10_000
+
+	@cached_property
+	def count(self):
+		queryset = self.object_list
+		if queryset.query.where == queryset.model._default_manager.all().query.where:
+			estimate = estimated_row_count(queryset.model, queryset.db)
+			if estimate >= self.exact_below:
+				return estimate
+		return super().count
+
+
+class AutocompleteListFilter(admin.FieldListFilter):
+	"""Foreign key filter backed by the admin autocomplete view instead of listing every row.
+
+	The related model's admin must define ``search_fields``. Add the
+	``AutocompleteListFilterMixin`` to the model admin so the select2 assets load.
+	"""
+
+	template = "admin/finance/autocomplete_filter.html"
+
+	def __init__(self, field, request, params, model, model_admin, field_path):
+		self.lookup_kwarg = f"{field_path}__{field.target_field.name}__exact"
+		super().__init__(field, request, params, model, model_admin, field_path)
+		value = self.used_parameters.get(self.lookup_kwarg)
+		self.lookup_val = value[-1] if isinstance(value, list) else value
+		self.form_field = forms.ModelChoiceField(
+			queryset=field.remote_field.model._default_manager.all(),
+			widget=AutocompleteSelect(field, model_admin.admin_site, attrs={"style": "width: 100%"}),
+			required=False,
+		)
+
+	def expected_parameters(self):
+		return [self.lookup_kwarg]
+
+	def has_output(self):
+		return True
+
+	def choices(self, changelist):
+		yield {
+			"selected": self.lookup_val is None,
+			"query_string": changelist.get_query_string(remove=[self.lookup_kwarg]),
+			"display": "All",
+		}
+
+	def widget(self):
+		return self.form_field.widget.render(f"filter-{self.field_path}", self.lookup_val)
+
+
+class AutocompleteListFilterMixin:
+	@property
+	def media(self):
+		media = super().media
+		for entry in self.list_filter:
+			if isinstance(entry, tuple) and issubclass(entry[1], AutocompleteListFilter):
+				field = self.model._meta.get_field(entry[0])
+				media += AutocompleteSelect(field, self.admin_site).media
+		return media
+
+
+class RecentTransactionFormSet(BaseInlineFormSet):
+	def get_queryset(self):
+		if not hasattr(self, "_queryset"):
+			self._queryset = super().get_queryset().order_by("-posted_at", "-id")[:RECENT_INLINE_TRANSACTIONS]
+		return self._queryset
 
 
 class TransactionInline(admin.TabularInline):
+	"""The account's most recent transactions; the rest are one link away in the transaction list."""
+
 	model = Transaction
+	formset = RecentTransactionFormSet
 	extra = 0
 	fields = ("posted_at", "transaction_type", "amount", "is_cleared")
 	readonly_fields = ("posted_at",)
+	verbose_name_plural = f"Recent transactions (latest {RECENT_INLINE_TRANSACTIONS})"
+	show_change_link = True
+
+
+@admin.register(Household)
+class HouseholdAdmin(admin.ModelAdmin):
+	list_display = ("name", "created_at")
+	search_fields = ("name",)
+	filter_horizontal = ("members",)
 
 
 @admin.register(Account)
@@ -17,19 +151,23 @@ class AccountAdmin(admin.ModelAdmin):
 	inlines = (TransactionInline,)
 	list_display = (
 		"name",
+		"household",
 		"account_type",
 		"account_number",
 		"balance",
 		"interest_rate",
 		"due_date",
 	)
-	list_filter = ("account_type",)
+	list_filter = ("household", "account_type")
+	list_select_related = ("household",)
 	search_fields = ("name", "account_number", "routing_number")
+	readonly_fields = ("all_transactions",)
 	fieldsets = (
 		(
 			None,
 			{
 				"fields": (
+					"household",
 					"name",
 					"account_number",
 					"account_type",
@@ -37,6 +175,7 @@ class AccountAdmin(admin.ModelAdmin):
 					"interest_rate",
 					"due_date",
 					"balance",
+					"all_transactions",
 				)
 			},
 		),
@@ -45,9 +184,23 @@ class AccountAdmin(admin.ModelAdmin):
 	class Media:
 		js = ("finance/admin/account_form.js",)
 
+	@admin.display(description="Transactions")
+	def all_transactions(self, obj):
+		if obj.pk is None:
+			return "-"
+		url = reverse("admin:finance_transaction_changelist")
+		return format_html('<a href="{}?account__id__exact={}">View all transactions</a>', url, obj.pk)
+
+	def delete_model(self, request, obj):
+		soft_delete_account(obj)
+
+	def delete_queryset(self, request, queryset):
+		for account in queryset:
+			soft_delete_account(account)
+
 
 @admin.register(Transaction)
-class TransactionAdmin(admin.ModelAdmin):
+class TransactionAdmin(AutocompleteListFilterMixin, admin.ModelAdmin):
 	form = TransactionForm
 	list_display = (
 		"posted_at",
@@ -56,7 +209,104 @@ class TransactionAdmin(admin.ModelAdmin):
 		"amount",
 		"is_cleared",
 	)
-	list_filter = ("transaction_type", "account", "is_cleared")
+	list_filter = ("transaction_type", ("account", AutocompleteListFilter), "is_cleared")
+	list_select_related = ("account",)
+	date_hierarchy = "posted_at"
+	paginator = EstimatedCountPaginator
+	show_full_result_count = False
 	search_fields = ("memo", "reference")
 	autocomplete_fields = ("account",)
 	readonly_fields = ("created_at", "updated_at")
+
+	def delete_model(self, request, obj):
+		soft_delete_transactions(Transaction.objects.filter(pk=obj.pk))
+
+	def delete_queryset(self, request, queryset):
+		soft_delete_transactions(queryset)
+
+
+@admin.register(CategorizationRule)
+class CategorizationRuleAdmin(admin.ModelAdmin):
+	list_display = (
+		"name",
+		"priority",
+		"match_field",
+		"match_type",
+		"pattern",
+		"account",
+		"min_amount",
+		"max_amount",
+		"category",
+		"is_active",
+	)
+	list_editable = ("priority", "is_active")
+	list_filter = ("is_active", "match_type", "category")
+	list_select_related = ("account", "category")
+	search_fields = ("name", "pattern")
+	autocomplete_fields = ("account",)
+
+
+@admin.register(RecurringPattern)
+class RecurringPatternAdmin(AutocompleteListFilterMixin, admin.ModelAdmin):
+	list_display = (
+		"memo",
+		"account",
+		"transaction_type",
+		"amount",
+		"interval_days",
+		"occurrences",
+		"last_posted_on",
+	)
+	list_filter = ("transaction_type", ("account", AutocompleteListFilter))
+	list_select_related = ("account",)
+	search_fields = ("memo",)
+	readonly_fields = ("detected_at",)
+
+
+@admin.register(ChangeLog)
+class ChangeLogAdmin(admin.ModelAdmin):
+	list_display = ("changed_at", "model", "object_id", "action")
+	list_filter = ("model", "action")
+	search_fields = ("=object_id",)
+	date_hierarchy = "changed_at"
+	paginator = EstimatedCountPaginator
+	show_full_result_count = False
+	readonly_fields = ("model", "object_id", "action", "changes", "changed_at")
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
+
+	def has_delete_permission(self, request, obj=None):
+		return False
+
+
+@admin.register(BackgroundTask)
+class BackgroundTaskAdmin(admin.ModelAdmin):
+	paginator = EstimatedCountPaginator
+	show_full_result_count = False
+	list_display = ("id", "name", "status", "attempts", "progress_done", "progress_total", "created_at", "finished_at")
+	list_filter = ("status", "name")
+	date_hierarchy = "created_at"
+	readonly_fields = (
+		"name",
+		"kwargs",
+		"attempts",
+		"max_attempts",
+		"run_after",
+		"locked_until",
+		"worker",
+		"progress_done",
+		"progress_total",
+		"progress_message",
+		"result",
+		"error",
+		"created_at",
+		"started_at",
+		"finished_at",
+	)
+
+	def has_add_permission(self, request):
+		return False
@@ -0,0 +1,143 @@
+"""Archiving of closed years.
+
+``archive_transactions`` moves cleared transactions posted before a year
+boundary from the hot ``Transaction`` table into ``ArchivedTransaction``.
+Uncleared rows stay behind so they can still be reconciled. Each batch runs
+in one short database transaction. The batch is copied, added to the
+``MonthlySummary`` totals (per account, category, local month, type and
+transfer flag), then removed from the hot table. Reports, net worth and
+account counts read the summaries for archived months. The month view reads
+archived rows on demand. Archived rows are read-only; a category merge
+moves them along with the live rows.
+"""
+
+from datetime import date, datetime, time
+
+from django.db import transaction
+from django.db.models import BooleanField, Count, DateField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import cache as finance_cache
+from . import networth
+from .models import ArchivedTransaction, MonthlySummary, Transaction
+
+DEFAULT_KEEP_YEARS = 2
+DEFAULT_ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_FIELDS = (
+    "id",
+    "account_id",
+    "transaction_type",
+    "amount",
+    "category_id",
+    "memo",
+    "reference",
+    "posted_at",
+    "is_cleared",
+    "transfer_id",
+    "transfer_direction",
+    "created_at",
+    "updated_at",
+)
+SUMMARY_KEY = ("account_id", "category_id", "month", "transaction_type", "is_transfer")
+
+
+def default_through_year(today: date | None = None) -> int:
+    """The last year to archive by default: everything before the previous year."""
+    return (today or timezone.localdate()).year - DEFAULT_KEEP_YEARS
+
+
+def archive_cutoff(through_year: int) -> datetime:
+    """Local midnight on 1 January after ``through_year``."""
+    first_open_day = date(through_year + 1, 1, 1)
+    return timezone.make_aware(datetime.combine(first_open_day, time.min), timezone.get_current_timezone())
+
+
+def summarize(queryset):
+    """Group transaction-shaped rows (hot or archived) into ``MonthlySummary`` keys and totals."""
+    return (
+        queryset.order_by()
+        .annotate(
+            month=TruncMonth("posted_at", output_field=DateField()),
+            is_transfer=ExpressionWrapper(Q(transfer_id__isnull=False), output_field=BooleanField()),
+        )
+        .values(*SUMMARY_KEY)
+        .annotate(
+            count=Count("id"),
+            amount_total=Sum("amount"),
+            signed=Sum(Transaction.signed_amount_expression()),
+        )
+    )
+
+
+def _add_to_summaries(groups) -> None:
+    for group in groups:
+        key = {field: group[field] for field in SUMMARY_KEY}
+        updated = MonthlySummary.objects.filter(**key).update(
+            transaction_count=F("transaction_count") + group["count"],
+            total=F("total") + group["amount_total"],
+            signed_total=F("signed_total") + group["signed"],
+        )
+        if not updated:
+            MonthlySummary.objects.create(
+                **key,
+                transaction_count=group["count"],
+                total=group["amount_total"],
+                signed_total=group["signed"],
+            )
+
+
+def archive_transactions(through_year=None, *, batch_size=DEFAULT_ARCHIVE_BATCH_SIZE, progress=None) -> int:
+    """Move cleared transactions posted in or before ``through_year`` to the archive.
+
+    Returns the number of transactions archived. Raises ``ValueError`` for
+    the current year, which is still open.
+    """
+    through_year = through_year or default_through_year()
+    if through_year >= timezone.localdate().year:
+        raise ValueError("Only closed years can be archived.")
+    candidates = Transaction.objects.filter(
+        posted_at__lt=archive_cutoff(through_year),
+        is_cleared=True,
+    ).order_by("pk")
+    archived = 0
+    while True:
+        with transaction.atomic():
+            ids = list(candidates.select_for_update().values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            batch = Transaction.all_objects.filter(pk__in=ids)
+            ArchivedTransaction.objects.bulk_create(
+                [ArchivedTransaction(**row) for row in batch.values(*ARCHIVE_FIELDS)]
+            )
+            _add_to_summaries(summarize(batch))
+            archived += batch._raw_delete(batch.db)
+        if progress:
+            progress(archived)
+    if archived:
+        finance_cache.invalidate(finance_cache.TRANSACTIONS)
+        networth.mark_dirty(None)
+    return archived
+
+
+def reassign_category(source, target) -> int:
+    """Move archived rows and their summaries from ``source`` to ``target``; call inside a transaction."""
+    moved = ArchivedTransaction.objects.filter(category=source).update(category=target)
+    if moved:
+        MonthlySummary.objects.filter(category__in=[source, target]).delete()
+        _add_to_summaries(summarize(ArchivedTransaction.objects.filter(category=target)))
+    return moved
+
+
+def archived_between(account, start: datetime, end: datetime):
+    """Archived transactions of ``account`` posted from ``start`` to ``end`` inclusive.
+
+    The current year is never archived, so recent months skip the query.
+    """
+    if start.year >= timezone.localdate().year:
+        return []
+    return list(
+        ArchivedTransaction.objects.select_related("account", "category").filter(
+            account=account, posted_at__range=(start, end)
+        )
+    )
@@ -0,0 +1,119 @@
+"""Versioned, namespaced caching for finance data.
+
+Every cached value is tagged with the current version of one or more
+namespaces (``accounts``, ``transactions``, ``categories``). Invalidating a
+namespace bumps its version, so stale entries are never read again and simply
+expire on their own; nothing has to enumerate or delete keys.
+
+Keys and versions are kept per household (see ``finance.tenancy``). A change
+made for one household only bumps that household's versions. A change made
+unscoped, by a command or the worker, bumps the global versions, which every
+household's keys also carry.
+
+A version that is missing, because the backend culled or evicted it, is
+seeded from the clock rather than restarted at 1. Entries cached under
+the lost version are then never matched again.
+
+Values are computed from the primary database even during a request that
+reads from replicas: a lagging replica would otherwise put pre-write data
+under the new version, where it stays until the next invalidation.
+"""
+
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from household.db_routing import replica_reads
+
+from . import tenancy
+
+ACCOUNTS = "accounts"
+TRANSACTIONS = "transactions"
+CATEGORIES = "categories"
+RULES = "rules"
+
+KEY_PREFIX = "finance"
+VERSION_TIMEOUT = None  # namespace versions never expire
+_MISSING = object()
+
+
+def _fresh_version() -> int:
+    # Later than any version handed out before, since bumps are far rarer than nanoseconds.
+    return time.time_ns()
+
+
+def _version_key(namespace: str, scope=None) -> str:
+    if scope is None:
+        return f"{KEY_PREFIX}:ns:{namespace}"
+    return f"{KEY_PREFIX}:ns:{scope}:{namespace}"
+
+
+def _versions(namespaces, scope) -> str:
+    scopes = (None,) if scope is None else (None, scope)
+    keys = [_version_key(namespace, each) for each in scopes for namespace in namespaces]
+    stored = cache.get_many(keys)
+    for key in keys:
+        if key not in stored:
+            # add() keeps a version another process seeded first.
+            cache.add(key, _fresh_version(), VERSION_TIMEOUT)
+            stored[key] = cache.get(key)
+    labels = [namespace for _scope in scopes for namespace in namespaces]
+    return ".".join(f"{label}{stored[key]}" for label, key in zip(labels, keys))
+
+
+def version(namespaces) -> str:
+    """Return an opaque token that changes whenever any namespace is invalidated."""
+    return _versions(tuple(sorted(namespaces)), tenancy.cache_scope())
+
+
+def make_key(key: str, namespaces) -> str:
+    """Return the concrete cache key for ``key`` under the given namespaces."""
+    scope = tenancy.cache_scope()
+    prefix = KEY_PREFIX if scope is None else f"{KEY_PREFIX}:{scope}"
+    return f"{prefix}:{key}:{version(namespaces)}"
+
+
+def get(key: str, namespaces, default=None):
+    return cache.get(make_key(key, namespaces), default)
+
+
+def set(key: str, value, namespaces, timeout=None) -> None:
+    if timeout is None:
+        cache.set(make_key(key, namespaces), value)
+    else:
+        cache.set(make_key(key, namespaces), value, timeout)
+
+
+def get_or_set(key: str, default, namespaces, timeout=None):
+    """Return the cached value, computing it with ``default()`` on a miss."""
+    full_key = make_key(key, namespaces)
+    value = cache.get(full_key, _MISSING)
+    if value is _MISSING:
+        with replica_reads(False):
+            value = default() if callable(default) else default
+        if timeout is None:
+            cache.set(full_key, value)
+        else:
+            cache.set(full_key, value, timeout)
+    return value
+
+
+def _bump(namespaces, scope) -> None:
+    for namespace in namespaces:
+        version_key = _version_key(namespace, scope)
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            cache.set(version_key, _fresh_version(), VERSION_TIMEOUT)
+
+
+def invalidate(*namespaces: str) -> None:
+    """Invalidate every entry tagged with any of ``namespaces``.
+
+    The bump happens immediately and again once the surrounding transaction
+    commits, so a concurrent request cannot re-cache pre-commit data.
+    """
+    scope = tenancy.cache_scope()
+    _bump(namespaces, scope)
+    transaction.on_commit(lambda: _bump(namespaces, scope))
@@ -0,0 +1,55 @@
+from calendar import monthrange
+from datetime import date, timedelta
+
+from django.utils import timezone
+
+from . import cache as finance_cache
+from .models import Account
+
+DEFAULT_DUE_WINDOW_DAYS = 14
+MAX_DUE_WINDOW_DAYS = 90
+
+
+def previous_statement_date(due_date: date) -> date:
+    """Return the same day one month before ``due_date`` (clamped to month end)."""
+    year = due_date.year if due_date.month > 1 else due_date.year - 1
+    month = due_date.month - 1 or 12
+    return date(year, month, min(due_date.day, monthrange(year, month)[1]))
+
+
+def _load_upcoming_due(today: date, days: int):
+    accounts = Account.objects.due_within(today, today + timedelta(days=days))
+    upcoming = []
+    for account in accounts:
+        statement_date = previous_statement_date(account.due_date)
+        last_payment = account.last_payment_at
+        upcoming.append(
+            {
+                "account": account,
+                "statement_balance": account.balance,
+                "statement_date": statement_date,
+                "days_until": (account.due_date - today).days,
+                "payment_posted": bool(
+                    last_payment and timezone.localtime(last_payment).date() >= statement_date
+                ),
+            }
+        )
+    return upcoming
+
+
+def upcoming_due_accounts(days: int = DEFAULT_DUE_WINDOW_DAYS, today: date | None = None):
+    """Accounts due within ``days``, cached until the next account or transaction change."""
+    today = today or timezone.localdate()
+    return finance_cache.get_or_set(
+        f"upcoming-due:{today.isoformat()}:{days}",
+        lambda: _load_upcoming_due(today, days),
+        [finance_cache.ACCOUNTS, finance_cache.TRANSACTIONS],
+    )
+
+
+def parse_due_window(value) -> int:
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_DUE_WINDOW_DAYS
+    return min(max(days, 1), MAX_DUE_WINDOW_DAYS)
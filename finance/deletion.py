@@ -0,0 +1,173 @@
+"""Soft delete, restore and purge for accounts and transactions.
+
+Deleting only stamps ``deleted_at``. The default managers hide stamped
+rows, so the delete is a single UPDATE that can be undone. Deleting an
+account stamps just the account; the default transaction manager hides the
+transactions of deleted accounts, and a background task copies the stamp
+onto them in bounded batches. An account and the transactions deleted with
+it share one timestamp, so restoring the account brings back exactly those
+transactions. ``purge_deleted`` later removes stamped rows for good in
+bounded batches.
+"""
+
+from datetime import datetime, timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from . import cache as finance_cache
+from . import networth
+from .models import Account, ChangeLog, Tombstone, Transaction
+from .sync import prune_tombstones
+from .transfers import shift_transfer_balances, with_partner_legs
+
+DEFAULT_RETENTION = timedelta(days=30)
+DEFAULT_PURGE_BATCH_SIZE = 500
+DEFAULT_STAMP_BATCH_SIZE = 500
+
+
+def _stamp_transactions(queryset, deleted_at, now) -> int:
+    networth.mark_dirty_at(queryset.aggregate(earliest=Min("posted_at"))["earliest"])
+    ChangeLog.objects.log_update(queryset, deleted_at=deleted_at)
+    return queryset.update(deleted_at=deleted_at, updated_at=now)
+
+
+def soft_delete_transactions(queryset, when=None) -> int:
+    """Hide the live transactions in ``queryset`` and the other legs of their transfers.
+
+    Reverses the balance moves of the transfer legs. Returns the number hidden.
+    """
+    when = when or timezone.now()
+    with transaction.atomic():
+        live = with_partner_legs(queryset, Transaction.objects.all()).filter(deleted_at__isnull=True)
+        shift_transfer_balances(live, -1)
+        hidden = _stamp_transactions(live, when, when)
+        finance_cache.invalidate(finance_cache.TRANSACTIONS)
+    return hidden
+
+
+def restore_transactions(queryset) -> int:
+    """Bring back deleted transactions whose account still exists, with the other legs of their transfers.
+
+    Moves the balances of the transfer legs again. Returns the number restored.
+    """
+    with transaction.atomic():
+        deleted = with_partner_legs(queryset, Transaction.all_objects.all()).filter(
+            deleted_at__isnull=False, account__deleted_at__isnull=True
+        )
+        shift_transfer_balances(deleted, 1)
+        restored = _stamp_transactions(deleted, None, timezone.now())
+        finance_cache.invalidate(finance_cache.TRANSACTIONS)
+    return restored
+
+
+def soft_delete_account(account, when=None):
+    """Hide ``account`` and, through it, its transactions.
+
+    Only the account row is written here. The ``stamp_deleted_account`` task
+    gives its transactions the same timestamp later, in bounded batches.
+    """
+    from .tasks import enqueue
+
+    when = when or timezone.now()
+    with transaction.atomic():
+        live = Transaction.all_objects.filter(account=account, deleted_at__isnull=True)
+        networth.mark_dirty_at(live.aggregate(earliest=Min("posted_at"))["earliest"])
+        accounts = Account.objects.filter(pk=account.pk)
+        ChangeLog.objects.log_update(accounts, deleted_at=when)
+        accounts.update(deleted_at=when)
+        enqueue("stamp_deleted_account", account_id=account.pk, deleted_at=when.isoformat())
+        finance_cache.invalidate(finance_cache.ACCOUNTS, finance_cache.TRANSACTIONS)
+    account.deleted_at = when
+    return when
+
+
+def stamp_deleted_account(account_id, deleted_at, *, batch_size=DEFAULT_STAMP_BATCH_SIZE, progress=None) -> int:
+    """Give a deleted account's live transactions its ``deleted_at``, ``batch_size`` rows per transaction.
+
+    Stops as soon as the account is restored, since each batch re-checks the
+    stamp under a row lock. Returns the number of transactions stamped.
+    """
+    if isinstance(deleted_at, str):
+        deleted_at = datetime.fromisoformat(deleted_at)
+    live = Transaction.all_objects.filter(account_id=account_id, deleted_at__isnull=True).order_by("pk")
+    stamped = 0
+    while True:
+        with transaction.atomic():
+            accounts = Account.all_objects.select_for_update().filter(pk=account_id, deleted_at=deleted_at)
+            if not accounts.exists():
+                break
+            ids = list(live.values_list("pk", flat=True)[:batch_size])
+            if not ids:
+                break
+            stamped += _stamp_transactions(Transaction.all_objects.filter(pk__in=ids), deleted_at, timezone.now())
+        if progress:
+            progress(stamped)
+    return stamped
+
+
+def restore_account(account):
+    """Undo ``soft_delete_account``.
+
+    Raises ``ValidationError`` if another live account has taken the account number since.
+    """
+    deleted_at = account.deleted_at
+    account.deleted_at = None
+    try:
+        account.validate_constraints()
+    except ValidationError:
+        account.deleted_at = deleted_at
+        raise
+    with transaction.atomic():
+        accounts = Account.all_objects.filter(pk=account.pk)
+        ChangeLog.objects.log_update(accounts, deleted_at=None)
+        accounts.update(deleted_at=None)
+        _stamp_transactions(
+            Transaction.all_objects.filter(account=account, deleted_at=deleted_at),
+            None,
+            timezone.now(),
+        )
+        finance_cache.invalidate(finance_cache.ACCOUNTS, finance_cache.TRANSACTIONS)
+    return account
+
+
+def purge_deleted(older_than=DEFAULT_RETENTION, *, batch_size=DEFAULT_PURGE_BATCH_SIZE, progress=None):
+    """Hard-delete rows soft-deleted before ``now - older_than``.
+
+    Transactions go first, ``batch_size`` primary keys per short transaction.
+    Each batch is a plain ``DELETE ... WHERE id IN (...)``; nothing references
+    a transaction, and the delete was already logged when the row was
+    stamped; sync clients get a ``Tombstone`` per purged row. Emptied
+    accounts are then deleted one at a time so their remaining cascades
+    (rules, forecasts) stay small. Tombstones past the sync retention window
+    are pruned last. Returns ``(transactions, accounts)`` purged.
+    """
+    cutoff = timezone.now() - older_than
+    # Include unstamped rows of old deleted accounts, in case their stamping task never ran.
+    stale_transactions = Transaction.all_objects.filter(
+        Q(deleted_at__lt=cutoff) | Q(account__deleted_at__lt=cutoff)
+    ).order_by("pk")
+    purged_transactions = 0
+    while True:
+        with transaction.atomic():
+            rows = list(stale_transactions.values_list("pk", "household_id")[:batch_size])
+            if not rows:
+                break
+            batch = Transaction.all_objects.filter(pk__in=[pk for pk, _household_id in rows])
+            purged_transactions += batch._raw_delete(batch.db)
+            for household_id, group in groupby(sorted(rows, key=itemgetter(1)), key=itemgetter(1)):
+                Tombstone.objects.record(Transaction, [pk for pk, _household_id in group], household_id)
+        if progress:
+            progress(purged_transactions)
+
+    purged_accounts = 0
+    for account in list(Account.all_objects.filter(deleted_at__lt=cutoff).order_by("pk")):
+        with transaction.atomic():
+            account.delete()
+        purged_accounts += 1
+    prune_tombstones()
+    return purged_transactions, purged_accounts
@@ -0,0 +1,199 @@
+"""Cash-flow forecasting.
+
+``refresh_forecast`` is a batch job that rebuilds two tables:
+
+* ``RecurringPattern``: repeating transactions detected in recent history.
+  These are rows on the same account with the same type, memo and amount,
+  posted at a regular interval.
+* ``ForecastEntry``: the projected events for the next ``horizon_days``.
+  These come from the detected patterns, from credit card and loan due dates,
+  and from monthly interest on interest-bearing balances.
+
+History is streamed once, sorted so that each candidate pattern is one
+contiguous run. The forecast view only reads the stored entries.
+"""
+
+import statistics
+from calendar import monthrange
+from datetime import date, datetime, time, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from itertools import groupby
+from operator import itemgetter
+
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from .models import Account, ForecastEntry, RecurringPattern, Transaction
+
+DEFAULT_HORIZON_DAYS = 90
+DEFAULT_LOOKBACK_DAYS = 400
+DEFAULT_MIN_OCCURRENCES = 3
+MIN_INTERVAL_DAYS = 5
+MONTHLY_INTERVAL_DAYS = range(27, 33)
+CREDIT_ACCOUNT_TYPES = (Account.AccountType.CREDIT_CARD, Account.AccountType.LOAN)
+CENT = Decimal("0.01")
+
+
+def add_months(day: date, months: int, day_of_month: int | None = None) -> date:
+    """Shift ``day`` by whole months, clamping ``day_of_month`` to the target month's length."""
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day_of_month or day.day, monthrange(year, month)[1]))
+
+
+def regular_interval(days):
+    """Return the median gap between sorted ``days`` if every gap is close to it, else ``None``."""
+    gaps = [(later - earlier).days for earlier, later in zip(days, days[1:])]
+    if not gaps:
+        return None
+    median = statistics.median(gaps)
+    tolerance = max(2, median * 0.15)
+    if median < MIN_INTERVAL_DAYS or any(abs(gap - median) > tolerance for gap in gaps):
+        return None
+    return round(median)
+
+
+def detect_recurring(today: date, *, lookback_days=DEFAULT_LOOKBACK_DAYS, min_occurrences=DEFAULT_MIN_OCCURRENCES):
+    """Return unsaved ``RecurringPattern`` objects found in the last ``lookback_days``."""
+    since = today - timedelta(days=lookback_days)
+    rows = (
+        Transaction.objects.filter(
+            posted_at__gte=timezone.make_aware(datetime.combine(since, time.min), timezone.get_current_timezone()),
+            transfer_id__isnull=True,
+        )
+        .exclude(memo="")
+        .annotate(memo_key=Lower("memo"))
+        .order_by("account_id", "transaction_type", "memo_key", "amount", "posted_at")
+        .values("account_id", "transaction_type", "memo_key", "amount", "memo", "category_id", "posted_at")
+        .iterator(chunk_size=2000)
+    )
+    pattern_key = itemgetter("account_id", "transaction_type", "memo_key", "amount")
+
+    patterns = []
+    for (account_id, transaction_type, _memo_key, amount), run in groupby(rows, key=pattern_key):
+        run = list(run)
+        days = sorted({timezone.localtime(row["posted_at"]).date() for row in run})
+        if len(days) < min_occurrences:
+            continue
+        interval = regular_interval(days)
+        if interval is None or (today - days[-1]).days > 2 * interval:
+            continue
+        patterns.append(
+            RecurringPattern(
+                account_id=account_id,
+                transaction_type=transaction_type,
+                memo=run[-1]["memo"],
+                amount=amount,
+                category_id=run[-1]["category_id"],
+                interval_days=interval,
+                is_monthly=interval in MONTHLY_INTERVAL_DAYS,
+                occurrences=len(days),
+                last_posted_on=days[-1],
+            )
+        )
+    return patterns
+
+
+def project_pattern(pattern: RecurringPattern, today: date, horizon_end: date):
+    """Yield the dates after ``today`` and up to ``horizon_end`` on which ``pattern`` recurs."""
+    step = 1
+    day = pattern.last_posted_on
+    while day <= horizon_end:
+        if pattern.is_monthly:
+            day = add_months(pattern.last_posted_on, step)
+        else:
+            day = pattern.last_posted_on + timedelta(days=pattern.interval_days * step)
+        step += 1
+        if today < day <= horizon_end:
+            yield day
+
+
+def _next_due_date(due_date: date, today: date) -> date:
+    months = 0
+    while add_months(due_date, months) < today:
+        months += 1
+    return add_months(due_date, months)
+
+
+def _account_entries(account, today, horizon_end, paid_by_pattern, now):
+    entries = []
+    if account.account_type in CREDIT_ACCOUNT_TYPES and account.due_date and account.balance > 0:
+        due_on = _next_due_date(account.due_date, today)
+        if due_on <= horizon_end and account.pk not in paid_by_pattern:
+            entries.append(
+                ForecastEntry(
+                    account=account,
+                    due_on=due_on,
+                    transaction_type=Transaction.TransactionType.PAYMENT,
+                    amount=account.balance,
+                    memo="Statement balance due",
+                    source=ForecastEntry.Source.DUE_DATE,
+                    generated_at=now,
+                )
+            )
+    if account.interest_rate and account.balance > 0:
+        monthly_interest = (account.balance * account.interest_rate / 1200).quantize(CENT, ROUND_HALF_UP)
+        interest_type = (
+            Transaction.TransactionType.CHARGE
+            if account.account_type in CREDIT_ACCOUNT_TYPES
+            else Transaction.TransactionType.INCOME
+        )
+        month_end = add_months(today, 0, 31)
+        while monthly_interest > 0 and month_end <= horizon_end:
+            entries.append(
+                ForecastEntry(
+                    account=account,
+                    due_on=month_end,
+                    transaction_type=interest_type,
+                    amount=monthly_interest,
+                    memo=f"Interest at {account.interest_rate}%",
+                    source=ForecastEntry.Source.INTEREST,
+                    generated_at=now,
+                )
+            )
+            month_end = add_months(month_end, 1, 31)
+    return entries
+
+
+def refresh_forecast(
+    today: date | None = None,
+    *,
+    horizon_days=DEFAULT_HORIZON_DAYS,
+    lookback_days=DEFAULT_LOOKBACK_DAYS,
+    min_occurrences=DEFAULT_MIN_OCCURRENCES,
+):
+    """Rebuild detected patterns and projected entries; returns ``(patterns, entries)`` counts."""
+    today = today or timezone.localdate()
+    horizon_end = today + timedelta(days=horizon_days)
+    now = timezone.now()
+    patterns = detect_recurring(today, lookback_days=lookback_days, min_occurrences=min_occurrences)
+
+    with transaction.atomic():
+        ForecastEntry.objects.all().delete()
+        RecurringPattern.objects.all().delete()
+        RecurringPattern.objects.bulk_create(patterns, batch_size=500)
+
+        entries = [
+            ForecastEntry(
+                account_id=pattern.account_id,
+                due_on=day,
+                transaction_type=pattern.transaction_type,
+                amount=pattern.amount,
+                memo=pattern.memo,
+                source=ForecastEntry.Source.RECURRING,
+                pattern=pattern,
+                generated_at=now,
+            )
+            for pattern in patterns
+            for day in project_pattern(pattern, today, horizon_end)
+        ]
+        paid_by_pattern = {
+            pattern.account_id
+            for pattern in patterns
+            if pattern.transaction_type == Transaction.TransactionType.PAYMENT
+        }
+        for account in Account.objects.all():
+            entries.extend(_account_entries(account, today, horizon_end, paid_by_pattern, now))
+        ForecastEntry.objects.bulk_create(entries, batch_size=500)
+    return len(patterns), len(entries)
@@ -1,7 +1,16 @@
 from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Min
 from django.utils import timezone
 
-from .models import Account, Category, Transaction
+from . import cache as finance_cache
+from . import networth
+from .archive import reassign_category
+from .categorization import get_matcher
+from .deletion import soft_delete_transactions
+from .models import Account, Category, ChangeLog, Transaction
+from .transfers import create_transfer, with_partner_legs
 
 
 def _apply_tailwind_classes(form):
@@ -18,6 +27,20 @@ def _apply_tailwind_classes(form):
         widget.attrs["class"] = f"{existing} {css_class}".strip()
 
 
+class IdListField(forms.Field):
+    """Collects repeated ``name=<pk>`` values (e.g. row checkboxes) into sorted ints."""
+
+    widget = forms.MultipleHiddenInput
+
+    def to_python(self, value):
+        if not value:
+            return []
+        try:
+            return sorted({int(item) for item in value})
+        except (TypeError, ValueError):
+            raise ValidationError("Invalid selection.", code="invalid")
+
+
 class AccountForm(forms.ModelForm):
     class Meta:
         model = Account
@@ -39,71 +62,44 @@ class AccountForm(forms.ModelForm):
         self.fields["balance"].widget.attrs.update({"step": "0.01"})
         self.fields["due_date"].widget.input_type = "date"
 
+    def clean_account_number(self):
+        # The uniqueness constraint only covers a household's live accounts and
+        # depends on deleted_at, which is not a form field, so model validation
+        # skips it. Only the admin form has a household field; elsewhere the
+        # manager already scopes to the active household.
+        account_number = self.cleaned_data["account_number"]
+        accounts = Account.objects.exclude(pk=self.instance.pk)
+        if "household" in self.cleaned_data:
+            accounts = accounts.filter(household=self.cleaned_data["household"])
+        if accounts.filter(account_number=account_number).exists():
+            raise ValidationError("An account with this account number already exists.")
+        return account_number
+
     def clean(self):
         cleaned_data = super().clean()
 
         account_type = cleaned_data.get("account_type")
-        routing_number = cleaned_data.get("routing_number")
-        interest_rate = cleaned_data.get("interest_rate")
-        due_date = cleaned_data.get("due_date")
+        for rule in Account.FIELD_RULES:
+            message = rule.error(account_type, cleaned_data.get(rule.field))
+            if message:
+                self.add_error(rule.field, message)
 
-        routing_required_types = {
-            Account.AccountType.CHECKING,
-            Account.AccountType.SAVINGS,
-        }
-        interest_required_types = {
-            Account.AccountType.SAVINGS,
-            Account.AccountType.CREDIT_CARD,
-            Account.AccountType.LOAN,
-        }
-        due_date_required_types = {
-            Account.AccountType.CREDIT_CARD,
-            Account.AccountType.LOAN,
-        }
+        return cleaned_data
 
-        if account_type in routing_required_types and not routing_number:
-            self.add_error(
-                "routing_number",
-                "Routing number is required for checking or savings accounts.",
-            )
-        if account_type not in routing_required_types and routing_number:
-            self.add_error(
-                "routing_number",
-                "Routing number is only allowed for checking or savings accounts.",
-            )
-        if account_type in interest_required_types and interest_rate is None:
-            self.add_error(
-                "interest_rate",
-                "Interest rate is required for this account type.",
-            )
-        if account_type not in interest_required_types and interest_rate is not None:
-            self.add_error(
-                "interest_rate",
-                "Interest rate is only allowed for savings, credit card, or loan accounts.",
-            )
-        if account_type in due_date_required_types and not due_date:
-            self.add_error(
-                "due_date",
-                "Due date is required for this account type.",
-            )
-        if account_type not in due_date_required_types and due_date:
-            self.add_error(
-                "due_date",
-                "Due date is only allowed for credit card or loan accounts.",
-            )
 
-        return cleaned_data
+class TransactionRestoreForm(forms.Form):
+    ids = IdListField()
+
+
+TRANSFER_LEG_HELP = "Part of a transfer. Delete the transfer and create a new one to change this."
+TRANSFER_LEG_MOVE_ERROR = "Transfers cannot be moved to another account. Delete them and create new ones instead."
 
 
 class TransactionForm(forms.ModelForm):
-    CREDIT_ACCOUNT_TYPES = {
-        Account.AccountType.CREDIT_CARD,
-        Account.AccountType.LOAN,
-    }
-    CREDIT_ALLOWED_TRANSACTION_TYPES = {
-        Transaction.TransactionType.PAYMENT,
-        Transaction.TransactionType.CHARGE,
-    }
+    CREDIT_ACCOUNT_TYPES = Account.CREDIT_TYPES
+    CREDIT_ALLOWED_TRANSACTION_TYPES = Transaction.CREDIT_ACCOUNT_TYPES
+    # Changing these on one leg would leave the other leg and both balances behind.
+    TRANSFER_LOCKED_FIELDS = ("account", "transaction_type", "amount", "posted_at")
 
     class Meta:
         model = Transaction
@@ -127,10 +123,17 @@ class TransactionForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         _apply_tailwind_classes(self)
         self.fields["amount"].widget.attrs.update({"step": "0.01", "min": "0"})
+        # The generated querysets were built at import time, outside any household.
+        self.fields["account"].queryset = Account.objects.all()
         self.fields["category"].queryset = self._category_queryset()
-        self.fields["category"].empty_label = "Select category"
+        self.fields["category"].required = False
+        self.fields["category"].empty_label = "Auto (apply rules)"
         self.fields["category"].widget.attrs.setdefault("data-category-select", "true")
         self._limit_transaction_type_choices()
+        if self.instance.transfer_id:
+            for name in self.TRANSFER_LOCKED_FIELDS:
+                self.fields[name].disabled = True
+                self.fields[name].help_text = TRANSFER_LEG_HELP
 
         posted_at = self.initial.get("posted_at") or (
             self.instance.posted_at if self.instance.pk else timezone.now()
@@ -166,16 +169,37 @@ class TransactionForm(forms.ModelForm):
     def clean_amount(self):
         amount = self.cleaned_data.get("amount")
         if amount is not None and amount <= 0:
-            raise forms.ValidationError("Amount must be greater than zero.")
+            raise forms.ValidationError(Transaction.AMOUNT_ERROR)
         return amount
 
     def _category_queryset(self):
         return Category.objects.filter(is_active=True).order_by("name")
 
+    def _apply_rules(self, cleaned_data):
+        account = cleaned_data.get("account")
+        category_id = get_matcher().match(
+            memo=cleaned_data.get("memo", ""),
+            reference=cleaned_data.get("reference", ""),
+            amount=cleaned_data.get("amount"),
+            account_id=account.pk if account else None,
+        )
+        if category_id is None:
+            return None
+        return self.fields["category"].queryset.filter(pk=category_id).first()
+
     def clean(self):
         cleaned_data = super().clean()
         account = cleaned_data.get("account")
         transaction_type = cleaned_data.get("transaction_type")
+        if not cleaned_data.get("category") and "category" not in self.errors:
+            category = self._apply_rules(cleaned_data)
+            if category is None:
+                self.add_error(
+                    "category",
+                    "Select a category; no categorization rule matches this transaction.",
+                )
+            else:
+                cleaned_data["category"] = category
         if (
             account
             and account.account_type in self.CREDIT_ACCOUNT_TYPES
@@ -189,6 +213,129 @@ class TransactionForm(forms.ModelForm):
         return cleaned_data
 
 
+class TransactionBulkForm(forms.Form):
+    ACTION_RECATEGORIZE = "recategorize"
+    ACTION_CHANGE_ACCOUNT = "change_account"
+    ACTION_MARK_CLEARED = "mark_cleared"
+    ACTION_MARK_UNCLEARED = "mark_uncleared"
+    ACTION_DELETE = "delete"
+
+    action = forms.ChoiceField(
+        choices=(
+            (ACTION_RECATEGORIZE, "Change category"),
+            (ACTION_CHANGE_ACCOUNT, "Move to account"),
+            (ACTION_MARK_CLEARED, "Mark cleared"),
+            (ACTION_MARK_UNCLEARED, "Mark pending"),
+            (ACTION_DELETE, "Delete"),
+        )
+    )
+    ids = IdListField(error_messages={"required": "Select at least one transaction."})
+    category = forms.ModelChoiceField(queryset=Category.objects.none(), required=False)
+    account = forms.ModelChoiceField(queryset=Account.objects.none(), required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["category"].queryset = Category.objects.filter(is_active=True).order_by("name")
+        self.fields["account"].queryset = Account.objects.all()
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get("action")
+        ids = cleaned_data.get("ids")
+        if not action or not ids:
+            return cleaned_data
+
+        self.queryset = Transaction.objects.filter(pk__in=ids)
+        if action == self.ACTION_RECATEGORIZE and not cleaned_data.get("category"):
+            self.add_error("category", "Choose the category to apply.")
+        if action == self.ACTION_CHANGE_ACCOUNT:
+            account = cleaned_data.get("account")
+            if not account:
+                self.add_error("account", "Choose the account to move transactions to.")
+            elif self.queryset.filter(transfer_id__isnull=False).exists():
+                self.add_error("account", TRANSFER_LEG_MOVE_ERROR)
+            elif (
+                account.account_type in TransactionForm.CREDIT_ACCOUNT_TYPES
+                and self.queryset.exclude(
+                    transaction_type__in=TransactionForm.CREDIT_ALLOWED_TRANSACTION_TYPES
+                ).exists()
+            ):
+                self.add_error(
+                    "account",
+                    "Credit card and loan accounts support only Payment or Charge transactions.",
+                )
+        return cleaned_data
+
+    def save(self):
+        """Apply the action with set-based queries; returns affected account ids."""
+        action = self.cleaned_data["action"]
+        queryset = self.queryset
+        with transaction.atomic():
+            account_ids = set(queryset.values_list("account_id", flat=True).distinct())
+            if action == self.ACTION_RECATEGORIZE:
+                ChangeLog.objects.log_update(queryset, category=self.cleaned_data["category"])
+                queryset.update(category=self.cleaned_data["category"], updated_at=timezone.now())
+            elif action == self.ACTION_CHANGE_ACCOUNT:
+                account = self.cleaned_data["account"]
+                networth.mark_dirty_at(queryset.aggregate(earliest=Min("posted_at"))["earliest"])
+                ChangeLog.objects.log_update(queryset, account=account)
+                queryset.update(account=account, updated_at=timezone.now())
+                account_ids.add(account.pk)
+            elif action == self.ACTION_MARK_CLEARED:
+                queryset.set_cleared(True)
+            elif action == self.ACTION_MARK_UNCLEARED:
+                queryset.set_cleared(False)
+            elif action == self.ACTION_DELETE:
+                # The other legs of deleted transfers go too.
+                account_ids.update(
+                    with_partner_legs(queryset, Transaction.objects.all()).values_list("account_id", flat=True)
+                )
+                soft_delete_transactions(queryset)
+            finance_cache.invalidate(finance_cache.TRANSACTIONS)
+        return sorted(account_ids)
+
+
+class TransferForm(forms.Form):
+    from_account = forms.ModelChoiceField(queryset=Account.objects.none(), label="From account")
+    to_account = forms.ModelChoiceField(queryset=Account.objects.none(), label="To account")
+    amount = forms.DecimalField(max_digits=12, decimal_places=2)
+    category = forms.ModelChoiceField(queryset=Category.objects.none())
+    memo = forms.CharField(max_length=255, required=False)
+    posted_at = forms.DateTimeField(
+        widget=forms.DateTimeInput(attrs={"type": "datetime-local"}, format="%Y-%m-%dT%H:%M"),
+    )
+    is_cleared = forms.BooleanField(required=False, label="Cleared")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        accounts = Account.objects.all()
+        self.fields["from_account"].queryset = accounts
+        self.fields["to_account"].queryset = accounts
+        self.fields["category"].queryset = Category.objects.filter(is_active=True).order_by("name")
+        self.fields["category"].empty_label = "Select category"
+        self.fields["category"].widget.attrs.setdefault("data-category-select", "true")
+        _apply_tailwind_classes(self)
+        self.fields["amount"].widget.attrs.update({"step": "0.01", "min": "0"})
+        self.initial.setdefault("posted_at", timezone.now().strftime("%Y-%m-%dT%H:%M"))
+
+    def clean_amount(self):
+        amount = self.cleaned_data.get("amount")
+        if amount is not None and amount <= 0:
+            raise forms.ValidationError(Transaction.AMOUNT_ERROR)
+        return amount
+
+    def clean(self):
+        cleaned_data = super().clean()
+        from_account = cleaned_data.get("from_account")
+        to_account = cleaned_data.get("to_account")
+        if from_account and to_account and from_account == to_account:
+            self.add_error("to_account", "Choose a different account to transfer to.")
+        return cleaned_data
+
+    def save(self):
+        return create_transfer(**self.cleaned_data)
+
+
 class CategoryForm(forms.ModelForm):
     class Meta:
         model = Category
@@ -201,3 +348,68 @@ class CategoryForm(forms.ModelForm):
     def clean_name(self):
         name = self.cleaned_data.get("name", "")
         return " ".join(name.split())
+
+
+class ReconcileForm(forms.Form):
+    start = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
+    end = forms.DateField(widget=forms.DateInput(attrs={"type": "date"}))
+    opening_balance = forms.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        required=False,
+        label="Statement opening balance",
+    )
+    statement_balance = forms.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        required=False,
+        label="Statement closing balance",
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _apply_tailwind_classes(self)
+        for name in ("opening_balance", "statement_balance"):
+            self.fields[name].widget.attrs.update({"step": "0.01"})
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get("start")
+        end = cleaned_data.get("end")
+        if start and end and start > end:
+            self.add_error("end", "End date must be on or after the start date.")
+        return cleaned_data
+
+
+class ReconcileBulkForm(ReconcileForm):
+    ACTION_CLEAR = "clear"
+    ACTION_UNCLEAR = "unclear"
+
+    action = forms.ChoiceField(
+        choices=((ACTION_CLEAR, "Mark cleared"), (ACTION_UNCLEAR, "Mark uncleared")),
+    )
+    ids = IdListField()
+
+
+class CategoryMergeForm(forms.Form):
+    target = forms.ModelChoiceField(queryset=Category.objects.none(), label="Merge into")
+
+    def __init__(self, *args, source, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.source = source
+        self.fields["target"].queryset = Category.objects.exclude(pk=source.pk).order_by("name")
+        self.fields["target"].empty_label = "Select category"
+        _apply_tailwind_classes(self)
+
+    def save(self):
+        """Move every transaction (archived ones too) and rule to the target, then delete the source."""
+        target = self.cleaned_data["target"]
+        with transaction.atomic():
+            moved_rows = Transaction.all_objects.filter(category=self.source)
+            ChangeLog.objects.log_update(moved_rows, category=target)
+            moved = moved_rows.update(category=target, updated_at=timezone.now())
+            self.source.rules.update(category=target, updated_at=timezone.now())
+            reassign_category(self.source, target)
+            self.source.delete()
+            finance_cache.invalidate(finance_cache.TRANSACTIONS, finance_cache.RULES)
+        return target, moved
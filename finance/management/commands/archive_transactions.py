@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.archive import DEFAULT_ARCHIVE_BATCH_SIZE, archive_transactions, default_through_year
+
+
+class Command(BaseCommand):
+    help = (
+        "Move cleared transactions from closed years into the archive table, leaving monthly summaries "
+        "behind so reports and net worth stay exact while the hot table stays small."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--through-year",
+            type=int,
+            default=None,
+            help="Archive transactions posted in or before this year (default: two years ago).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_ARCHIVE_BATCH_SIZE,
+            help="Transactions moved per database transaction.",
+        )
+
+    def handle(self, *args, **options):
+        def progress(archived):
+            self.stdout.write(f"  archived {archived} transaction(s)")
+
+        through_year = options["through_year"] or default_through_year()
+        try:
+            archived = archive_transactions(
+                through_year,
+                batch_size=max(1, options["batch_size"]),
+                progress=progress if options["verbosity"] > 1 else None,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} transaction(s) through {through_year}."))
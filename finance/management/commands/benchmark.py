@@ -0,0 +1,183 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.template.loader import render_to_string
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from finance import tenancy
+from finance.models import Account, Category, Household, Transaction
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time common finance queries against the configured database backend. "
+        "Run once per DB_ENGINE profile (e.g. DB_ENGINE=sqlite and DB_ENGINE=postgresql) "
+        "to compare backends. All generated rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--accounts", type=int, default=20, help="Number of accounts to generate.")
+        parser.add_argument(
+            "--transactions",
+            type=int,
+            default=20000,
+            help="Number of transactions to generate across all accounts.",
+        )
+        parser.add_argument(
+            "--render-rows",
+            type=int,
+            default=10000,
+            help="Transaction rows rendered by the Django vs. Jinja2 row partial scenarios.",
+        )
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per scenario.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for generated data.")
+
+    def handle(self, *args, **options):
+        self.repeat = max(1, options["repeat"])
+        self.random = random.Random(options["seed"])
+        self.render_rows = options["render_rows"]
+        self.client = Client()
+        self.results = []
+
+        self.stdout.write(f"Backend: {self._backend_label()}")
+        try:
+            with transaction.atomic(), tenancy.activate(self._household()):
+                self._timed_once(
+                    "bulk insert",
+                    lambda: self._generate(options["accounts"], options["transactions"]),
+                )
+                for label, func in self._scenarios():
+                    self._timed(label, func)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        width = max(len(label) for label, *_ in self.results)
+        for label, median, best in self.results:
+            self.stdout.write(f"  {label.ljust(width)}  median {median * 1000:8.1f} ms   best {best * 1000:8.1f} ms")
+
+    def _household(self):
+        """A throwaway household with a signed-in member, so the page scenarios see its data."""
+        household = Household.objects.create(name="Benchmark")
+        user = get_user_model().objects.create_user(username=f"benchmark-{household.pk}")
+        household.members.add(user)
+        self.client.force_login(user)
+        return household
+
+    def _backend_label(self):
+        if connection.vendor != "sqlite":
+            return connection.vendor
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
+            cursor.execute("PRAGMA synchronous")
+            synchronous = cursor.fetchone()[0]
+        return f"sqlite (journal_mode={journal_mode}, synchronous={synchronous})"
+
+    def _generate(self, account_count, transaction_count):
+        self.category = Category.objects.create(name="Benchmark")
+        self.accounts = Account.objects.bulk_create(
+            Account(
+                name=f"Benchmark {index}",
+                account_number=f"BENCH-{index:06d}",
+                account_type=Account.AccountType.CHECKING,
+                routing_number="000000000",
+                balance=Decimal("0.00"),
+            )
+            for index in range(account_count)
+        )
+        now = timezone.now()
+        types = (Transaction.TransactionType.EXPENSE, Transaction.TransactionType.INCOME)
+        Transaction.objects.bulk_create(
+            (
+                Transaction(
+                    account=self.random.choice(self.accounts),
+                    transaction_type=self.random.choice(types),
+                    amount=Decimal(self.random.randint(100, 50000)) / 100,
+                    category=self.category,
+                    memo=f"Benchmark row {index}",
+                    posted_at=now - timedelta(minutes=self.random.randint(0, 60 * 24 * 365 * 3)),
+                    is_cleared=self.random.random() < 0.8,
+                )
+                for index in range(transaction_count)
+            ),
+            batch_size=2000,
+        )
+
+    def _scenarios(self):
+        account = self.accounts[0]
+        htmx = {"HTTP_HX_REQUEST": "true"}
+        scenarios = [
+            ("account list", lambda: self.client.get(reverse("finance:account-list"), **htmx)),
+            (
+                "account month table",
+                lambda: self.client.get(reverse("finance:account-transactions", args=[account.pk])),
+            ),
+            (
+                "transaction list (one account)",
+                lambda: self.client.get(reverse("finance:transaction-list"), {"account": account.pk}, **htmx),
+            ),
+            (
+                "reports (5 years, uncached)",
+                lambda: (cache.clear(), self.client.get(reverse("finance:reports"), {"years": 5})),
+            ),
+            (
+                "net worth (3 years daily, cold)",
+                lambda: (cache.clear(), self.client.get(reverse("finance:net-worth"), {"years": 3, "interval": "day"})),
+            ),
+            (
+                "net worth (3 years daily, warm)",
+                lambda: self.client.get(reverse("finance:net-worth"), {"years": 3, "interval": "day"}),
+            ),
+            ("single insert", lambda: self._insert_one(account)),
+        ]
+        rows = list(
+            Transaction.objects.select_related("account", "category").order_by("-posted_at")[: self.render_rows]
+        )
+        for engine in ("django", "jinja2"):
+            scenarios.append(
+                (
+                    f"render {len(rows)} rows ({engine})",
+                    lambda engine=engine: render_to_string(
+                        "finance/partials/transaction_rows.html",
+                        {"transactions": rows, "selectable": True},
+                        using=engine,
+                    ),
+                )
+            )
+        return scenarios
+
+    def _insert_one(self, account):
+        Transaction.objects.create(
+            account=account,
+            transaction_type=Transaction.TransactionType.EXPENSE,
+            amount=Decimal("1.00"),
+            category=self.category,
+        )
+
+    def _timed_once(self, label, func):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        self.results.append((label, elapsed, elapsed))
+
+    def _timed(self, label, func):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        self.results.append((label, statistics.median(timings), min(timings)))
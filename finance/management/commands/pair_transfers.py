@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from finance.transfers import pair_unlinked_transfers
+
+
+class Command(BaseCommand):
+    help = "Link existing unpaired transfer rows that match by amount within a date window."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--window-days",
+            type=int,
+            default=3,
+            help="Maximum number of days between the two legs of a transfer.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many pairs would be linked without writing.",
+        )
+
+    def handle(self, *args, **options):
+        pairs = pair_unlinked_transfers(
+            timedelta(days=options["window_days"]),
+            dry_run=options["dry_run"],
+        )
+        verb = "Would link" if options["dry_run"] else "Linked"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {pairs} transfer pair(s)."))
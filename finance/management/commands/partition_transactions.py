@@ -0,0 +1,83 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from finance.partitions import (
+    DEFAULT_MONTHS_AHEAD,
+    PartitioningError,
+    convert_sql,
+    detach_partitions_sql,
+    ensure_partitions_sql,
+    is_partitioned,
+    require_postgresql,
+)
+
+
+def parse_month(value):
+    try:
+        year, month = value.split("-")
+        return date(int(year), int(month), 1)
+    except (ValueError, TypeError):
+        raise CommandError(f"Expected a month like 2024-01, got {value!r}.") from None
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintain monthly PostgreSQL partitions of the transaction table: convert it once with --convert, "
+        "then run regularly to create upcoming months ahead of time and detach old ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Rebuild the plain table as a partitioned one. Locks and copies the whole table.",
+        )
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=DEFAULT_MONTHS_AHEAD,
+            help="Create partitions through this many months after the current one.",
+        )
+        parser.add_argument(
+            "--detach-before",
+            type=parse_month,
+            metavar="YYYY-MM",
+            help="Detach (but keep) the partitions of months before this one.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Print the SQL instead of running it.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            require_postgresql()
+            with transaction.atomic(), connection.cursor() as cursor:
+                statements = self._plan(cursor, options)
+                for statement in statements:
+                    if options["dry_run"]:
+                        self.stdout.write(f"{statement};")
+                    else:
+                        cursor.execute(statement)
+        except PartitioningError as exc:
+            raise CommandError(str(exc)) from exc
+        if not options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Ran {len(statements)} partition statement(s)."))
+
+    def _plan(self, cursor, options):
+        months_ahead = max(0, options["months_ahead"])
+        if options["convert"]:
+            if is_partitioned(cursor):
+                raise PartitioningError("The transaction table is already partitioned.")
+            if options["detach_before"]:
+                raise PartitioningError("Convert first, then detach in a separate run.")
+            return convert_sql(cursor, months_ahead=months_ahead)
+        if not is_partitioned(cursor):
+            raise PartitioningError("The transaction table is not partitioned yet; run with --convert first.")
+        statements = ensure_partitions_sql(cursor, months_ahead=months_ahead)
+        if options["detach_before"]:
+            statements += detach_partitions_sql(cursor, options["detach_before"])
+        return statements
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from finance.deletion import DEFAULT_PURGE_BATCH_SIZE, DEFAULT_RETENTION, purge_deleted
+
+
+class Command(BaseCommand):
+    help = (
+        "Permanently remove soft-deleted accounts and transactions older than the retention window, "
+        "in small batches so no single delete holds locks for long."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=DEFAULT_RETENTION.days,
+            help="Only purge rows deleted at least this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_PURGE_BATCH_SIZE,
+            help="Transactions deleted per database transaction.",
+        )
+
+    def handle(self, *args, **options):
+        def progress(purged):
+            self.stdout.write(f"  purged {purged} transaction(s)")
+
+        transactions, accounts = purge_deleted(
+            timedelta(days=options["older_than_days"]),
+            batch_size=max(1, options["batch_size"]),
+            progress=progress if options["verbosity"] > 1 else None,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Purged {transactions} transaction(s) and {accounts} account(s).")
+        )
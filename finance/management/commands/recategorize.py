@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from finance.categorization import recategorize_history
+from finance.models import Category
+
+
+class Command(BaseCommand):
+    help = "Re-apply categorization rules to existing transactions in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of transactions read and written per batch.",
+        )
+        parser.add_argument(
+            "--only-category",
+            help="Slug of a category; only transactions currently in it are re-categorized.",
+        )
+        parser.add_argument(
+            "--household",
+            type=int,
+            help="Id of the household whose --only-category slug is meant; slugs repeat across households.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report how many transactions would change without writing.",
+        )
+
+    def handle(self, *args, **options):
+        only_category = None
+        if options["only_category"]:
+            if options["household"] is None:
+                raise CommandError("--only-category needs --household.")
+            try:
+                only_category = Category.objects.get(
+                    household_id=options["household"], slug=options["only_category"]
+                )
+            except Category.DoesNotExist as exc:
+                raise CommandError(
+                    f"Unknown category slug in household {options['household']}: {options['only_category']}"
+                ) from exc
+            except Category.MultipleObjectsReturned as exc:
+                raise CommandError(f"Category slug is not unique: {options['only_category']}") from exc
+
+        scanned, changed = recategorize_history(
+            batch_size=options["batch_size"],
+            only_category=only_category,
+            dry_run=options["dry_run"],
+            progress=lambda done, total: self.stdout.write(f"  {done}/{total} scanned"),
+        )
+        verb = "would change" if options["dry_run"] else "changed"
+        self.stdout.write(self.style.SUCCESS(f"Scanned {scanned} transactions; {verb} {changed}."))
@@ -0,0 +1,51 @@
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from finance.tasks import claim_next, default_worker_id, run_task
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks. Start one or more alongside the web server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain the queue and exit instead of polling.")
+        parser.add_argument("--sleep", type=float, default=2.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--max-tasks", type=int, default=None, help="Exit after running this many tasks.")
+        parser.add_argument(
+            "--lease-seconds",
+            type=int,
+            default=300,
+            help="How long a task may go without reporting progress before another worker retries it.",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        worker_id = default_worker_id()
+        lease = timedelta(seconds=options["lease_seconds"])
+        ran = 0
+        self.stdout.write(f"Worker {worker_id} started.")
+        while not self.stopping and (options["max_tasks"] is None or ran < options["max_tasks"]):
+            # Like a request, each pass drops connections past CONN_MAX_AGE or left broken.
+            close_old_connections()
+            claimed = claim_next(worker_id, lease)
+            if claimed is None:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+            self.stdout.write(f"Running {claimed}…")
+            finished = run_task(claimed, lease)
+            ran += 1
+            style = self.style.SUCCESS if finished.status == finished.Status.SUCCEEDED else self.style.WARNING
+            self.stdout.write(style(f"  {finished}"))
+        self.stdout.write(f"Worker {worker_id} stopped after {ran} task(s).")
+
+    def _stop(self, signum, frame):
+        # Finish the current task, then exit.
+        self.stopping = True
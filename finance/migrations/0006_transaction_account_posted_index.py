@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0005_alter_transaction_transaction_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'posted_at'], name='finance_txn_account_posted'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_transaction_account_posted_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(condition=models.Q(('due_date__isnull', False)), fields=['due_date'], name='finance_account_due_date'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_account_due_date_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorizationRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('match_field', models.CharField(choices=[('any', 'Memo or reference'), ('memo', 'Memo'), ('reference', 'Reference')], default='any', max_length=20)),
+                ('match_type', models.CharField(choices=[('contains', 'Contains'), ('regex', 'Regular expression')], default='contains', max_length=20)),
+                ('pattern', models.CharField(blank=True, help_text='Case-insensitive text to look for; leave blank to match on amount/account only.', max_length=255)),
+                ('min_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('max_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('priority', models.PositiveIntegerField(default=100, help_text='Lower numbers are tried first.')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account', models.ForeignKey(blank=True, help_text='Only apply to transactions on this account.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='categorization_rules', to='finance.account')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rules', to='finance.category')),
+            ],
+            options={
+                'ordering': ['priority', 'id'],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0008_categorization_rule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='transfer_direction',
+            field=models.CharField(blank=True, choices=[('out', 'Outgoing'), ('in', 'Incoming')], editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='transfer_id',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, help_text='Shared by both legs of a transfer between accounts.', null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0009_transaction_transfer_link'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['posted_at', 'transaction_type'], name='finance_txn_posted_type'),
+        ),
+    ]
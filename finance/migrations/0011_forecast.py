@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:13
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0010_transaction_posted_type_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecurringPattern',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('expense', 'Expense'), ('income', 'Income'), ('charge', 'Charge'), ('payment', 'Payment'), ('transfer', 'Transfer'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('memo', models.CharField(max_length=255)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('interval_days', models.PositiveIntegerField()),
+                ('is_monthly', models.BooleanField(default=False, help_text='Projected on the same day of each month rather than every interval_days.')),
+                ('occurrences', models.PositiveIntegerField()),
+                ('last_posted_on', models.DateField()),
+                ('detected_at', models.DateTimeField(auto_now=True)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_patterns', to='finance.account')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recurring_patterns', to='finance.category')),
+            ],
+            options={
+                'ordering': ['account', 'memo'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ForecastEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_on', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('expense', 'Expense'), ('income', 'Income'), ('charge', 'Charge'), ('payment', 'Payment'), ('transfer', 'Transfer'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('memo', models.CharField(blank=True, max_length=255)),
+                ('source', models.CharField(choices=[('recurring', 'Recurring'), ('due_date', 'Payment due'), ('interest', 'Interest')], max_length=20)),
+                ('generated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='forecast_entries', to='finance.account')),
+                ('pattern', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='forecast_entries', to='finance.recurringpattern')),
+            ],
+            options={
+                'ordering': ['due_on', 'id'],
+                'indexes': [models.Index(fields=['account', 'due_on'], name='finance_forecast_account_due')],
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0012_change_log'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='account',
+            name='finance_account_due_date',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='finance_txn_account_posted',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='finance_txn_posted_type',
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AlterField(
+            model_name='account',
+            name='account_number',
+            field=models.CharField(max_length=50),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('due_date__isnull', False)), fields=['due_date'], name='finance_account_live_due_date'),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='finance_account_deleted_at'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['account', 'posted_at'], name='finance_txn_live_account'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['posted_at', 'transaction_type'], name='finance_txn_live_posted_type'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', False)), fields=['deleted_at'], name='finance_txn_deleted_at'),
+        ),
+        migrations.AddConstraint(
+            model_name='account',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('account_number',), name='finance_account_number_live', violation_error_message='An account with this account number already exists.'),
+        ),
+    ]
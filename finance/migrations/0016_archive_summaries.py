@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:39
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0015_sync_tombstones'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTransaction',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transaction_type', models.CharField(choices=[('expense', 'Expense'), ('income', 'Income'), ('charge', 'Charge'), ('payment', 'Payment'), ('transfer', 'Transfer'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('memo', models.CharField(blank=True, max_length=255)),
+                ('reference', models.CharField(blank=True, max_length=100)),
+                ('posted_at', models.DateTimeField()),
+                ('is_cleared', models.BooleanField(default=True)),
+                ('transfer_id', models.UUIDField(blank=True, null=True)),
+                ('transfer_direction', models.CharField(blank=True, choices=[('out', 'Outgoing'), ('in', 'Incoming')], max_length=3)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_transactions', to='finance.account')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_transactions', to='finance.category')),
+            ],
+            options={
+                'ordering': ['-posted_at', '-id'],
+                'indexes': [models.Index(fields=['account', 'posted_at'], name='finance_archive_account')],
+            },
+        ),
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month, in local time.')),
+                ('transaction_type', models.CharField(choices=[('expense', 'Expense'), ('income', 'Income'), ('charge', 'Charge'), ('payment', 'Payment'), ('transfer', 'Transfer'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('is_transfer', models.BooleanField(default=False)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('signed_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='finance.account')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='monthly_summaries', to='finance.category')),
+            ],
+            options={
+                'ordering': ['month', 'account_id', 'category_id'],
+                'constraints': [models.UniqueConstraint(fields=('account', 'category', 'month', 'transaction_type', 'is_transfer'), name='finance_summary_unique_key')],
+            },
+        ),
+    ]
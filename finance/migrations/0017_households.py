@@ -0,0 +1,129 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:43
+
+import django.db.models.deletion
+import finance.tenancy
+from django.conf import settings
+from django.db import migrations, models
+
+
+def adopt_existing_data(apps, schema_editor):
+    """Give a single-household install's rows and users to one household."""
+    Household = apps.get_model("finance", "Household")
+    Account = apps.get_model("finance", "Account")
+    Category = apps.get_model("finance", "Category")
+    Tombstone = apps.get_model("finance", "Tombstone")
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    if not (Account.objects.exists() or Category.objects.exists() or User.objects.exists()):
+        return
+    household = Household.objects.create(name="Household")
+    household.members.set(User.objects.all())
+    Account.objects.update(household=household)
+    Category.objects.update(household=household)
+    Tombstone.objects.update(household=household)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0016_archive_summaries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Household',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=150)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RemoveConstraint(
+            model_name='account',
+            name='finance_account_number_live',
+        ),
+        migrations.RemoveIndex(
+            model_name='account',
+            name='finance_account_live_due_date',
+        ),
+        migrations.RemoveIndex(
+            model_name='category',
+            name='finance_category_updated',
+        ),
+        migrations.RemoveIndex(
+            model_name='tombstone',
+            name='finance_tombstone_time',
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='slug',
+            field=models.SlugField(editable=False, max_length=120),
+        ),
+        migrations.AddField(
+            model_name='household',
+            name='members',
+            field=models.ManyToManyField(blank=True, related_name='households', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='account',
+            name='household',
+            field=models.ForeignKey(default=finance.tenancy.default_household_id, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='accounts', to='finance.household'),
+        ),
+        migrations.AddField(
+            model_name='backgroundtask',
+            name='household',
+            field=models.ForeignKey(blank=True, default=finance.tenancy.default_household_id, help_text='Household the task runs for; empty for maintenance jobs over every household.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='background_tasks', to='finance.household'),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='household',
+            field=models.ForeignKey(default=finance.tenancy.default_household_id, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='categories', to='finance.household'),
+        ),
+        migrations.AddField(
+            model_name='tombstone',
+            name='household',
+            field=models.ForeignKey(blank=True, default=finance.tenancy.default_household_id, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to='finance.household'),
+        ),
+        migrations.RunPython(adopt_existing_data, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='account',
+            name='household',
+            field=models.ForeignKey(default=finance.tenancy.default_household_id, on_delete=django.db.models.deletion.CASCADE, related_name='accounts', to='finance.household'),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='household',
+            field=models.ForeignKey(default=finance.tenancy.default_household_id, on_delete=django.db.models.deletion.CASCADE, related_name='categories', to='finance.household'),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['household', 'name'], name='finance_account_live_household'),
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True), ('due_date__isnull', False)), fields=['household', 'due_date'], name='finance_account_live_due_date'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['household', 'name'], name='finance_category_household'),
+        ),
+        migrations.AddIndex(
+            model_name='category',
+            index=models.Index(fields=['household', 'updated_at', 'id'], name='finance_category_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='tombstone',
+            index=models.Index(fields=['household', 'deleted_at', 'id'], name='finance_tombstone_time'),
+        ),
+        migrations.AddConstraint(
+            model_name='account',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('household', 'account_number'), name='finance_account_number_live', violation_error_message='An account with this account number already exists.'),
+        ),
+        migrations.AddConstraint(
+            model_name='category',
+            constraint=models.UniqueConstraint(fields=('household', 'slug'), name='finance_category_household_slug'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-10-19 00:49
+
+from django.db import migrations, models
+
+REPORTED_IDS = 20
+
+
+def check_existing_rows(apps, schema_editor):
+    """Refuse to add the constraints below while rows would violate them."""
+    problems = []
+    for operation in Migration.operations:
+        if not isinstance(operation, migrations.AddConstraint):
+            continue
+        model = apps.get_model("finance", operation.model_name)
+        constraint = operation.constraint
+        ids = list(
+            model._base_manager.exclude(constraint.condition).order_by("pk").values_list("pk", flat=True)[
+                : REPORTED_IDS + 1
+            ]
+        )
+        if ids:
+            shown = ", ".join(str(pk) for pk in ids[:REPORTED_IDS])
+            more = " and more" if len(ids) > REPORTED_IDS else ""
+            problems.append(
+                f"{constraint.name}: {constraint.violation_error_message} "
+                f"{model._meta.verbose_name_plural} {shown}{more}"
+            )
+    if problems:
+        raise ValueError(
+            "Fix these rows (for example in the admin), then run migrate again:\n" + "\n".join(problems)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0017_households'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_existing_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='account',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('account_type__in', ('checking', 'savings')), models.Q(('routing_number', ''), _negated=True)), models.Q(models.Q(('account_type__in', ('checking', 'savings')), _negated=True), ('routing_number', '')), _connector='OR'), name='finance_account_routing_number_by_type', violation_error_message='Routing number does not match the account type.'),
+        ),
+        migrations.AddConstraint(
+            model_name='account',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('account_type__in', ('savings', 'credit_card', 'loan')), ('interest_rate__isnull', False), ('interest_rate__gte', 0)), models.Q(models.Q(('account_type__in', ('savings', 'credit_card', 'loan')), _negated=True), models.Q(('interest_rate__isnull', False), _negated=True)), _connector='OR'), name='finance_account_interest_rate_by_type', violation_error_message='Interest rate does not match the account type.'),
+        ),
+        migrations.AddConstraint(
+            model_name='account',
+            constraint=models.CheckConstraint(condition=models.Q(models.Q(('account_type__in', ('credit_card', 'loan')), ('due_date__isnull', False)), models.Q(models.Q(('account_type__in', ('credit_card', 'loan')), _negated=True), models.Q(('due_date__isnull', False), _negated=True)), _connector='OR'), name='finance_account_due_date_by_type', violation_error_message='Due date does not match the account type.'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.CheckConstraint(condition=models.Q(('amount__gt', 0)), name='finance_txn_amount_positive', violation_error_message='Amount must be greater than zero.'),
+        ),
+    ]
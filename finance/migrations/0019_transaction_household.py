@@ -0,0 +1,52 @@
+# Generated by Django 6.0.1 on 2026-10-19 01:07
+
+import django.db.models.deletion
+import finance.tenancy
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_account_household(apps, schema_editor):
+    """Give every transaction its account's household."""
+    Account = apps.get_model("finance", "Account")
+    Transaction = apps.get_model("finance", "Transaction")
+    Transaction.objects.update(
+        household=Subquery(Account.objects.filter(pk=OuterRef("account_id")).values("household_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0018_account_type_checks'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='finance_txn_live_posted_type',
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='finance_txn_updated',
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='household',
+            field=models.ForeignKey(default=finance.tenancy.default_household_id, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='finance.household'),
+        ),
+        migrations.RunPython(copy_account_household, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='transaction',
+            name='household',
+            field=models.ForeignKey(default=finance.tenancy.default_household_id, editable=False, on_delete=django.db.models.deletion.CASCADE, related_name='transactions', to='finance.household'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('deleted_at__isnull', True)), fields=['household', 'posted_at', 'transaction_type'], name='finance_txn_live_posted_type'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['household', 'updated_at', 'id'], name='finance_txn_updated'),
+        ),
+    ]
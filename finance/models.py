@@ -1,18 +1,119 @@
+import re
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.text import slugify
 
+from . import cache as finance_cache
+from . import tenancy
+
+
+class LoadedValuesMixin:
+    """Remember the column values an instance was loaded with.
+
+    Signal receivers compare against ``_loaded_values`` to see what a save
+    changed without re-reading the row.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is not None:
+            for field in self._meta.concrete_fields:
+                if fields is None or field.attname in fields or field.name in fields:
+                    loaded[field.attname] = getattr(self, field.attname)
+
+    def loaded_value(self, attname, default=None):
+        return getattr(self, "_loaded_values", {}).get(attname, default)
+
+
+class AuditedMixin(LoadedValuesMixin):
+    """Save inside a transaction so the ``ChangeLog`` row written by the
+    ``post_save`` receiver commits or rolls back with the change itself."""
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+
+
+class Household(models.Model):
+    """The tenant: accounts and categories belong to one; see ``finance.tenancy``."""
+
+    name = models.CharField(max_length=150)
+    members = models.ManyToManyField(settings.AUTH_USER_MODEL, related_name="households", blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class TenantManager(models.Manager):
+    """Limit queries to the active household; ``tenant_lookup`` is the path to it."""
+
+    tenant_lookup = "household"
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        household_id = tenancy.current_household_id()
+        if household_id is tenancy.UNSCOPED:
+            return queryset
+        return queryset.filter(**{self.tenant_lookup: household_id})
+
+
+class AccountTenantManager(TenantManager):
+    tenant_lookup = "account__household"
+
+
+class CategoryTenantManager(TenantManager):
+    tenant_lookup = "category__household"
+
+
+def household_field(related_name, **kwargs):
+    """The owning household, defaulting to the active one."""
+    return models.ForeignKey(
+        Household,
+        on_delete=models.CASCADE,
+        default=tenancy.default_household_id,
+        related_name=related_name,
+        **kwargs,
+    )
+
 
 class Category(models.Model):
+    household = household_field("categories")
     name = models.CharField(max_length=100)
-    slug = models.SlugField(max_length=120, unique=True, editable=False)
+    slug = models.SlugField(max_length=120, editable=False)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TenantManager()
+
     class Meta:
         ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(fields=["household", "slug"], name="finance_category_household_slug"),
+        ]
+        indexes = [
+            models.Index(fields=["household", "name"], name="finance_category_household"),
+            models.Index(fields=["household", "updated_at", "id"], name="finance_category_updated"),
+        ]
 
     def __str__(self) -> str:
         return self.name
@@ -23,22 +124,155 @@ class Category(models.Model):
         base_slug = slugify(self.name or "category") or "category"
         slug = base_slug
         counter = 2
-        while Category.objects.exclude(pk=self.pk).filter(slug=slug).exists():
+        siblings = Category._base_manager.filter(household_id=self.household_id).exclude(pk=self.pk)
+        while siblings.filter(slug=slug).exists():
             slug = f"{base_slug}-{counter}"
             counter += 1
         self.slug = slug
         super().save(*args, **kwargs)
 
 
-class Account(models.Model):
-    class AccountType(models.TextChoices):
-        CHECKING = "checking", "Checking"
-        SAVINGS = "savings", "Savings"
-        CREDIT_CARD = "credit_card", "Credit Card"
-        LOAN = "loan", "Loan"
+class SoftDeleteManager(TenantManager):
+    """Default manager that hides soft-deleted rows; use ``all_objects`` to see them."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class AccountQuerySet(models.QuerySet):
+    def with_activity(self, month_start):
+        """Annotate transaction statistics in a single grouped query.
+
+        Adds ``transaction_count``, ``last_activity``, ``uncleared_total`` and
+        ``month_net`` (net signed amount posted on or after ``month_start``).
+        Soft-deleted transactions are not counted; archived ones are, through
+        their monthly summaries.
+        """
+        signed = Transaction.signed_amount_expression("transactions__")
+        zero = Value(Decimal("0.00"), output_field=models.DecimalField(max_digits=12, decimal_places=2))
+        live = Q(transactions__deleted_at__isnull=True)
+        archived = (
+            MonthlySummary.objects.filter(account=OuterRef("pk"))
+            .order_by()
+            .values("account")
+            .annotate(count=Sum("transaction_count"))
+            .values("count")
+        )
+        return self.annotate(
+            transaction_count=Count("transactions", filter=live) + Coalesce(Subquery(archived), 0),
+            last_activity=Max("transactions__posted_at", filter=live),
+            uncleared_total=Coalesce(
+                Sum(signed, filter=live & Q(transactions__is_cleared=False)),
+                zero,
+            ),
+            month_net=Coalesce(
+                Sum(signed, filter=live & Q(transactions__posted_at__gte=month_start)),
+                zero,
+            ),
+        )
+
+    def due_within(self, start, end):
+        """Credit card and loan accounts due between ``start`` and ``end``.
+
+        Annotates ``last_payment_at`` (latest PAYMENT posting) in the same query.
+        """
+        return (
+            self.filter(
+                due_date__range=(start, end),
+                account_type__in=Account.CREDIT_TYPES,
+            )
+            .annotate(
+                last_payment_at=Max(
+                    "transactions__posted_at",
+                    filter=Q(
+                        transactions__transaction_type=Transaction.TransactionType.PAYMENT,
+                        transactions__deleted_at__isnull=True,
+                    ),
+                )
+            )
+            .order_by("due_date", "name")
+        )
+
+
+class AccountType(models.TextChoices):
+    CHECKING = "checking", "Checking"
+    SAVINGS = "savings", "Savings"
+    CREDIT_CARD = "credit_card", "Credit Card"
+    LOAN = "loan", "Loan"
+
+
+@dataclass(frozen=True)
+class AccountFieldRule:
+    """An account field that ``types`` require and every other type must leave empty.
+
+    ``Account.clean``, ``AccountForm.clean`` and the table's CHECK constraints
+    are all built from ``ACCOUNT_FIELD_RULES``, so bulk writes that skip
+    ``full_clean`` are held to the same rules by the database.
+    """
 
+    field: str
+    label: str
+    types: tuple
+    allowed_for: str
+    empty: object = None
+    non_negative: bool = False
+
+    def is_set(self, value) -> bool:
+        return value is not None and value != self.empty
+
+    def error(self, account_type, value):
+        """The message for ``value`` on an account of ``account_type``, or ``None`` if it is valid."""
+        if account_type not in self.types:
+            return f"{self.label} is only allowed for {self.allowed_for}." if self.is_set(value) else None
+        if not self.is_set(value):
+            return f"{self.label} is required for this account type."
+        if self.non_negative and value < 0:
+            return f"{self.label} must be zero or greater."
+        return None
+
+    def constraint(self):
+        if self.empty is None:
+            is_set = Q(**{f"{self.field}__isnull": False})
+        else:
+            is_set = ~Q(**{self.field: self.empty})
+        required = Q(account_type__in=self.types) & is_set
+        if self.non_negative:
+            required &= Q(**{f"{self.field}__gte": 0})
+        return models.CheckConstraint(
+            condition=required | (~Q(account_type__in=self.types) & ~is_set),
+            name=f"finance_account_{self.field}_by_type",
+            violation_error_message=f"{self.label} does not match the account type.",
+        )
+
+
+CREDIT_ACCOUNT_TYPES = (AccountType.CREDIT_CARD, AccountType.LOAN)
+ACCOUNT_FIELD_RULES = (
+    AccountFieldRule(
+        "routing_number",
+        "Routing number",
+        (AccountType.CHECKING, AccountType.SAVINGS),
+        "checking or savings accounts",
+        empty="",
+    ),
+    AccountFieldRule(
+        "interest_rate",
+        "Interest rate",
+        (AccountType.SAVINGS, *CREDIT_ACCOUNT_TYPES),
+        "savings, credit card, or loan accounts",
+        non_negative=True,
+    ),
+    AccountFieldRule("due_date", "Due date", CREDIT_ACCOUNT_TYPES, "credit card or loan accounts"),
+)
+
+
+class Account(AuditedMixin, models.Model):
+    AccountType = AccountType
+    CREDIT_TYPES = CREDIT_ACCOUNT_TYPES
+    FIELD_RULES = ACCOUNT_FIELD_RULES
+
+    household = household_field("accounts")
     name = models.CharField(max_length=150)
-    account_number = models.CharField(max_length=50, unique=True)
+    account_number = models.CharField(max_length=50)
     account_type = models.CharField(max_length=20, choices=AccountType.choices)
     routing_number = models.CharField(max_length=20, blank=True)
     due_date = models.DateField(blank=True, null=True)
@@ -50,57 +284,86 @@ class Account(models.Model):
         help_text="Annual interest rate as a percentage (e.g., 4.25)",
     )
     balance = models.DecimalField(max_digits=12, decimal_places=2)
+    deleted_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    objects = SoftDeleteManager.from_queryset(AccountQuerySet)()
+    all_objects = TenantManager.from_queryset(AccountQuerySet)()
 
     class Meta:
         ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["household", "account_number"],
+                condition=Q(deleted_at__isnull=True),
+                name="finance_account_number_live",
+                violation_error_message="An account with this account number already exists.",
+            ),
+            *(rule.constraint() for rule in ACCOUNT_FIELD_RULES),
+        ]
+        indexes = [
+            models.Index(
+                fields=["household", "name"],
+                condition=Q(deleted_at__isnull=True),
+                name="finance_account_live_household",
+            ),
+            models.Index(
+                fields=["household", "due_date"],
+                condition=Q(due_date__isnull=False, deleted_at__isnull=True),
+                name="finance_account_live_due_date",
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                condition=Q(deleted_at__isnull=False),
+                name="finance_account_deleted_at",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} ({self.get_account_type_display()})"
 
     def clean(self) -> None:
         super().clean()
-
-        routing_required_types = {
-            self.AccountType.CHECKING,
-            self.AccountType.SAVINGS,
-        }
-        interest_required_types = {
-            self.AccountType.SAVINGS,
-            self.AccountType.CREDIT_CARD,
-            self.AccountType.LOAN,
-        }
-        due_date_required_types = {
-            self.AccountType.CREDIT_CARD,
-            self.AccountType.LOAN,
-        }
-
         errors = {}
-
-        if self.account_type in routing_required_types:
-            if not self.routing_number:
-                errors["routing_number"] = "Routing number is required for this account type."
-        elif self.routing_number:
-            errors["routing_number"] = "Routing number is only allowed for checking or savings accounts."
-
-        if self.account_type in interest_required_types:
-            if self.interest_rate is None:
-                errors["interest_rate"] = "Interest rate is required for this account type."
-            elif self.interest_rate < 0:
-                errors["interest_rate"] = "Interest rate must be zero or greater."
-        elif self.interest_rate is not None:
-            errors["interest_rate"] = "Interest rate is only allowed for savings, credit card, or loan accounts."
-
-        if self.account_type in due_date_required_types:
-            if not self.due_date:
-                errors["due_date"] = "Due date is required for this account type."
-        elif self.due_date:
-            errors["due_date"] = "Due date is only allowed for credit card or loan accounts."
+        for rule in self.FIELD_RULES:
+            message = rule.error(self.account_type, getattr(self, rule.field))
+            if message:
+                errors[rule.field] = message
 
         if errors:
             raise ValidationError(errors)
 
 
-class Transaction(models.Model):
+class TransactionManager(SoftDeleteManager):
+    """Live transactions of live accounts.
+
+    A deleted account's transactions are stamped later by a background task
+    (see ``finance.deletion``), so until then the account join hides them.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(account__deleted_at__isnull=True)
+
+
+class TransactionQuerySet(models.QuerySet):
+    def set_cleared(self, is_cleared: bool) -> int:
+        """Flip ``is_cleared`` for every matching row with a single UPDATE.
+
+        Rows already in the requested state are left untouched. Returns the
+        number of rows changed.
+        """
+        changing = self.exclude(is_cleared=is_cleared)
+        with transaction.atomic(using=self.db):
+            ChangeLog.objects.log_update(changing, is_cleared=is_cleared)
+            updated = changing.update(is_cleared=is_cleared, updated_at=timezone.now())
+        if updated:
+            finance_cache.invalidate(finance_cache.TRANSACTIONS)
+        return updated
+
+
+AMOUNT_ERROR = "Amount must be greater than zero."
+
+
+class Transaction(AuditedMixin, models.Model):
     class TransactionType(models.TextChoices):
         EXPENSE = "expense", "Expense"
         INCOME = "income", "Income"
@@ -109,6 +372,19 @@ class Transaction(models.Model):
         TRANSFER = "transfer", "Transfer"
         ADJUSTMENT = "adjustment", "Adjustment"
 
+    class TransferDirection(models.TextChoices):
+        OUT = "out", "Outgoing"
+        IN = "in", "Incoming"
+
+    DEBIT_TYPES = (TransactionType.EXPENSE, TransactionType.PAYMENT)
+    # Types a credit card or loan account accepts. This rule spans two tables,
+    # so it has no CHECK constraint; the forms enforce it.
+    CREDIT_ACCOUNT_TYPES = (TransactionType.PAYMENT, TransactionType.CHARGE)
+    AMOUNT_ERROR = AMOUNT_ERROR
+    is_archived = False
+
+    # Copied from the account so the tenant can lead this table's indexes.
+    household = household_field("transactions", editable=False)
     account = models.ForeignKey(
         Account,
         on_delete=models.CASCADE,
@@ -125,31 +401,598 @@ class Transaction(models.Model):
     reference = models.CharField(max_length=100, blank=True)
     posted_at = models.DateTimeField(default=timezone.now)
     is_cleared = models.BooleanField(default=False)
+    transfer_id = models.UUIDField(
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text="Shared by both legs of a transfer between accounts.",
+    )
+    transfer_direction = models.CharField(
+        max_length=3,
+        choices=TransferDirection.choices,
+        blank=True,
+        editable=False,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    deleted_at = models.DateTimeField(blank=True, null=True, editable=False)
+
+    objects = TransactionManager.from_queryset(TransactionQuerySet)()
+    all_objects = TenantManager.from_queryset(TransactionQuerySet)()
 
     class Meta:
         ordering = ["-posted_at", "-id"]
+        indexes = [
+            models.Index(
+                fields=["account", "posted_at"],
+                condition=Q(deleted_at__isnull=True),
+                name="finance_txn_live_account",
+            ),
+            models.Index(
+                fields=["household", "posted_at", "transaction_type"],
+                condition=Q(deleted_at__isnull=True),
+                name="finance_txn_live_posted_type",
+            ),
+            models.Index(
+                fields=["deleted_at"],
+                condition=Q(deleted_at__isnull=False),
+                name="finance_txn_deleted_at",
+            ),
+            models.Index(fields=["household", "updated_at", "id"], name="finance_txn_updated"),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=Q(amount__gt=0),
+                name="finance_txn_amount_positive",
+                violation_error_message=AMOUNT_ERROR,
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.get_transaction_type_display()} {self.amount} for {self.account.name}"
 
     @property
     def signed_amount(self):
-        debit_types = {self.TransactionType.EXPENSE, self.TransactionType.PAYMENT}
-        credit_types = {self.TransactionType.INCOME, self.TransactionType.CHARGE}
-        if self.transaction_type in debit_types:
+        if self.transaction_type in self.DEBIT_TYPES:
+            return -self.amount
+        if (
+            self.transaction_type == self.TransactionType.TRANSFER
+            and self.transfer_direction == self.TransferDirection.OUT
+        ):
             return -self.amount
-        if self.transaction_type in credit_types:
-            return self.amount
-        # transfers & adjustments treated as positive value; caller decides how to display
+        # income & charges are credits; incoming or unpaired transfers & adjustments
+        # treated as positive value, caller decides how to display
         return self.amount
 
+    @classmethod
+    def signed_amount_expression(cls, prefix: str = ""):
+        """Database expression equivalent of ``signed_amount``.
+
+        ``prefix`` lets related querysets reuse it, e.g. ``"transactions__"``.
+        """
+        outgoing_transfer = Q(
+            **{
+                f"{prefix}transaction_type": cls.TransactionType.TRANSFER,
+                f"{prefix}transfer_direction": cls.TransferDirection.OUT,
+            }
+        )
+        return Case(
+            When(
+                Q(**{f"{prefix}transaction_type__in": cls.DEBIT_TYPES}) | outgoing_transfer,
+                then=-F(f"{prefix}amount"),
+            ),
+            default=F(f"{prefix}amount"),
+            output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        )
+
+    def save(self, *args, **kwargs):
+        if Transaction.account.is_cached(self):
+            self.household_id = self.account.household_id
+        elif self.household_id is None:
+            self.household_id = (
+                Account._base_manager.filter(pk=self.account_id).values_list("household_id", flat=True).first()
+            )
+        super().save(*args, **kwargs)
+
     def clean(self) -> None:
         super().clean()
         errors = {}
         if self.amount is None or self.amount <= 0:
-            errors["amount"] = "Amount must be greater than zero."
+            errors["amount"] = self.AMOUNT_ERROR
 
         if errors:
             raise ValidationError(errors)
+
+
+class ArchivedTransaction(models.Model):
+    """A cleared transaction from a closed year, moved out of the hot table by ``finance.archive``.
+
+    Keeps the original id and is read-only; ``MonthlySummary`` carries its totals.
+    """
+
+    TransactionType = Transaction.TransactionType
+    TransferDirection = Transaction.TransferDirection
+    DEBIT_TYPES = Transaction.DEBIT_TYPES
+    is_archived = True
+
+    id = models.BigIntegerField(primary_key=True)
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="archived_transactions")
+    transaction_type = models.CharField(max_length=20, choices=TransactionType.choices)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="archived_transactions")
+    memo = models.CharField(max_length=255, blank=True)
+    reference = models.CharField(max_length=100, blank=True)
+    posted_at = models.DateTimeField()
+    is_cleared = models.BooleanField(default=True)
+    transfer_id = models.UUIDField(blank=True, null=True)
+    transfer_direction = models.CharField(max_length=3, choices=TransferDirection.choices, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    objects = AccountTenantManager()
+
+    class Meta:
+        ordering = ["-posted_at", "-id"]
+        indexes = [
+            models.Index(fields=["account", "posted_at"], name="finance_archive_account"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Archived {self.get_transaction_type_display()} {self.amount}"
+
+    signed_amount = Transaction.signed_amount
+
+
+class MonthlySummaryQuerySet(models.QuerySet):
+    def live(self):
+        """Summaries of accounts that are not soft-deleted."""
+        return self.filter(account__deleted_at__isnull=True)
+
+
+class MonthlySummary(models.Model):
+    """Totals of archived transactions per account, category, local month, type and transfer flag."""
+
+    account = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="monthly_summaries")
+    category = models.ForeignKey(Category, on_delete=models.PROTECT, related_name="monthly_summaries")
+    month = models.DateField(help_text="First day of the month, in local time.")
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TransactionType.choices)
+    is_transfer = models.BooleanField(default=False)
+    transaction_count = models.PositiveIntegerField(default=0)
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+    signed_total = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
+
+    objects = AccountTenantManager.from_queryset(MonthlySummaryQuerySet)()
+
+    class Meta:
+        ordering = ["month", "account_id", "category_id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["account", "category", "month", "transaction_type", "is_transfer"],
+                name="finance_summary_unique_key",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.account_id}/{self.category_id} {self.month:%Y-%m} {self.transaction_type}"
+
+
+def _refers_to_groups(pattern: str) -> bool:
+    """Whether ``pattern`` has a backreference, a conditional or a named group.
+
+    Rules are compiled side by side into one expression (see
+    ``finance.categorization``), so group numbers and names are not the rule's own.
+    """
+    index = 0
+    in_class = False
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            if not in_class and pattern[index + 1 : index + 2] in tuple("123456789"):
+                return True
+            index += 2
+            continue
+        if in_class:
+            in_class = char != "]"
+        elif char == "[":
+            # A "]" right after "[" or "[^" is a literal, not the end of the class.
+            index += 2 if pattern.startswith("^", index + 1) else 1
+            if pattern.startswith("]", index):
+                index += 1
+            in_class = True
+            continue
+        elif pattern.startswith(("(?P", "(?("), index):
+            return True
+        index += 1
+    return False
+
+
+class CategorizationRule(models.Model):
+    class MatchField(models.TextChoices):
+        ANY = "any", "Memo or reference"
+        MEMO = "memo", "Memo"
+        REFERENCE = "reference", "Reference"
+
+    class MatchType(models.TextChoices):
+        CONTAINS = "contains", "Contains"
+        REGEX = "regex", "Regular expression"
+
+    name = models.CharField(max_length=100)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        related_name="rules",
+    )
+    match_field = models.CharField(max_length=20, choices=MatchField.choices, default=MatchField.ANY)
+    match_type = models.CharField(max_length=20, choices=MatchType.choices, default=MatchType.CONTAINS)
+    pattern = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Case-insensitive text to look for; leave blank to match on amount/account only.",
+    )
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        related_name="categorization_rules",
+        blank=True,
+        null=True,
+        help_text="Only apply to transactions on this account.",
+    )
+    min_amount = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    max_amount = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    priority = models.PositiveIntegerField(default=100, help_text="Lower numbers are tried first.")
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CategoryTenantManager()
+
+    class Meta:
+        ordering = ["priority", "id"]
+
+    def __str__(self) -> str:
+        return f"{self.name} → {self.category}"
+
+    def clean(self) -> None:
+        super().clean()
+        errors = {}
+
+        if self.match_type == self.MatchType.REGEX and self.pattern:
+            try:
+                re.compile(f"(?:{self.pattern})")
+            except re.error as exc:
+                errors["pattern"] = f"Invalid regular expression: {exc}."
+            else:
+                if _refers_to_groups(self.pattern):
+                    errors["pattern"] = "Backreferences and named groups are not supported in rule patterns."
+
+        if (
+            self.min_amount is not None
+            and self.max_amount is not None
+            and self.min_amount > self.max_amount
+        ):
+            errors["max_amount"] = "Maximum amount must be greater than or equal to the minimum."
+
+        if not self.pattern and self.account_id is None and self.min_amount is None and self.max_amount is None:
+            errors["pattern"] = "Add a pattern, an account or an amount range for this rule."
+
+        if errors:
+            raise ValidationError(errors)
+
+
+class RecurringPattern(models.Model):
+    """A repeating transaction detected from history by ``refresh_forecast``."""
+
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        related_name="recurring_patterns",
+    )
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TransactionType.choices)
+    memo = models.CharField(max_length=255)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        related_name="recurring_patterns",
+        blank=True,
+        null=True,
+    )
+    interval_days = models.PositiveIntegerField()
+    is_monthly = models.BooleanField(
+        default=False,
+        help_text="Projected on the same day of each month rather than every interval_days.",
+    )
+    occurrences = models.PositiveIntegerField()
+    last_posted_on = models.DateField()
+    detected_at = models.DateTimeField(auto_now=True)
+
+    objects = AccountTenantManager()
+
+    class Meta:
+        ordering = ["account", "memo"]
+
+    def __str__(self) -> str:
+        return f"{self.memo} every {self.interval_days} days on {self.account.name}"
+
+
+class ForecastEntry(models.Model):
+    """One projected cash-flow event, precomputed by ``refresh_forecast``."""
+
+    class Source(models.TextChoices):
+        RECURRING = "recurring", "Recurring"
+        DUE_DATE = "due_date", "Payment due"
+        INTEREST = "interest", "Interest"
+
+    account = models.ForeignKey(
+        Account,
+        on_delete=models.CASCADE,
+        related_name="forecast_entries",
+    )
+    due_on = models.DateField()
+    transaction_type = models.CharField(max_length=20, choices=Transaction.TransactionType.choices)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    memo = models.CharField(max_length=255, blank=True)
+    source = models.CharField(max_length=20, choices=Source.choices)
+    pattern = models.ForeignKey(
+        RecurringPattern,
+        on_delete=models.CASCADE,
+        related_name="forecast_entries",
+        blank=True,
+        null=True,
+    )
+    generated_at = models.DateTimeField(default=timezone.now)
+
+    objects = AccountTenantManager()
+
+    class Meta:
+        ordering = ["due_on", "id"]
+        indexes = [
+            models.Index(fields=["account", "due_on"], name="finance_forecast_account_due"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_source_display()} {self.amount} on {self.due_on}"
+
+    @property
+    def signed_amount(self):
+        if self.transaction_type in Transaction.DEBIT_TYPES:
+            return -self.amount
+        return self.amount
+
+
+class ChangeLogManager(models.Manager):
+    IGNORED_FIELDS = ("created_at", "updated_at")
+    LOG_BATCH_SIZE = 500
+
+    @staticmethod
+    def label_for(model) -> str:
+        return model._meta.label_lower
+
+    def _snapshot(self, instance):
+        return {
+            field.attname: getattr(instance, field.attname)
+            for field in instance._meta.concrete_fields
+            if field.attname not in self.IGNORED_FIELDS and not field.primary_key
+        }
+
+    def log_save(self, instance, created):
+        """Record a create, or the fields that changed since ``instance`` was loaded."""
+        current = self._snapshot(instance)
+        loaded = getattr(instance, "_loaded_values", None)
+        if created:
+            action = ChangeLog.Action.CREATE
+            changes = {name: value for name, value in current.items() if value not in (None, "")}
+        else:
+            action = ChangeLog.Action.UPDATE
+            loaded = loaded or {}
+            changes = {
+                name: [loaded.get(name), value]
+                for name, value in current.items()
+                if name not in loaded or loaded[name] != value
+            }
+        instance._loaded_values = {**(loaded or {}), **current}
+        if changes:
+            return self.create(
+                model=self.label_for(type(instance)),
+                object_id=instance.pk,
+                action=action,
+                changes=changes,
+            )
+        return None
+
+    def log_delete(self, instance):
+        return self.create(
+            model=self.label_for(type(instance)),
+            object_id=instance.pk,
+            action=ChangeLog.Action.DELETE,
+            changes=self._snapshot(instance),
+        )
+
+    def log_update(self, queryset, **values):
+        """Log a set-based ``queryset.update(**values)`` before it runs.
+
+        Only the columns being written are read, and only rows whose value
+        actually changes get an entry. Rows are streamed and entries written
+        ``LOG_BATCH_SIZE`` at a time, so a large merge never holds the whole
+        queryset in memory. Call inside the same transaction as the update.
+        Returns the number of entries written.
+        """
+        model = queryset.model
+        new_values = {}
+        for name, value in values.items():
+            field = model._meta.get_field(name)
+            if field.attname in self.IGNORED_FIELDS:
+                continue
+            new_values[field.attname] = value.pk if isinstance(value, models.Model) else value
+        names = list(new_values)
+        label = self.label_for(model)
+        now = timezone.now()
+        rows = queryset.order_by().values_list("pk", *names).iterator(chunk_size=self.LOG_BATCH_SIZE)
+        entries = []
+        logged = 0
+        for pk, *old_values in rows:
+            changes = {
+                name: [old, new_values[name]]
+                for name, old in zip(names, old_values)
+                if old != new_values[name]
+            }
+            if changes:
+                entries.append(
+                    ChangeLog(
+                        model=label,
+                        object_id=pk,
+                        action=ChangeLog.Action.UPDATE,
+                        changes=changes,
+                        changed_at=now,
+                    )
+                )
+            if len(entries) == self.LOG_BATCH_SIZE:
+                self.bulk_create(entries)
+                logged += len(entries)
+                entries = []
+        if entries:
+            self.bulk_create(entries)
+            logged += len(entries)
+        return logged
+
+    def for_object(self, instance):
+        return self.filter(model=self.label_for(type(instance)), object_id=instance.pk).order_by(
+            "-changed_at", "-id"
+        )
+
+
+class ChangeLog(models.Model):
+    """Append-only, field-level history of account and transaction changes.
+
+    ``changes`` holds every non-empty value for creates, ``[old, new]`` pairs
+    for updates and the final values for deletes.
+    """
+
+    class Action(models.TextChoices):
+        CREATE = "create", "Created"
+        UPDATE = "update", "Updated"
+        DELETE = "delete", "Deleted"
+
+    model = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=10, choices=Action.choices)
+    changes = models.JSONField(encoder=DjangoJSONEncoder)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    objects = ChangeLogManager()
+
+    class Meta:
+        ordering = ["-changed_at", "-id"]
+        indexes = [
+            models.Index(fields=["model", "object_id", "changed_at"], name="finance_changelog_object"),
+            models.Index(fields=["changed_at"], name="finance_changelog_time"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.get_action_display()} {self.model} #{self.object_id}"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Change log entries are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Change log entries are append-only.")
+
+
+class TombstoneManager(TenantManager):
+    def record(self, model, ids, household_id, when=None):
+        """Record that rows ``ids`` of ``model``, owned by ``household_id``, were removed for good."""
+        when = when or timezone.now()
+        label = model._meta.label_lower
+        return self.bulk_create(
+            [Tombstone(household_id=household_id, model=label, object_id=pk, deleted_at=when) for pk in ids],
+            batch_size=500,
+        )
+
+
+class Tombstone(models.Model):
+    """A hard-deleted row, kept so sync clients holding a copy can drop it; see ``finance.sync``."""
+
+    household = household_field("tombstones", null=True, blank=True)
+    model = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    objects = TombstoneManager()
+
+    class Meta:
+        ordering = ["deleted_at", "id"]
+        indexes = [
+            models.Index(fields=["household", "deleted_at", "id"], name="finance_tombstone_time"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.model} #{self.object_id}"
+
+
+class BackgroundTask(models.Model):
+    """A queued unit of work for ``manage.py run_worker``; see ``finance.tasks``."""
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    FINISHED_STATUSES = (Status.SUCCEEDED, Status.FAILED)
+
+    household = household_field(
+        "background_tasks",
+        null=True,
+        blank=True,
+        help_text="Household the task runs for; empty for maintenance jobs over every household.",
+    )
+    name = models.CharField(max_length=100)
+    kwargs = models.JSONField(default=dict, blank=True, encoder=DjangoJSONEncoder)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    worker = models.CharField(max_length=100, blank=True)
+    progress_done = models.PositiveIntegerField(default=0)
+    progress_total = models.PositiveIntegerField(blank=True, null=True)
+    progress_message = models.CharField(max_length=255, blank=True)
+    result = models.JSONField(blank=True, null=True, encoder=DjangoJSONEncoder)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    objects = TenantManager()
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [
+            models.Index(
+                fields=["run_after", "id"],
+                condition=Q(status="queued"),
+                name="finance_task_queued",
+            ),
+            models.Index(
+                fields=["name", "locked_until"],
+                condition=Q(status="running"),
+                name="finance_task_running",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.name} #{self.pk} ({self.get_status_display()})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in self.FINISHED_STATUSES
+
+    @property
+    def percent(self):
+        if not self.progress_total:
+            return None
+        return min(100, round(100 * self.progress_done / self.progress_total))
@@ -0,0 +1,209 @@
+"""Net worth over time.
+
+Net worth is the sum of checking and savings balances minus the sum of credit
+card and loan balances. The history is reconstructed from per-day balance
+deltas, grouped in SQL by day and account class and anchored on today's
+account balances, so no transaction is replayed in Python. Archived years
+contribute their monthly summaries on each month's last day, so month-end
+values stay exact while days inside an archived month do not move.
+
+The per-day deltas are cached without a namespace version. Saving or
+deleting a transaction instead records a "dirty" watermark: the earliest
+local date it touched. The next read re-queries only the days from that
+watermark onwards and merges them into the cached deltas. Changes that
+reclassify history, such as an account type change, drop the cache.
+
+Each household has its own deltas and watermark. A change made unscoped,
+by a command or the worker, also bumps an epoch that is part of every
+household's keys, so all of them rebuild.
+"""
+
+from calendar import monthrange
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from time import time_ns
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from household.db_routing import replica_reads
+
+from . import tenancy
+from .models import Account, MonthlySummary, Transaction
+
+ASSET_TYPES = (Account.AccountType.CHECKING, Account.AccountType.SAVINGS)
+LIABILITY_TYPES = (Account.AccountType.CREDIT_CARD, Account.AccountType.LOAN)
+INTERVAL_DAY = "day"
+INTERVAL_MONTH = "month"
+
+DELTAS_KEY = "finance:networth:deltas"
+DIRTY_KEY = "finance:networth:dirty"
+EPOCH_KEY = "finance:networth:epoch"
+FULL_REBUILD = "full"
+ZERO = Decimal("0.00")
+
+
+@dataclass(frozen=True)
+class NetWorthPoint:
+    day: date
+    assets: Decimal
+    liabilities: Decimal
+
+    @property
+    def net(self) -> Decimal:
+        return self.assets - self.liabilities
+
+
+def _keys():
+    """``(deltas_key, dirty_key)`` for the active household."""
+    scope = tenancy.cache_scope()
+    if scope is None:
+        return DELTAS_KEY, DIRTY_KEY
+    # A lost epoch is reseeded from the clock, so keys from before it never match again.
+    cache.add(EPOCH_KEY, time_ns(), None)
+    epoch = cache.get(EPOCH_KEY)
+    return f"{DELTAS_KEY}:{scope}:{epoch}", f"{DIRTY_KEY}:{scope}:{epoch}"
+
+
+def mark_dirty(day: date | None = None) -> None:
+    """Record that deltas from ``day`` onwards are stale; ``None`` drops the whole cache.
+
+    Writers call this before they commit, so a concurrent read could still
+    clear the mark and cache the old rows. The mark is set again on commit,
+    as ``finance_cache.invalidate`` does for namespace versions.
+    """
+    _deltas_key, dirty_key = _keys()
+    unscoped = tenancy.cache_scope() is None
+    _mark(dirty_key, day, unscoped)
+    transaction.on_commit(lambda: _mark(dirty_key, day, unscoped))
+
+
+def _mark(dirty_key, day, bump_epoch) -> None:
+    if bump_epoch:
+        try:
+            cache.incr(EPOCH_KEY)
+        except ValueError:
+            cache.set(EPOCH_KEY, time_ns(), None)
+    current = cache.get(dirty_key)
+    if day is None or current == FULL_REBUILD:
+        cache.set(dirty_key, FULL_REBUILD, None)
+    elif current is None or day < current:
+        cache.set(dirty_key, day, None)
+
+
+def mark_dirty_at(*moments) -> None:
+    """``mark_dirty`` for the earliest of the given datetimes (``None`` values ignored)."""
+    days = [timezone.localtime(moment).date() for moment in moments if moment is not None]
+    if days:
+        mark_dirty(min(days))
+
+
+def _query_deltas(since: date | None = None):
+    """Return ``{day: (asset_delta, liability_delta)}`` from one grouped query."""
+    rows = Transaction.objects.order_by()
+    if since is not None:
+        rows = rows.filter(
+            posted_at__gte=timezone.make_aware(datetime.combine(since, time.min), timezone.get_current_timezone())
+        )
+    signed = Transaction.signed_amount_expression()
+    rows = (
+        rows.annotate(day=TruncDate("posted_at"))
+        .values("day")
+        .annotate(
+            assets=Sum(Case(When(account__account_type__in=ASSET_TYPES, then=signed), default=Value(ZERO))),
+            liabilities=Sum(Case(When(account__account_type__in=LIABILITY_TYPES, then=signed), default=Value(ZERO))),
+        )
+    )
+    deltas = {row["day"]: (row["assets"] or ZERO, row["liabilities"] or ZERO) for row in rows}
+
+    # Archived months only keep monthly totals; book each on the month's last day.
+    summaries = MonthlySummary.objects.live().order_by()
+    if since is not None:
+        summaries = summaries.filter(month__gte=since.replace(day=1))
+    summaries = summaries.values("month").annotate(
+        assets=Sum(Case(When(account__account_type__in=ASSET_TYPES, then="signed_total"), default=Value(ZERO))),
+        liabilities=Sum(
+            Case(When(account__account_type__in=LIABILITY_TYPES, then="signed_total"), default=Value(ZERO))
+        ),
+    )
+    for row in summaries:
+        day = row["month"].replace(day=monthrange(row["month"].year, row["month"].month)[1])
+        assets, liabilities = deltas.get(day, (ZERO, ZERO))
+        deltas[day] = (assets + (row["assets"] or ZERO), liabilities + (row["liabilities"] or ZERO))
+    return deltas
+
+
+def daily_deltas():
+    """Cached per-day deltas, with only the dirty tail recomputed."""
+    deltas_key, dirty_key = _keys()
+    dirty = cache.get(dirty_key)
+    deltas = cache.get(deltas_key)
+    if deltas is not None and dirty is None:
+        return deltas
+    cache.delete(dirty_key)
+    # Cached until the next write, so never from a replica that may lag it.
+    with replica_reads(False):
+        if deltas is None or dirty == FULL_REBUILD:
+            deltas = _query_deltas()
+        else:
+            deltas = {day: values for day, values in deltas.items() if day < dirty}
+            deltas.update(_query_deltas(dirty))
+    cache.set(deltas_key, deltas, None)
+    return deltas
+
+
+def current_totals():
+    totals = Account.objects.aggregate(
+        assets=Sum("balance", filter=Q(account_type__in=ASSET_TYPES)),
+        liabilities=Sum("balance", filter=Q(account_type__in=LIABILITY_TYPES)),
+    )
+    return totals["assets"] or ZERO, totals["liabilities"] or ZERO
+
+
+def net_worth_series(start: date, end: date, interval: str = INTERVAL_DAY):
+    """Return ``NetWorthPoint`` values for each day (or month end) from ``start`` to ``end``.
+
+    Balances are anchored on the current account balances. The value at
+    the end of a day is the current balance minus every delta posted after it.
+    """
+    deltas = daily_deltas()
+    assets, liabilities = current_totals()
+    for day, (asset_delta, liability_delta) in deltas.items():
+        if day >= start:
+            assets -= asset_delta
+            liabilities -= liability_delta
+
+    days = [start + timedelta(days=offset) for offset in range((end - start).days + 1)]
+    steps = [deltas.get(day, (ZERO, ZERO)) for day in days]
+    asset_values = accumulate((step[0] for step in steps), initial=assets)
+    liability_values = accumulate((step[1] for step in steps), initial=liabilities)
+    next(asset_values)
+    next(liability_values)
+    points = [
+        NetWorthPoint(day, asset_value, liability_value)
+        for day, asset_value, liability_value in zip(days, asset_values, liability_values)
+    ]
+    if interval == INTERVAL_MONTH:
+        points = [
+            point for index, point in enumerate(points)
+            if index + 1 == len(points) or points[index + 1].day.month != point.day.month
+        ]
+    return points
+
+
+def chart_points(points, width: int, height: int) -> str:
+    """SVG ``polyline`` coordinates for the net values, scaled to ``width`` x ``height``."""
+    if not points:
+        return ""
+    values = [point.net for point in points]
+    low, high = min(values), max(values)
+    spread = (high - low) or Decimal("1")
+    step = width / max(len(points) - 1, 1)
+    return " ".join(
+        f"{index * step:.1f},{float((high - value) / spread) * height:.1f}" for index, value in enumerate(values)
+    )
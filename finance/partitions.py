@@ -0,0 +1,230 @@
+"""Monthly range partitioning of ``finance_transaction`` on PostgreSQL.
+
+Partitioning is opt-in. Migrations create a plain table, and
+``manage.py partition_transactions --convert`` rebuilds it once as a table
+partitioned by ``posted_at``, with one partition per calendar month in the
+current time zone and a default partition for rows outside them. The rebuild
+copies every row under an exclusive lock, so run it in a maintenance window.
+After that, the same command run from cron keeps ``months_ahead`` partitions
+ready, and ``--detach-before`` detaches old months. Detaching only changes
+metadata; the detached tables stay on disk to be archived or dropped.
+
+PostgreSQL refuses to create a month while the default partition holds rows
+for it. In that case the default partition is detached, the month is created,
+its rows are moved out of the default, and the default is attached again.
+Reattaching scans the default partition, so keep enough months ahead that it
+stays small.
+
+PostgreSQL requires the partition key in every unique index, so the
+converted primary key is ``(id, posted_at)``. Django still treats ``id`` as
+the primary key. That is safe because ids come from one sequence, and
+nothing references a transaction. CHECK constraints are copied, and indexes
+and foreign keys are recreated on the parent table under their original
+names, so later migrations still find them.
+
+Queries prune to a single partition when they filter ``posted_at`` with
+plain bounds, as the month views do. Wrapping the column in a function,
+such as ``posted_at__date``, defeats pruning.
+"""
+
+import re
+from datetime import date, datetime, time
+
+from django.db import connection
+from django.utils import timezone
+
+from .forecast import add_months
+from .models import Transaction
+
+DEFAULT_MONTHS_AHEAD = 3
+PARTITION_NAME = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+class PartitioningError(Exception):
+    pass
+
+
+def _table():
+    return Transaction._meta.db_table
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def month_bounds(month: date):
+    """Return the aware ``[start, end)`` datetimes of ``month`` in the current time zone."""
+    tz = timezone.get_current_timezone()
+    start = timezone.make_aware(datetime.combine(month.replace(day=1), time.min), tz)
+    end = timezone.make_aware(datetime.combine(add_months(month.replace(day=1), 1), time.min), tz)
+    return start, end
+
+
+def partition_name(month: date) -> str:
+    return f"{_table()}_p{month.year:04d}_{month.month:02d}"
+
+
+def create_partition_sql(month: date) -> str:
+    start, end = month_bounds(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {_quote(partition_name(month))} PARTITION OF {_quote(_table())} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def months_between(first: date, last: date):
+    month = first.replace(day=1)
+    while month <= last:
+        yield month
+        month = add_months(month, 1)
+
+
+def require_postgresql():
+    if connection.vendor != "postgresql":
+        raise PartitioningError("Transaction partitioning needs PostgreSQL.")
+
+
+def is_partitioned(cursor) -> bool:
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [_table()])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def attached_partitions(cursor):
+    """Return ``{first_of_month: table_name}`` for the attached monthly partitions."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = to_regclass(%s)",
+        [_table()],
+    )
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        match = PARTITION_NAME.search(name)
+        if match:
+            partitions[date(int(match[1]), int(match[2]), 1)] = name
+    return partitions
+
+
+def default_partition(cursor):
+    """Return the name of the attached default partition, or ``None``."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_partitioned_table "
+        "JOIN pg_class child ON child.oid = pg_partitioned_table.partdefid "
+        "WHERE pg_partitioned_table.partrelid = to_regclass(%s)",
+        [_table()],
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def ensure_partitions_sql(cursor, today=None, months_ahead=DEFAULT_MONTHS_AHEAD):
+    """Statements creating the partitions missing from this month to ``months_ahead`` months out.
+
+    Rows the default partition already holds for a new month are moved into it.
+    """
+    today = today or timezone.localdate()
+    existing = attached_partitions(cursor)
+    missing = [
+        month
+        for month in months_between(today, add_months(today.replace(day=1), months_ahead))
+        if month not in existing
+    ]
+    default = default_partition(cursor)
+    crowded = []
+    if default:
+        for month in missing:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {_quote(default)} WHERE posted_at >= %s AND posted_at < %s)",
+                month_bounds(month),
+            )
+            if cursor.fetchone()[0]:
+                crowded.append(month)
+
+    statements = [create_partition_sql(month) for month in missing if month not in crowded]
+    if crowded:
+        table = _quote(_table())
+        statements.append(f"ALTER TABLE {table} DETACH PARTITION {_quote(default)}")
+        for month in crowded:
+            start, end = (moment.isoformat() for moment in month_bounds(month))
+            in_month = f"posted_at >= '{start}' AND posted_at < '{end}'"
+            statements += [
+                create_partition_sql(month),
+                f"INSERT INTO {_quote(partition_name(month))} SELECT * FROM {_quote(default)} WHERE {in_month}",
+                f"DELETE FROM {_quote(default)} WHERE {in_month}",
+            ]
+        statements.append(f"ALTER TABLE {table} ATTACH PARTITION {_quote(default)} DEFAULT")
+    return statements
+
+
+def detach_partitions_sql(cursor, before: date):
+    """Statements detaching every monthly partition that ends on or before ``before``."""
+    return [
+        f"ALTER TABLE {_quote(_table())} DETACH PARTITION {_quote(name)}"
+        for month, name in sorted(attached_partitions(cursor).items())
+        if add_months(month, 1) <= before.replace(day=1)
+    ]
+
+
+def convert_sql(cursor, today=None, months_ahead=DEFAULT_MONTHS_AHEAD):
+    """Statements that rebuild the plain transaction table as a partitioned one."""
+    table = _table()
+    old = f"{table}_unpartitioned"
+    today = today or timezone.localdate()
+
+    cursor.execute(
+        "SELECT pg_get_indexdef(indexrelid), indisunique FROM pg_index "
+        "WHERE indrelid = to_regclass(%s) AND NOT indisprimary",
+        [table],
+    )
+    indexes = cursor.fetchall()
+    if any(unique for _definition, unique in indexes):
+        raise PartitioningError("Unique indexes must include posted_at before the table can be partitioned.")
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    cursor.execute(
+        "SELECT attidentity, pg_get_serial_sequence(%s, 'id') FROM pg_attribute "
+        "WHERE attrelid = to_regclass(%s) AND attname = 'id'",
+        [table, table],
+    )
+    identity, sequence = cursor.fetchone()
+    cursor.execute(f"SELECT MIN(posted_at) FROM {_quote(table)}")
+    earliest = cursor.fetchone()[0]
+    first_month = timezone.localtime(earliest).date() if earliest else today
+
+    statements = [
+        f"LOCK TABLE {_quote(table)} IN ACCESS EXCLUSIVE MODE",
+        f"ALTER TABLE {_quote(table)} RENAME TO {_quote(old)}",
+        f"CREATE TABLE {_quote(table)} (LIKE {_quote(old)} INCLUDING DEFAULTS INCLUDING IDENTITY "
+        f"INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS) PARTITION BY RANGE (posted_at)",
+        f"ALTER TABLE {_quote(table)} ADD PRIMARY KEY (id, posted_at)",
+        *(
+            create_partition_sql(month)
+            for month in months_between(first_month, add_months(today.replace(day=1), months_ahead))
+        ),
+        f"CREATE TABLE {_quote(table + '_default')} PARTITION OF {_quote(table)} DEFAULT",
+    ]
+    if identity:
+        # LIKE ... INCLUDING IDENTITY starts a fresh sequence; carry on from the copied ids.
+        statements += [
+            f"INSERT INTO {_quote(table)} OVERRIDING SYSTEM VALUE SELECT * FROM {_quote(old)}",
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 0) + 1, false) "
+            f"FROM {_quote(table)}",
+        ]
+    else:
+        # A serial column's sequence belongs to the old table; keep it alive past the DROP.
+        statements += [
+            f"INSERT INTO {_quote(table)} SELECT * FROM {_quote(old)}",
+            f"ALTER SEQUENCE {sequence} OWNED BY {_quote(table)}.id",
+        ]
+    statements.append(f"DROP TABLE {_quote(old)}")
+    statements.extend(definition for definition, _unique in indexes)
+    statements.extend(
+        f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} {definition}" for name, definition in foreign_keys
+    )
+    statements.append(f"ANALYZE {_quote(table)}")
+    return statements
@@ -0,0 +1,151 @@
+"""Income and expense rollups for the reports page.
+
+Each report is built from two grouped queries over the requested range, one
+by month and one by category, plus one over the monthly summaries of
+archived years. Transfer legs are excluded because they move money
+between the household's own accounts. Results are cached per range
+until the next transaction or category change.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from decimal import Decimal
+from itertools import chain
+
+from django.db.models import DateField, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from . import cache as finance_cache
+from .models import MonthlySummary, Transaction
+
+INCOME_TYPES = (Transaction.TransactionType.INCOME,)
+EXPENSE_TYPES = (Transaction.TransactionType.EXPENSE, Transaction.TransactionType.CHARGE)
+RANGE_YEARS = (1, 2, 3, 5, 10)
+DEFAULT_RANGE_YEARS = 1
+ZERO = Decimal("0.00")
+
+
+@dataclass
+class ReportRow:
+    label: str
+    income: Decimal = ZERO
+    expense: Decimal = ZERO
+    key: object = None
+
+    @property
+    def net(self) -> Decimal:
+        return self.income - self.expense
+
+
+@dataclass
+class Report:
+    start: date
+    end: date
+    months: list = field(default_factory=list)
+    categories: list = field(default_factory=list)
+
+    @property
+    def income(self) -> Decimal:
+        return sum((row.income for row in self.months), ZERO)
+
+    @property
+    def expense(self) -> Decimal:
+        return sum((row.expense for row in self.months), ZERO)
+
+    @property
+    def net(self) -> Decimal:
+        return self.income - self.expense
+
+    @property
+    def max_month_value(self) -> Decimal:
+        return max((max(row.income, row.expense) for row in self.months), default=ZERO)
+
+
+def shift_month(first_day: date, delta: int) -> date:
+    month_index = first_day.month - 1 + delta
+    return date(first_day.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def range_for_years(years: int, today: date | None = None):
+    """Return ``(first_month, last_month)`` covering ``years`` whole years up to this month."""
+    last_month = (today or timezone.localdate()).replace(day=1)
+    return shift_month(last_month, -(12 * years - 1)), last_month
+
+
+def parse_range_years(value) -> int:
+    try:
+        years = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_RANGE_YEARS
+    return years if years in RANGE_YEARS else DEFAULT_RANGE_YEARS
+
+
+def _add(row, transaction_type, total):
+    if transaction_type in INCOME_TYPES:
+        row.income += total
+    else:
+        row.expense += total
+
+
+def _build_report(start: date, end: date) -> Report:
+    tz = timezone.get_current_timezone()
+    start_dt = timezone.make_aware(datetime.combine(start, time.min), tz)
+    end_dt = timezone.make_aware(datetime.combine(shift_month(end, 1), time.min), tz)
+    ledger = Transaction.objects.filter(
+        posted_at__gte=start_dt,
+        posted_at__lt=end_dt,
+        transaction_type__in=INCOME_TYPES + EXPENSE_TYPES,
+        transfer_id__isnull=True,
+    ).order_by()
+
+    months = {}
+    month = start
+    while month <= end:
+        months[month] = ReportRow(label=month.strftime("%b %Y"), key=month)
+        month = shift_month(month, 1)
+    monthly = (
+        ledger.annotate(month=TruncMonth("posted_at", output_field=DateField()))
+        .values("month", "transaction_type")
+        .annotate(total=Sum("amount"))
+    )
+    archived = list(
+        MonthlySummary.objects.live()
+        .filter(
+            month__gte=start,
+            month__lte=end,
+            transaction_type__in=INCOME_TYPES + EXPENSE_TYPES,
+            is_transfer=False,
+        )
+        .values("month", "category_id", "category__name", "transaction_type")
+        .annotate(total=Sum("total"))
+        .order_by()
+    )
+    for row in chain(monthly, archived):
+        _add(months[row["month"]], row["transaction_type"], row["total"])
+
+    categories = {}
+    by_category = ledger.values("category_id", "category__name", "transaction_type").annotate(
+        total=Sum("amount")
+    )
+    for row in chain(by_category, archived):
+        report_row = categories.setdefault(
+            row["category_id"], ReportRow(label=row["category__name"], key=row["category_id"])
+        )
+        _add(report_row, row["transaction_type"], row["total"])
+
+    return Report(
+        start=start,
+        end=end,
+        months=list(months.values()),
+        categories=sorted(categories.values(), key=lambda row: (-(row.income + row.expense), row.label)),
+    )
+
+
+def income_expense_report(start: date, end: date) -> Report:
+    """Monthly and per-category income, expense and net for ``start``..``end`` (first-of-month dates)."""
+    return finance_cache.get_or_set(
+        f"report:{start.isoformat()}:{end.isoformat()}",
+        lambda: _build_report(start, end),
+        [finance_cache.TRANSACTIONS, finance_cache.CATEGORIES],
+    )
@@ -0,0 +1,59 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache as finance_cache
+from . import networth
+from .models import Account, CategorizationRule, Category, ChangeLog, Tombstone, Transaction
+
+
+@receiver([post_save, post_delete], sender=Account)
+def invalidate_account_cache(sender, **kwargs):
+    finance_cache.invalidate(finance_cache.ACCOUNTS)
+
+
+@receiver(post_save, sender=Account)
+def reclassify_net_worth(sender, instance, created, **kwargs):
+    previous_type = instance.loaded_value("account_type")
+    if previous_type is not None and previous_type != instance.account_type:
+        networth.mark_dirty(None)
+
+
+@receiver([post_save, post_delete], sender=Transaction)
+def invalidate_transaction_cache(sender, instance, **kwargs):
+    finance_cache.invalidate(finance_cache.TRANSACTIONS)
+    networth.mark_dirty_at(instance.posted_at, instance.loaded_value("posted_at"))
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_cache(sender, **kwargs):
+    finance_cache.invalidate(finance_cache.CATEGORIES, finance_cache.RULES)
+
+
+@receiver(post_delete, sender=Category)
+def record_category_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.record(sender, [instance.pk], instance.household_id)
+
+
+@receiver(post_delete, sender=Transaction)
+def record_transaction_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.record(sender, [instance.pk], instance.household_id)
+
+
+@receiver([post_save, post_delete], sender=CategorizationRule)
+def invalidate_rule_cache(sender, **kwargs):
+    finance_cache.invalidate(finance_cache.RULES)
+
+
+# Connected last: logging a save refreshes ``_loaded_values``, which the
+# receivers above read to see the previous state.
+@receiver(post_save, sender=Account)
+@receiver(post_save, sender=Transaction)
+def log_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        ChangeLog.objects.log_save(instance, created)
+
+
+@receiver(post_delete, sender=Account)
+@receiver(post_delete, sender=Transaction)
+def log_delete(sender, instance, **kwargs):
+    ChangeLog.objects.log_delete(instance)
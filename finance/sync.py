@@ -0,0 +1,159 @@
+"""Delta sync for long-lived clients.
+
+A client keeps an opaque cursor and asks for everything that changed since
+it. Each stream is read in ``(updated_at, id)`` order past its own
+watermark, which the ``*_updated`` indexes serve directly:
+
+* ``transactions``: every row through ``all_objects``. Soft-deleted rows are
+  reported as deletions, so a later restore shows up as an update again.
+* ``categories``: every row.
+* ``tombstones``: rows removed for good (a category delete, an account
+  cascade, ``purge_deleted``). Deletions are meant to be applied after the
+  updates in the same page.
+
+Pages stop ``settings.SYNC_SETTLE_SECONDS`` short of now. ``updated_at`` is
+stamped before commit, so a slow transaction could otherwise commit a row
+behind a watermark a client has already moved past; the setting must cover
+the longest write transaction. Pages are read from the primary, because a
+replica can lag by more than that. Tombstones are kept for
+``TOMBSTONE_RETENTION``. A cursor last drained before that window answers
+with ``reset`` and starts over from scratch. A fresh cursor skips the
+tombstones that already exist, because a client with no rows has nothing
+to delete.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Category, Tombstone, Transaction
+
+CURSOR_VERSION = 1
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+TOMBSTONE_RETENTION = timedelta(days=90)
+
+TRANSACTION_FIELDS = (
+    "id",
+    "account_id",
+    "category_id",
+    "transaction_type",
+    "amount",
+    "memo",
+    "reference",
+    "posted_at",
+    "is_cleared",
+    "transfer_id",
+    "transfer_direction",
+    "updated_at",
+)
+CATEGORY_FIELDS = ("id", "name", "slug", "is_active", "updated_at")
+STREAM_MODELS = {"transactions": Transaction, "categories": Category}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(state) -> str:
+    payload = {"v": CURSOR_VERSION, "at": state["at"].isoformat()}
+    for stream in (*STREAM_MODELS, "tombstones"):
+        moment, pk = state[stream]
+        payload[stream] = [moment.isoformat() if moment else None, pk]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the watermarks in ``cursor``, or ``None`` for an empty cursor."""
+    if not cursor:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if payload["v"] != CURSOR_VERSION:
+            raise InvalidCursor("This cursor was issued by an older sync version.")
+        state = {"at": datetime.fromisoformat(payload["at"])}
+        for stream in (*STREAM_MODELS, "tombstones"):
+            moment, pk = payload[stream]
+            state[stream] = (datetime.fromisoformat(moment) if moment else None, int(pk))
+    except InvalidCursor:
+        raise
+    except (binascii.Error, TypeError, KeyError, ValueError) as exc:
+        raise InvalidCursor("Malformed sync cursor.") from exc
+    return state
+
+
+def _after(field, watermark):
+    moment, pk = watermark
+    if moment is None:
+        return Q()
+    return Q(**{f"{field}__gt": moment}) | Q(**{field: moment, "id__gt": pk})
+
+
+def _page(queryset, field, watermark, until, limit):
+    rows = list(
+        queryset.filter(_after(field, watermark), **{f"{field}__lte": until}).order_by(field, "id")[: limit + 1]
+    )
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        watermark = (rows[-1][field], rows[-1]["id"])
+    return rows, watermark, more
+
+
+def sync_changes(cursor=None, *, limit=DEFAULT_LIMIT, now=None):
+    """Return one page of changes since ``cursor``.
+
+    Raises ``InvalidCursor`` for a cursor this module did not issue.
+    """
+    now = now or timezone.now()
+    until = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    state = decode_cursor(cursor)
+    reset = state is not None and state["at"] < now - TOMBSTONE_RETENTION
+    if state is None or reset:
+        state = {"at": until, "transactions": (None, 0), "categories": (None, 0), "tombstones": (until, 0)}
+
+    result = {"reset": reset}
+    has_more = False
+    for stream, model, fields in (
+        ("transactions", Transaction.all_objects, TRANSACTION_FIELDS + ("deleted_at",)),
+        ("categories", Category.objects, CATEGORY_FIELDS),
+    ):
+        rows, state[stream], more = _page(model.values(*fields), "updated_at", state[stream], until, limit)
+        has_more |= more
+        updated, deleted = [], []
+        for row in rows:
+            if row.pop("deleted_at", None):
+                deleted.append(row["id"])
+            else:
+                updated.append(row)
+        result[stream] = {"updated": updated, "deleted": deleted}
+
+    labels = {model._meta.label_lower: stream for stream, model in STREAM_MODELS.items()}
+    tombstones, state["tombstones"], more = _page(
+        Tombstone.objects.filter(model__in=labels).values("id", "model", "object_id", "deleted_at"),
+        "deleted_at",
+        state["tombstones"],
+        until,
+        limit,
+    )
+    has_more |= more
+    for tombstone in tombstones:
+        result[labels[tombstone["model"]]]["deleted"].append(tombstone["object_id"])
+
+    if not has_more:
+        state["at"] = until
+    result["has_more"] = has_more
+    result["cursor"] = encode_cursor(state)
+    return result
+
+
+def prune_tombstones(older_than=TOMBSTONE_RETENTION) -> int:
+    """Drop tombstones no live cursor can still need; returns the number removed."""
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=timezone.now() - older_than).delete()
+    return deleted
@@ -0,0 +1,237 @@
+"""Database-backed background tasks.
+
+Heavy jobs are registered here with ``@task`` and queued with
+``enqueue(name, **kwargs)``. ``manage.py run_worker`` claims queued rows and
+runs them outside the request cycle, so no broker is needed.
+
+* A claimed task holds a lease (``locked_until``). Progress reports extend
+  it. When a worker dies, its lease expires and the task is retried.
+* A failed run is retried with a linear backoff until ``max_attempts``.
+* ``concurrency`` caps how many tasks with the same name run at once. On
+  PostgreSQL, claiming uses ``SKIP LOCKED``, so several workers can poll the
+  same table. Each claim takes a per-name advisory lock before counting the
+  running tasks, so two workers cannot both take the last slot. SQLite
+  transactions start ``IMMEDIATE`` (see settings), which serializes claims.
+* A task queued during a request remembers its household and runs scoped to
+  it; see ``finance.tenancy``.
+"""
+
+import os
+import socket
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import tenancy
+from .archive import archive_transactions
+from .categorization import recategorize_history
+from .deletion import purge_deleted, stamp_deleted_account
+from .forecast import refresh_forecast
+from .models import BackgroundTask
+from .transfers import pair_unlinked_transfers
+
+DEFAULT_LEASE = timedelta(minutes=5)
+CLAIM_SCAN_LIMIT = 20
+REGISTRY = {}
+
+
+@dataclass(frozen=True)
+class TaskSpec:
+    name: str
+    func: object
+    label: str
+    concurrency: int = 1
+    max_attempts: int = 3
+    retry_delay: timedelta = timedelta(seconds=30)
+
+
+def task(name, *, label=None, concurrency=1, max_attempts=3, retry_delay=timedelta(seconds=30)):
+    """Register ``func(context, **kwargs)`` as a background task called ``name``."""
+
+    def register(func):
+        REGISTRY[name] = TaskSpec(
+            name=name,
+            func=func,
+            label=label or name.replace("_", " ").capitalize(),
+            concurrency=concurrency,
+            max_attempts=max_attempts,
+            retry_delay=retry_delay,
+        )
+        return func
+
+    return register
+
+
+def enqueue(name, **kwargs) -> BackgroundTask:
+    try:
+        spec = REGISTRY[name]
+    except KeyError:
+        raise ValueError(f"Unknown background task {name!r}.") from None
+    return BackgroundTask.objects.create(name=name, kwargs=kwargs, max_attempts=spec.max_attempts)
+
+
+class TaskContext:
+    """Handed to task functions for progress reporting."""
+
+    def __init__(self, task, lease=DEFAULT_LEASE):
+        self.task = task
+        self.lease = lease
+
+    def progress(self, done, total=None, message=""):
+        """Record progress and extend the lease; cheap enough to call once per batch."""
+        fields = {
+            "progress_done": done,
+            "progress_message": message[:255],
+            "locked_until": timezone.now() + self.lease,
+        }
+        if total is not None:
+            fields["progress_total"] = total
+        BackgroundTask.objects.filter(pk=self.task.pk).update(**fields)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _release_expired(now) -> None:
+    expired = BackgroundTask.objects.filter(status=BackgroundTask.Status.RUNNING, locked_until__lt=now)
+    for expired_task in expired.only("pk", "attempts", "max_attempts"):
+        retry = expired_task.attempts < expired_task.max_attempts
+        BackgroundTask.objects.filter(pk=expired_task.pk, status=BackgroundTask.Status.RUNNING).update(
+            status=BackgroundTask.Status.QUEUED if retry else BackgroundTask.Status.FAILED,
+            error="Worker lease expired.",
+            locked_until=None,
+            finished_at=None if retry else now,
+        )
+
+
+def _running_count(name) -> int:
+    """Count running ``name`` tasks, holding that name's claim lock until commit."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"finance.task:{name}"])
+    return BackgroundTask.objects.filter(name=name, status=BackgroundTask.Status.RUNNING).count()
+
+
+def claim_next(worker_id=None, lease=DEFAULT_LEASE):
+    """Mark the next runnable task as running and return it, or ``None``."""
+    now = timezone.now()
+    worker_id = worker_id or default_worker_id()
+    with transaction.atomic():
+        _release_expired(now)
+        candidates = BackgroundTask.objects.filter(
+            status=BackgroundTask.Status.QUEUED,
+            run_after__lte=now,
+            name__in=list(REGISTRY),
+        ).order_by("run_after", "id")
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        running = {}
+        for candidate in candidates[:CLAIM_SCAN_LIMIT]:
+            if candidate.name not in running:
+                running[candidate.name] = _running_count(candidate.name)
+            if running[candidate.name] >= REGISTRY[candidate.name].concurrency:
+                continue
+            claimed = BackgroundTask.objects.filter(pk=candidate.pk, status=BackgroundTask.Status.QUEUED).update(
+                status=BackgroundTask.Status.RUNNING,
+                attempts=candidate.attempts + 1,
+                worker=worker_id,
+                locked_until=now + lease,
+                started_at=now,
+                error="",
+            )
+            if claimed:
+                candidate.refresh_from_db()
+                return candidate
+    return None
+
+
+def run_task(claimed, lease=DEFAULT_LEASE) -> BackgroundTask:
+    """Run a claimed task and record its outcome."""
+    spec = REGISTRY[claimed.name]
+    scope = claimed.household_id or tenancy.UNSCOPED
+    try:
+        with tenancy.activate(scope):
+            result = spec.func(TaskContext(claimed, lease), **claimed.kwargs)
+    except Exception:
+        now = timezone.now()
+        retry = claimed.attempts < claimed.max_attempts
+        BackgroundTask.objects.filter(pk=claimed.pk).update(
+            status=BackgroundTask.Status.QUEUED if retry else BackgroundTask.Status.FAILED,
+            error=traceback.format_exc(limit=20),
+            run_after=now + spec.retry_delay * claimed.attempts,
+            locked_until=None,
+            finished_at=None if retry else now,
+        )
+    else:
+        BackgroundTask.objects.filter(pk=claimed.pk).update(
+            status=BackgroundTask.Status.SUCCEEDED,
+            result=result,
+            locked_until=None,
+            finished_at=timezone.now(),
+        )
+    claimed.refresh_from_db()
+    return claimed
+
+
+def run_pending(worker_id=None, *, max_tasks=None, lease=DEFAULT_LEASE) -> int:
+    """Run runnable tasks until the queue is empty (or ``max_tasks``); returns how many ran."""
+    ran = 0
+    while max_tasks is None or ran < max_tasks:
+        claimed = claim_next(worker_id, lease)
+        if claimed is None:
+            break
+        run_task(claimed, lease)
+        ran += 1
+    return ran
+
+
+@task("recategorize", label="Re-apply categorization rules")
+def recategorize_task(context, only_category=None):
+    scanned, changed = recategorize_history(
+        only_category=only_category,
+        progress=lambda done, total: context.progress(done, total, f"{done} of {total} transactions scanned"),
+    )
+    return {"scanned": scanned, "changed": changed}
+
+
+@task("refresh_forecast", label="Refresh cash-flow forecast")
+def refresh_forecast_task(context):
+    patterns, entries = refresh_forecast()
+    return {"patterns": patterns, "entries": entries}
+
+
+@task("pair_transfers", label="Link unpaired transfers")
+def pair_transfers_task(context, window_days=3):
+    return {"pairs": pair_unlinked_transfers(timedelta(days=window_days))}
+
+
+@task("purge_deleted", label="Purge deleted rows", max_attempts=1)
+def purge_deleted_task(context, older_than_days=30):
+    transactions, accounts = purge_deleted(
+        timedelta(days=older_than_days),
+        progress=lambda done: context.progress(done, message=f"{done} transactions purged"),
+    )
+    return {"transactions": transactions, "accounts": accounts}
+
+
+@task("stamp_deleted_account", label="Hide a deleted account's transactions")
+def stamp_deleted_account_task(context, account_id, deleted_at):
+    stamped = stamp_deleted_account(
+        account_id,
+        deleted_at,
+        progress=lambda done: context.progress(done, message=f"{done} transactions hidden"),
+    )
+    return {"transactions": stamped}
+
+
+@task("archive_transactions", label="Archive closed years", max_attempts=1)
+def archive_transactions_task(context, through_year=None):
+    archived = archive_transactions(
+        through_year,
+        progress=lambda done: context.progress(done, message=f"{done} transactions archived"),
+    )
+    return {"transactions": archived}
@@ -0,0 +1,114 @@
+"""Household tenancy.
+
+Many households share one database. ``Account`` and ``Category`` belong to a
+``Household``; ``Transaction`` and the rest are scoped through one of them.
+The active household lives in a context variable:
+
+* ``HouseholdMiddleware`` activates the signed-in member's household for each
+  request. Finance pages redirect anonymous users to the login page and
+  refuse users who belong to no household.
+* ``TenantManager`` (see ``finance.models``) filters every query to the
+  active household and defaults new rows to it.
+* Management commands, the background worker and staff in the admin run
+  ``UNSCOPED`` and see every household. A task queued from a request runs
+  scoped to the household that queued it. Jobs that must never mix rows of
+  two households, such as applying rules or pairing transfers, go through
+  ``each_household()`` instead.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.exceptions import PermissionDenied
+from django.urls import reverse
+
+SESSION_KEY = "household_id"
+UNSCOPED = object()
+_current = ContextVar("household", default=UNSCOPED)
+
+
+@contextmanager
+def activate(household):
+    """Scope queries to ``household`` (a ``Household``, its id, ``None`` or ``UNSCOPED``) within the block."""
+    token = _current.set(getattr(household, "pk", household))
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+def current_household_id():
+    """The active household's id, ``None`` for a request without one, or ``UNSCOPED``."""
+    return _current.get()
+
+
+def cache_scope():
+    """Short label for the active scope, used to keep cached data apart per household."""
+    household_id = _current.get()
+    if household_id is UNSCOPED:
+        return None
+    return f"h{household_id}"
+
+
+def default_household_id():
+    """Field default for new tenant rows: the active household, if any."""
+    household_id = _current.get()
+    return None if household_id is UNSCOPED else household_id
+
+
+def each_household():
+    """Yield each household's id with it active; a scoped caller gets one pass in its own."""
+    household_id = _current.get()
+    if household_id is not UNSCOPED:
+        yield household_id
+        return
+    from .models import Household
+
+    for household_id in Household.objects.order_by("pk").values_list("pk", flat=True):
+        with activate(household_id):
+            yield household_id
+
+
+def household_for(request):
+    """Pick the signed-in user's household: the one chosen in the session, else their first."""
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    memberships = user.households.order_by("pk")
+    chosen = request.session.get(SESSION_KEY)
+    if chosen is not None:
+        household = memberships.filter(pk=chosen).first()
+        if household is not None:
+            return household
+    return memberships.first()
+
+
+class HouseholdMiddleware:
+    """Activate the request's household; finance pages need a signed-in member."""
+
+    protected_namespaces = ("finance",)
+    protected_url_names = ("home",)
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.user.is_staff and request.path_info.startswith(reverse("admin:index")):
+            scope = UNSCOPED
+            request.household = None
+        else:
+            request.household = scope = household_for(request)
+        with activate(scope):
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        if match.namespace not in self.protected_namespaces and match.url_name not in self.protected_url_names:
+            return None
+        if not request.user.is_authenticated:
+            from django.contrib.auth.views import redirect_to_login
+
+            return redirect_to_login(request.get_full_path())
+        if request.household is None:
+            raise PermissionDenied("You are not a member of any household.")
+        return None
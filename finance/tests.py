@@ -1,16 +1,96 @@
 from __future__ import annotations
 
+import json
+from importlib import import_module
+from io import StringIO
 from decimal import Decimal
-from datetime import date
+from datetime import date, datetime, timedelta
+from unittest import mock, skipUnless
 
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.db import IntegrityError, connection, migrations, models
+from django.db.models import Count, F, Q
+from django.db.transaction import atomic
+from django.core.management import CommandError, call_command
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
-from .forms import TransactionForm
-from .models import Account, Category, Transaction
+from household.db_routing import STICKY_COOKIE, PrimaryReplicaRouter, ReplicaReadsMiddleware, replica_reads
 
-class CategoryModelTests(TestCase):
+from . import cache as finance_cache
+from . import tenancy
+from .admin import EstimatedCountPaginator, estimated_row_count
+from .archive import archive_transactions
+from .categorization import categorize, get_matcher
+from .dashboard import previous_statement_date, upcoming_due_accounts
+from .forecast import add_months, detect_recurring, refresh_forecast
+from .jinja2 import money, short_time
+from .networth import EPOCH_KEY, INTERVAL_MONTH, daily_deltas, net_worth_series
+from .networth import _keys as networth_keys
+from .partitions import create_partition_sql, month_bounds, partition_name
+from .reports import income_expense_report
+from .deletion import (
+	purge_deleted,
+	restore_account,
+	soft_delete_account,
+	soft_delete_transactions,
+	stamp_deleted_account,
+)
+from .forms import AccountForm, TransactionForm
+from .transfers import create_transfer, find_transfer_pairs, pair_unlinked_transfers
+from .models import (
+	Account,
+	ArchivedTransaction,
+	BackgroundTask,
+	CategorizationRule,
+	Category,
+	ChangeLog,
+	ForecastEntry,
+	Household,
+	MonthlySummary,
+	Tombstone,
+	Transaction,
+)
+from .sync import TOMBSTONE_RETENTION, encode_cursor, sync_changes
+from .tasks import REGISTRY, claim_next, enqueue, run_pending, task
+from .views import SyncView
+
+
+# Every signed-in request loads the user and their household before the view runs.
+SESSION_QUERIES = 2
+
+class HouseholdTestCase(TestCase):
+	"""Runs each test inside one household, signed in as one of its members."""
+
+	@classmethod
+	def setUpTestData(cls):
+		cls.household = Household.objects.create(name="Test Household")
+		cls.member = get_user_model().objects.create_user(username="member", password="pw")
+		cls.household.members.add(cls.member)
+		cls._household_token = tenancy._current.set(cls.household.pk)
+
+	@classmethod
+	def tearDownClass(cls):
+		tenancy._current.reset(cls._household_token)
+		super().tearDownClass()
+
+	@classmethod
+	def _pre_setup(cls):
+		super()._pre_setup()
+		cls.client.force_login(cls.member)
+
+
+
+class CategoryModelTests(HouseholdTestCase):
 	def test_slug_normalization_and_uniqueness(self):
 		"""Slug is normalized, trimmed, and remains unique with suffixes."""
 		base = Category.objects.create(name="  Groceries  ")
@@ -21,7 +101,7 @@ class CategoryModelTests(TestCase):
 		self.assertNotEqual(base.slug, duplicate.slug)
 
 
-class AccountModelTests(TestCase):
+class AccountModelTests(HouseholdTestCase):
 	def test_checking_requires_routing_number(self):
 		"""Checking accounts without routing numbers fail validation."""
 		account = Account(
@@ -84,8 +164,87 @@ class AccountModelTests(TestCase):
 
 		self.assertIn("due_date", ctx.exception.message_dict)
 
+	def test_type_rules_report_field_errors_once(self):
+		"""The shared rules give field errors; the matching CHECK constraints add none of their own."""
+		account = Account(
+			name="Card",
+			account_number="CC-2",
+			account_type=Account.AccountType.CREDIT_CARD,
+			routing_number="555123456",
+			interest_rate=Decimal("-1.00"),
+			balance=Decimal("0.00"),
+		)
+
+		with self.assertRaises(ValidationError) as ctx:
+			account.full_clean()
+
+		self.assertEqual(
+			ctx.exception.message_dict,
+			{
+				"routing_number": ["Routing number is only allowed for checking or savings accounts."],
+				"interest_rate": ["Interest rate must be zero or greater."],
+				"due_date": ["Due date is required for this account type."],
+			},
+		)
+
+	def test_database_enforces_type_rules_on_bulk_writes(self):
+		"""bulk_create and update() skip full_clean, so the CHECK constraints catch bad rows."""
+		checking = Account.objects.create(
+			name="Checking",
+			account_number="CHK-2",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="123456789",
+			balance=Decimal("0.00"),
+		)
+		loan = Account(
+			name="Loan",
+			account_number="LOAN-2",
+			account_type=Account.AccountType.LOAN,
+			interest_rate=Decimal("5.75"),
+			balance=Decimal("0.00"),
+		)
+
+		for write in (
+			lambda: Account.objects.bulk_create([loan]),
+			lambda: Account.objects.filter(pk=checking.pk).update(routing_number=""),
+			lambda: Account.objects.filter(pk=checking.pk).update(account_type=Account.AccountType.SAVINGS),
+			lambda: Transaction.objects.bulk_create(
+				[
+					Transaction(
+						account=checking,
+						transaction_type=Transaction.TransactionType.EXPENSE,
+						amount=Decimal("0.00"),
+						category=Category.objects.create(name="General"),
+					)
+				]
+			),
+		):
+			with self.subTest(write=write), self.assertRaises(IntegrityError), atomic():
+				write()
+
+	def test_constraint_migration_reports_existing_violations(self):
+		migration = import_module("finance.migrations.0018_account_type_checks")
+		account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-3",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="123456789",
+			balance=Decimal("0.00"),
+		)
+		migration.check_existing_rows(apps, None)
+
+		stricter = migrations.AddConstraint(
+			model_name="account",
+			constraint=models.CheckConstraint(
+				condition=Q(balance__gt=0), name="positive_balance", violation_error_message="Balance is not positive."
+			),
+		)
+		with mock.patch.object(migration.Migration, "operations", [stricter]):
+			with self.assertRaisesMessage(ValueError, f"positive_balance: Balance is not positive. accounts {account.pk}"):
+				migration.check_existing_rows(apps, None)
+
 
-class TransactionModelTests(TestCase):
+class TransactionModelTests(HouseholdTestCase):
 	def setUp(self):
 		self.category = Category.objects.create(name="General")
 		self.account = Account.objects.create(
@@ -136,7 +295,7 @@ class TransactionModelTests(TestCase):
 		self.assertIn("amount", ctx.exception.message_dict)
 
 
-class TransactionListViewTests(TestCase):
+class TransactionListViewTests(HouseholdTestCase):
 	def setUp(self):
 		self.category = Category.objects.create(name="General")
 		self.account_one = Account.objects.create(
@@ -186,8 +345,46 @@ class TransactionListViewTests(TestCase):
 		self.assertEqual(transactions, {self.transaction_one, self.transaction_two})
 		self.assertEqual(response.context["selected_account"], "")
 
+	ROW_BYTES_BUDGET = 1500
+
+	def test_row_fragment_stays_within_bytes_per_row_budget(self):
+		"""Rows reuse the icon sprite and shared classes instead of inlining markup per row."""
+		url = reverse("finance:transaction-list")
+		sizes = []
+		for batch in range(2):
+			for index in range(10):
+				Transaction.objects.create(
+					account=self.account_one,
+					transaction_type=Transaction.TransactionType.TRANSFER,
+					amount=Decimal("1234.56"),
+					category=self.category,
+					memo=f"Monthly savings sweep {batch}-{index}",
+					reference=f"REF-{batch}{index:05d}",
+				)
+			full = self.client.get(url, HTTP_HX_REQUEST="true")
+			sizes.append(len(full.content))
+
+		per_row = (sizes[1] - sizes[0]) / 10
+		self.assertLess(per_row, self.ROW_BYTES_BUDGET)
+		self.assertContains(full, 'href="#icon-edit"')
+
+	def test_fragments_are_gzipped_when_accepted(self):
+		for index in range(20):
+			Transaction.objects.create(
+				account=self.account_one,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal("5.00"),
+				category=self.category,
+			)
+
+		response = self.client.get(
+			reverse("finance:transaction-list"), HTTP_HX_REQUEST="true", HTTP_ACCEPT_ENCODING="gzip"
+		)
+
+		self.assertEqual(response["Content-Encoding"], "gzip")
 
-class TransactionFormTests(TestCase):
+
+class TransactionFormTests(HouseholdTestCase):
 	def setUp(self):
 		self.category = Category.objects.create(name="General")
 		self.inactive_category = Category.objects.create(name="Archive", is_active=False)
@@ -225,3 +422,2018 @@ class TransactionFormTests(TestCase):
 		category_ids = [cat.id for cat in form.fields["category"].queryset]
 		self.assertIn(self.category.id, category_ids)
 		self.assertNotIn(self.inactive_category.id, category_ids)
+
+
+@skipUnless(connection.vendor == "sqlite", "SQLite profile only")
+class SQLiteProfileTests(HouseholdTestCase):
+	def test_connection_pragmas_applied(self):
+		"""The SQLite profile tunes every new connection for concurrent access."""
+		with connection.cursor() as cursor:
+			cursor.execute("PRAGMA synchronous")
+			synchronous = cursor.fetchone()[0]
+			cursor.execute("PRAGMA busy_timeout")
+			busy_timeout = cursor.fetchone()[0]
+
+		self.assertEqual(synchronous, 1)  # NORMAL
+		self.assertEqual(busy_timeout, connection.settings_dict["OPTIONS"]["timeout"] * 1000)
+
+
+class FinanceCacheTests(HouseholdTestCase):
+	def setUp(self):
+		cache.clear()
+		self.calls = 0
+
+	def _compute(self):
+		self.calls += 1
+		return self.calls
+
+	def test_get_or_set_computes_once_per_version(self):
+		"""Values are reused until one of their namespaces is invalidated."""
+		namespaces = [finance_cache.ACCOUNTS, finance_cache.TRANSACTIONS]
+
+		self.assertEqual(finance_cache.get_or_set("demo", self._compute, namespaces), 1)
+		self.assertEqual(finance_cache.get_or_set("demo", self._compute, namespaces), 1)
+
+		finance_cache.invalidate(finance_cache.TRANSACTIONS)
+
+		self.assertEqual(finance_cache.get_or_set("demo", self._compute, namespaces), 2)
+
+	def test_model_changes_invalidate_namespace(self):
+		"""Saving an account bumps the accounts namespace via signals."""
+		finance_cache.set("demo", "stale", [finance_cache.ACCOUNTS])
+		Account.objects.create(
+			name="Checking",
+			account_number="CHK-CACHE",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+
+		self.assertIsNone(finance_cache.get("demo", [finance_cache.ACCOUNTS]))
+
+	def test_evicted_version_does_not_revive_old_entries(self):
+		"""A culled version key is reseeded with a new value, not the first one again."""
+		finance_cache.set("demo", "stale", [finance_cache.ACCOUNTS])
+		scopes = (None, tenancy.cache_scope())
+		cache.delete_many([finance_cache._version_key(finance_cache.ACCOUNTS, scope) for scope in scopes])
+
+		self.assertIsNone(finance_cache.get("demo", [finance_cache.ACCOUNTS]))
+
+
+class AccountListViewTests(HouseholdTestCase):
+	def setUp(self):
+		self.category = Category.objects.create(name="General")
+
+	def _create_account(self, index):
+		return Account.objects.create(
+			name=f"Checking {index}",
+			account_number=f"CHK-LIST-{index}",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("100.00"),
+		)
+
+	def _create_transaction(self, account, transaction_type, amount, *, is_cleared=False):
+		return Transaction.objects.create(
+			account=account,
+			transaction_type=transaction_type,
+			amount=Decimal(amount),
+			category=self.category,
+			is_cleared=is_cleared,
+		)
+
+	@override_settings(ROW_TEMPLATE_ENGINE="django")
+	def test_rows_annotate_activity_totals(self):
+		"""Each account row carries count, last activity, uncleared and month net."""
+		account = self._create_account(1)
+		self._create_transaction(account, Transaction.TransactionType.INCOME, "100.00", is_cleared=True)
+		self._create_transaction(account, Transaction.TransactionType.EXPENSE, "30.00")
+		idle = self._create_account(2)
+
+		response = self.client.get(reverse("finance:account-list"), HTTP_HX_REQUEST="true")
+
+		rows = {row.pk: row for row in response.context["accounts"]}
+		self.assertEqual(rows[account.pk].transaction_count, 2)
+		self.assertEqual(rows[account.pk].uncleared_total, Decimal("-30.00"))
+		self.assertEqual(rows[account.pk].month_net, Decimal("70.00"))
+		self.assertIsNotNone(rows[account.pk].last_activity)
+		self.assertEqual(rows[idle.pk].transaction_count, 0)
+		self.assertEqual(rows[idle.pk].month_net, Decimal("0.00"))
+		self.assertIsNone(rows[idle.pk].last_activity)
+
+	def test_query_count_is_constant(self):
+		"""Rendering the rows never issues per-account queries."""
+		for index in range(10):
+			account = self._create_account(index)
+			self._create_transaction(account, Transaction.TransactionType.EXPENSE, "5.00")
+
+		with self.assertNumQueries(1 + SESSION_QUERIES):
+			response = self.client.get(reverse("finance:account-list"), HTTP_HX_REQUEST="true")
+
+		self.assertContains(response, "Checking 9")
+
+	def test_full_page_loads_scripts_from_our_own_static_files(self):
+		response = self.client.get(reverse("finance:account-list"))
+
+		self.assertContains(response, "/static/django_htmx/")
+		self.assertContains(response, "/static/css/dist/styles.css")
+		self.assertNotContains(response, "https://")
+
+	def test_built_stylesheet_has_the_shared_row_rules(self):
+		"""Row partials rely on these classes, so the committed build must define them."""
+		with open(finders.find("css/dist/styles.css")) as stylesheet:
+			css = stylesheet.read()
+
+		for selector in (".data-rows > tr:hover", ".data-rows > tr > td", ".cell-note"):
+			self.assertIn(selector, css)
+
+
+class UpcomingDueTests(HouseholdTestCase):
+	def setUp(self):
+		cache.clear()
+		self.today = timezone.localdate()
+		self.category = Category.objects.create(name="Payments")
+		self.card = Account.objects.create(
+			name="Card",
+			account_number="CC-DUE",
+			account_type=Account.AccountType.CREDIT_CARD,
+			interest_rate=Decimal("19.99"),
+			due_date=self.today + timedelta(days=5),
+			balance=Decimal("420.00"),
+		)
+		self.loan = Account.objects.create(
+			name="Loan",
+			account_number="LOAN-DUE",
+			account_type=Account.AccountType.LOAN,
+			interest_rate=Decimal("4.50"),
+			due_date=self.today + timedelta(days=60),
+			balance=Decimal("9000.00"),
+		)
+
+	def test_lists_accounts_in_window_with_payment_status(self):
+		"""Only accounts due inside the window are listed, with payment status."""
+		upcoming = upcoming_due_accounts(14, today=self.today)
+
+		self.assertEqual([item["account"] for item in upcoming], [self.card])
+		self.assertEqual(upcoming[0]["statement_balance"], Decimal("420.00"))
+		self.assertFalse(upcoming[0]["payment_posted"])
+
+	def test_payment_since_statement_invalidates_cache(self):
+		"""A new payment is reflected immediately and results are cached otherwise."""
+		upcoming_due_accounts(14, today=self.today)
+		with self.assertNumQueries(0):
+			upcoming_due_accounts(14, today=self.today)
+
+		Transaction.objects.create(
+			account=self.card,
+			transaction_type=Transaction.TransactionType.PAYMENT,
+			amount=Decimal("100.00"),
+			category=self.category,
+		)
+
+		upcoming = upcoming_due_accounts(14, today=self.today)
+		self.assertTrue(upcoming[0]["payment_posted"])
+
+	def test_previous_statement_date_clamps_month_end(self):
+		"""Statement dates roll back one month and clamp to shorter months."""
+		self.assertEqual(previous_statement_date(date(2026, 3, 31)), date(2026, 2, 28))
+		self.assertEqual(previous_statement_date(date(2026, 1, 15)), date(2025, 12, 15))
+
+	def test_home_page_includes_dashboard(self):
+		"""The home page renders the upcoming payments partial."""
+		response = self.client.get(reverse("home"))
+
+		self.assertContains(response, "Upcoming Payments")
+		self.assertContains(response, "Card")
+
+
+class ReconcileViewTests(HouseholdTestCase):
+	def setUp(self):
+		self.category = Category.objects.create(name="General")
+		self.account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-REC",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		self.other = Account.objects.create(
+			name="Other",
+			account_number="CHK-OTHER",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		self.transactions = [
+			Transaction.objects.create(
+				account=self.account,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal("10.00"),
+				category=self.category,
+			)
+			for _ in range(5)
+		]
+		self.foreign = Transaction.objects.create(
+			account=self.other,
+			transaction_type=Transaction.TransactionType.EXPENSE,
+			amount=Decimal("10.00"),
+			category=self.category,
+		)
+		today = timezone.localdate()
+		self.period = {
+			"start": today.replace(day=1).isoformat(),
+			"end": (today + timedelta(days=1)).isoformat(),
+			"statement_balance": "-50.00",
+		}
+
+	def test_bulk_clear_is_single_update(self):
+		"""Selected rows are cleared by one UPDATE scoped to the account."""
+		ids = [transaction.pk for transaction in self.transactions] + [self.foreign.pk]
+		url = reverse("finance:account-reconcile-bulk", args=[self.account.pk])
+
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.post(url, {**self.period, "action": "clear", "ids": ids})
+
+		self.assertEqual(response.status_code, 200)
+		updates = [query for query in queries.captured_queries if query["sql"].startswith("UPDATE")]
+		self.assertEqual(len(updates), 1)
+		self.assertEqual(Transaction.objects.filter(account=self.account, is_cleared=True).count(), 5)
+		self.foreign.refresh_from_db()
+		self.assertFalse(self.foreign.is_cleared)
+		self.assertEqual(response.context["cleared_total"], Decimal("-50.00"))
+		self.assertEqual(response.context["difference"], Decimal("0.00"))
+		self.assertIn("transactionsChanged", response["HX-Trigger"])
+
+	def test_bulk_unclear(self):
+		"""Cleared rows can be flipped back in bulk."""
+		Transaction.objects.filter(account=self.account).update(is_cleared=True)
+		url = reverse("finance:account-reconcile-bulk", args=[self.account.pk])
+
+		self.client.post(url, {**self.period, "action": "unclear", "ids": [self.transactions[0].pk]})
+
+		self.assertEqual(Transaction.objects.filter(account=self.account, is_cleared=False).count(), 1)
+
+	def test_page_lists_period_transactions(self):
+		"""The reconcile page shows the statement period with live totals."""
+		response = self.client.get(reverse("finance:account-reconcile", args=[self.account.pk]), self.period)
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.context["uncleared_count"], 5)
+		self.assertEqual(response.context["difference"], Decimal("-50.00"))
+
+
+class TransactionBulkActionTests(HouseholdTestCase):
+	def setUp(self):
+		self.general = Category.objects.create(name="General")
+		self.groceries = Category.objects.create(name="Groceries")
+		self.checking = Account.objects.create(
+			name="Checking",
+			account_number="CHK-BULK",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		self.savings = Account.objects.create(
+			name="Savings",
+			account_number="SAV-BULK",
+			account_type=Account.AccountType.SAVINGS,
+			routing_number="111000025",
+			interest_rate=Decimal("1.00"),
+			balance=Decimal("0.00"),
+		)
+		self.credit = Account.objects.create(
+			name="Card",
+			account_number="CC-BULK",
+			account_type=Account.AccountType.CREDIT_CARD,
+			interest_rate=Decimal("19.99"),
+			due_date=date(2026, 2, 1),
+			balance=Decimal("0.00"),
+		)
+		self.rows = [
+			Transaction.objects.create(
+				account=account,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal("12.00"),
+				category=self.general,
+			)
+			for account in (self.checking, self.checking, self.savings)
+		]
+		self.ids = [row.pk for row in self.rows]
+		self.url = reverse("finance:transaction-bulk")
+
+	def test_recategorize_updates_all_and_reports_accounts(self):
+		"""Recategorizing runs one UPDATE and lists every affected account."""
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.post(
+				self.url,
+				{"action": "recategorize", "ids": self.ids, "category": self.groceries.pk},
+			)
+
+		self.assertEqual(response.status_code, 204)
+		updates = [query for query in queries.captured_queries if query["sql"].startswith("UPDATE")]
+		self.assertEqual(len(updates), 1)
+		self.assertEqual(Transaction.objects.filter(category=self.groceries).count(), 3)
+		payload = json.loads(response["HX-Trigger"])
+		self.assertEqual(
+			payload["transactionsChanged"]["accounts"],
+			sorted([self.checking.pk, self.savings.pk]),
+		)
+
+	def test_change_account_enforces_credit_type_rules(self):
+		"""Expenses cannot be moved onto a credit account."""
+		response = self.client.post(
+			self.url,
+			{"action": "change_account", "ids": self.ids, "account": self.credit.pk},
+		)
+
+		self.assertEqual(response.status_code, 400)
+		self.assertFalse(Transaction.objects.filter(account=self.credit).exists())
+
+	def test_change_account_includes_destination(self):
+		"""Moving rows reports both source and destination accounts."""
+		response = self.client.post(
+			self.url,
+			{"action": "change_account", "ids": self.ids[:2], "account": self.savings.pk},
+		)
+
+		self.assertEqual(response.status_code, 204)
+		self.assertEqual(Transaction.objects.filter(account=self.savings).count(), 3)
+		payload = json.loads(response["HX-Trigger"])
+		self.assertEqual(
+			payload["transactionsChanged"]["accounts"],
+			sorted([self.checking.pk, self.savings.pk]),
+		)
+
+	def test_bulk_delete(self):
+		"""Delete removes every selected row."""
+		response = self.client.post(self.url, {"action": "delete", "ids": self.ids[:2]})
+
+		self.assertEqual(response.status_code, 204)
+		self.assertEqual(list(Transaction.objects.values_list("pk", flat=True)), [self.ids[2]])
+
+	def test_requires_selection(self):
+		"""Submitting without checked rows is rejected."""
+		response = self.client.post(self.url, {"action": "mark_cleared"})
+
+		self.assertEqual(response.status_code, 400)
+
+
+class CategorizationRuleTests(HouseholdTestCase):
+	def setUp(self):
+		cache.clear()
+		self.general = Category.objects.create(name="General")
+		self.groceries = Category.objects.create(name="Groceries")
+		self.streaming = Category.objects.create(name="Streaming")
+		self.rent = Category.objects.create(name="Rent")
+		self.account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-RULES",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		CategorizationRule.objects.create(name="Market", category=self.groceries, pattern="market")
+		CategorizationRule.objects.create(
+			name="Prime",
+			category=self.streaming,
+			pattern=r"prime\s+video",
+			match_type=CategorizationRule.MatchType.REGEX,
+			priority=10,
+		)
+		CategorizationRule.objects.create(
+			name="Rent",
+			category=self.rent,
+			account=self.account,
+			min_amount=Decimal("1000.00"),
+		)
+
+	def _transaction(self, memo="", amount="10.00", **kwargs):
+		return Transaction(
+			account=self.account,
+			transaction_type=Transaction.TransactionType.EXPENSE,
+			amount=Decimal(amount),
+			memo=memo,
+			**kwargs,
+		)
+
+	def test_priority_and_conditions(self):
+		"""Lower priority numbers win and amount/account conditions apply."""
+		matcher = get_matcher()
+
+		self.assertEqual(matcher.match_transaction(self._transaction("Prime Video market")), self.streaming.pk)
+		self.assertEqual(matcher.match_transaction(self._transaction("FARMERS MARKET")), self.groceries.pk)
+		self.assertEqual(matcher.match_transaction(self._transaction("Landlord", "1200.00")), self.rent.pk)
+		self.assertIsNone(matcher.match_transaction(self._transaction("Landlord", "20.00")))
+
+	def test_regex_rules_cannot_refer_to_groups(self):
+		"""Rules share one compiled expression, so group numbers and names are not their own."""
+		for pattern in (r"(\d)\1", r"(?P<code>\d+)", r"(a)?(?(1)b|c)"):
+			rule = CategorizationRule(
+				name="Grouped",
+				category=self.general,
+				pattern=pattern,
+				match_type=CategorizationRule.MatchType.REGEX,
+			)
+			with self.subTest(pattern=pattern), self.assertRaises(ValidationError) as ctx:
+				rule.full_clean()
+			self.assertIn("Backreferences", ctx.exception.message_dict["pattern"][0])
+
+		CategorizationRule(
+			name="Escaped",
+			category=self.general,
+			pattern=r"[\1]\\1",
+			match_type=CategorizationRule.MatchType.REGEX,
+		).full_clean()
+
+	def test_bulk_categorize_runs_without_queries(self):
+		"""Once compiled, the matcher categorizes many rows with no queries."""
+		get_matcher()
+		rows = [self._transaction(f"Corner market #{index}") for index in range(500)]
+
+		with self.assertNumQueries(0):
+			assigned = categorize(rows)
+
+		self.assertEqual(assigned, 500)
+		self.assertTrue(all(row.category_id == self.groceries.pk for row in rows))
+
+	def test_matcher_rebuilt_when_rules_change(self):
+		"""Changing rules invalidates the compiled matcher."""
+		self.assertIsNone(get_matcher().match(memo="Gym"))
+
+		CategorizationRule.objects.create(name="Gym", category=self.general, pattern="gym")
+
+		self.assertEqual(get_matcher().match(memo="Gym"), self.general.pk)
+
+	def test_transaction_form_applies_rules_when_category_blank(self):
+		"""Leaving the category blank lets a matching rule choose it."""
+		form = TransactionForm(
+			data={
+				"account": self.account.pk,
+				"transaction_type": Transaction.TransactionType.EXPENSE,
+				"amount": "25.00",
+				"memo": "Night market",
+				"posted_at": "2026-01-10T12:00",
+			}
+		)
+
+		self.assertTrue(form.is_valid(), form.errors)
+		self.assertEqual(form.save().category, self.groceries)
+
+	def test_recategorize_command_updates_history(self):
+		"""The management command re-applies rules to stored rows."""
+		stored = self._transaction("Super market run", category=self.general)
+		stored.save()
+		untouched = self._transaction("Coffee", category=self.general)
+		untouched.save()
+
+		call_command("recategorize", batch_size=1, stdout=StringIO())
+
+		stored.refresh_from_db()
+		untouched.refresh_from_db()
+		self.assertEqual(stored.category, self.groceries)
+		self.assertEqual(untouched.category, self.general)
+
+
+class TransferTests(HouseholdTestCase):
+	def setUp(self):
+		self.category = Category.objects.create(name="Transfers")
+		self.checking = Account.objects.create(
+			name="Checking",
+			account_number="CHK-XFER",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("1000.00"),
+		)
+		self.savings = Account.objects.create(
+			name="Savings",
+			account_number="SAV-XFER",
+			account_type=Account.AccountType.SAVINGS,
+			routing_number="111000025",
+			interest_rate=Decimal("1.00"),
+			balance=Decimal("500.00"),
+		)
+		self.card = Account.objects.create(
+			name="Card",
+			account_number="CC-XFER",
+			account_type=Account.AccountType.CREDIT_CARD,
+			interest_rate=Decimal("19.99"),
+			due_date=date(2026, 2, 1),
+			balance=Decimal("300.00"),
+		)
+
+	def test_create_transfer_links_legs_and_moves_balances(self):
+		"""Both legs share a link id and both balances move together."""
+		outgoing, incoming = create_transfer(
+			from_account=self.checking,
+			to_account=self.savings,
+			amount=Decimal("200.00"),
+			category=self.category,
+		)
+
+		self.assertEqual(outgoing.transfer_id, incoming.transfer_id)
+		self.assertEqual(outgoing.signed_amount, Decimal("-200.00"))
+		self.assertEqual(incoming.signed_amount, Decimal("200.00"))
+		self.checking.refresh_from_db()
+		self.savings.refresh_from_db()
+		self.assertEqual(self.checking.balance, Decimal("800.00"))
+		self.assertEqual(self.savings.balance, Decimal("700.00"))
+
+	def test_transfer_to_credit_account_is_payment(self):
+		"""Paying a card from checking books a PAYMENT leg that reduces the card balance."""
+		_outgoing, incoming = create_transfer(
+			from_account=self.checking,
+			to_account=self.card,
+			amount=Decimal("100.00"),
+			category=self.category,
+		)
+
+		self.assertEqual(incoming.transaction_type, Transaction.TransactionType.PAYMENT)
+		self.card.refresh_from_db()
+		self.assertEqual(self.card.balance, Decimal("200.00"))
+
+	def test_deleting_one_leg_deletes_the_transfer_and_moves_balances_back(self):
+		outgoing, incoming = create_transfer(
+			from_account=self.checking,
+			to_account=self.savings,
+			amount=Decimal("200.00"),
+			category=self.category,
+		)
+
+		response = self.client.post(reverse("finance:transaction-delete", args=[incoming.pk]))
+
+		self.assertFalse(Transaction.objects.exists())
+		self.assertEqual(
+			json.loads(response["HX-Trigger"])["transactionsChanged"]["accounts"],
+			sorted([self.checking.pk, self.savings.pk]),
+		)
+		self.checking.refresh_from_db()
+		self.savings.refresh_from_db()
+		self.assertEqual((self.checking.balance, self.savings.balance), (Decimal("1000.00"), Decimal("500.00")))
+
+		self.client.post(reverse("finance:transaction-restore"), {"ids": [incoming.pk]})
+
+		self.assertEqual(set(Transaction.objects.values_list("pk", flat=True)), {outgoing.pk, incoming.pk})
+		self.checking.refresh_from_db()
+		self.savings.refresh_from_db()
+		self.assertEqual((self.checking.balance, self.savings.balance), (Decimal("800.00"), Decimal("700.00")))
+
+	def test_transfer_legs_cannot_be_edited_apart(self):
+		outgoing, _incoming = create_transfer(
+			from_account=self.checking,
+			to_account=self.savings,
+			amount=Decimal("200.00"),
+			category=self.category,
+		)
+		form = TransactionForm(
+			instance=outgoing,
+			data={
+				"account": self.card.pk,
+				"transaction_type": Transaction.TransactionType.EXPENSE,
+				"amount": "5.00",
+				"category": self.category.pk,
+				"memo": "Rent pot",
+				"posted_at": "2026-01-05T09:00",
+			},
+		)
+
+		self.assertTrue(form.is_valid(), form.errors)
+		form.save()
+		outgoing.refresh_from_db()
+		self.assertEqual(outgoing.memo, "Rent pot")
+		self.assertEqual(outgoing.account, self.checking)
+		self.assertEqual(outgoing.amount, Decimal("200.00"))
+
+		response = self.client.post(
+			reverse("finance:transaction-bulk"),
+			{"action": "change_account", "ids": [outgoing.pk], "account": self.card.pk},
+		)
+		self.assertEqual(response.status_code, 400)
+
+	def test_transfer_view_rejects_same_account(self):
+		"""Transfers need two different accounts."""
+		response = self.client.post(
+			reverse("finance:transfer-create"),
+			{
+				"from_account": self.checking.pk,
+				"to_account": self.checking.pk,
+				"amount": "10.00",
+				"category": self.category.pk,
+				"posted_at": "2026-01-10T12:00",
+			},
+		)
+
+		self.assertEqual(response.status_code, 400)
+		self.assertFalse(Transaction.objects.exists())
+
+	def test_find_pairs_uses_amount_and_window(self):
+		"""Pairs need equal amounts, different accounts and nearby dates."""
+		base = timezone.now()
+		rows = [
+			{"household_id": 1, "pk": 1, "account_id": 1, "amount": Decimal("50"), "posted_at": base, "transfer_direction": ""},
+			{"household_id": 1, "pk": 2, "account_id": 1, "amount": Decimal("50"), "posted_at": base + timedelta(hours=1), "transfer_direction": ""},
+			{"household_id": 1, "pk": 3, "account_id": 2, "amount": Decimal("50"), "posted_at": base + timedelta(days=1), "transfer_direction": ""},
+			{"household_id": 1, "pk": 4, "account_id": 2, "amount": Decimal("50"), "posted_at": base + timedelta(days=9), "transfer_direction": ""},
+			{"household_id": 1, "pk": 5, "account_id": 3, "amount": Decimal("75"), "posted_at": base, "transfer_direction": ""},
+		]
+
+		self.assertEqual(find_transfer_pairs(rows, timedelta(days=3)), [(1, 3)])
+
+		rows[2]["transfer_direction"] = Transaction.TransferDirection.OUT
+		self.assertEqual(find_transfer_pairs(rows, timedelta(days=3)), [(3, 1)])
+
+	def test_pair_unlinked_transfers_links_rows(self):
+		"""Legacy unlinked transfer rows are paired in place."""
+		legs = [
+			Transaction.objects.create(
+				account=account,
+				transaction_type=Transaction.TransactionType.TRANSFER,
+				amount=Decimal("60.00"),
+				category=self.category,
+			)
+			for account in (self.checking, self.savings)
+		]
+
+		self.assertEqual(pair_unlinked_transfers(), 1)
+
+		for leg in legs:
+			leg.refresh_from_db()
+		self.assertIsNotNone(legs[0].transfer_id)
+		self.assertEqual(legs[0].transfer_id, legs[1].transfer_id)
+		self.assertEqual(
+			[leg.transfer_direction for leg in legs],
+			[Transaction.TransferDirection.OUT, Transaction.TransferDirection.IN],
+		)
+		self.assertEqual([leg.signed_amount for leg in legs], [Decimal("-60.00"), Decimal("60.00")])
+
+
+class CategoryMergeTests(HouseholdTestCase):
+	def setUp(self):
+		self.source = Category.objects.create(name="Dining")
+		self.target = Category.objects.create(name="Food")
+		self.account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-MERGE",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		for _ in range(3):
+			Transaction.objects.create(
+				account=self.account,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal("9.00"),
+				category=self.source,
+			)
+		self.rule = CategorizationRule.objects.create(name="Cafe", category=self.source, pattern="cafe")
+
+	@override_settings(ROW_TEMPLATE_ENGINE="django")
+	def test_list_annotates_usage_counts(self):
+		"""The category list counts transactions in the same query as the rows."""
+		with self.assertNumQueries(1 + SESSION_QUERIES):
+			response = self.client.get(reverse("finance:category-list"), HTTP_HX_REQUEST="true")
+			counts = {category.name: category.usage_count for category in response.context["categories"]}
+
+		self.assertEqual(counts["Dining"], 3)
+		self.assertEqual(counts["Food"], 0)
+
+	def test_protected_delete_offers_merge(self):
+		response = self.client.post(reverse("finance:category-delete", args=[self.source.pk]))
+
+		self.assertEqual(response.status_code, 400)
+		self.assertContains(
+			response,
+			reverse("finance:category-merge", args=[self.source.pk]),
+			status_code=400,
+		)
+
+	def test_deleted_transactions_show_in_usage_and_block_delete(self):
+		soft_delete_transactions(Transaction.objects.filter(category=self.source))
+
+		response = self.client.get(reverse("finance:category-list"), HTTP_HX_REQUEST="true")
+		self.assertContains(response, "+3 deleted")
+
+		response = self.client.post(reverse("finance:category-delete", args=[self.source.pk]))
+		self.assertContains(response, "deleted transactions that can still be restored", status_code=400)
+
+		self.client.post(reverse("finance:category-merge", args=[self.source.pk]), {"target": self.target.pk})
+		self.assertFalse(Category.objects.filter(pk=self.source.pk).exists())
+		self.assertEqual(Transaction.all_objects.filter(category=self.target).count(), 3)
+
+	def test_merge_moves_transactions_and_rules_then_deletes(self):
+		response = self.client.post(
+			reverse("finance:category-merge", args=[self.source.pk]),
+			{"target": self.target.pk},
+		)
+
+		self.assertEqual(response.status_code, 204)
+		self.assertIn("categoriesChanged", json.loads(response["HX-Trigger"]))
+		self.assertFalse(Category.objects.filter(pk=self.source.pk).exists())
+		self.assertEqual(Transaction.objects.filter(category=self.target).count(), 3)
+		self.rule.refresh_from_db()
+		self.assertEqual(self.rule.category, self.target)
+
+	def test_large_merge_logs_in_fixed_batches(self):
+		"""The change log streams a big merge instead of loading every row at once."""
+		Transaction.objects.bulk_create(
+			Transaction(
+				account=self.account,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal("1.00"),
+				category=self.source,
+			)
+			for _ in range(22)
+		)
+
+		with mock.patch.object(type(ChangeLog.objects), "LOG_BATCH_SIZE", 10):
+			with CaptureQueriesContext(connection) as queries:
+				self.client.post(reverse("finance:category-merge", args=[self.source.pk]), {"target": self.target.pk})
+
+		log_inserts = [query for query in queries if query["sql"].startswith('INSERT INTO "finance_changelog"')]
+		self.assertEqual(len(log_inserts), 3)
+		self.assertEqual(
+			ChangeLog.objects.filter(model="finance.transaction", action=ChangeLog.Action.UPDATE).count(),
+			25,
+		)
+
+	def test_merge_rejects_source_as_target(self):
+		response = self.client.post(
+			reverse("finance:category-merge", args=[self.source.pk]),
+			{"target": self.source.pk},
+		)
+
+		self.assertEqual(response.status_code, 400)
+		self.assertTrue(Category.objects.filter(pk=self.source.pk).exists())
+
+
+class ReportTests(HouseholdTestCase):
+	def setUp(self):
+		cache.clear()
+		self.salary = Category.objects.create(name="Salary")
+		self.food = Category.objects.create(name="Food")
+		self.checking = Account.objects.create(
+			name="Checking",
+			account_number="CHK-RPT",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		self.card = Account.objects.create(
+			name="Card",
+			account_number="CC-RPT",
+			account_type=Account.AccountType.CREDIT_CARD,
+			interest_rate=Decimal("19.99"),
+			due_date=date(2026, 2, 1),
+			balance=Decimal("0.00"),
+		)
+		tz = timezone.get_current_timezone()
+		january = timezone.make_aware(datetime(2026, 1, 15, 12), tz)
+		march = timezone.make_aware(datetime(2026, 3, 2, 12), tz)
+		rows = [
+			(self.checking, Transaction.TransactionType.INCOME, "1000.00", self.salary, january),
+			(self.checking, Transaction.TransactionType.EXPENSE, "120.00", self.food, january),
+			(self.card, Transaction.TransactionType.CHARGE, "30.00", self.food, march),
+			(self.card, Transaction.TransactionType.PAYMENT, "500.00", self.salary, march),
+		]
+		for account, transaction_type, amount, category, posted_at in rows:
+			Transaction.objects.create(
+				account=account,
+				transaction_type=transaction_type,
+				amount=Decimal(amount),
+				category=category,
+				posted_at=posted_at,
+			)
+		create_transfer(
+			from_account=self.checking,
+			to_account=self.card,
+			amount=Decimal("75.00"),
+			category=self.food,
+			posted_at=january,
+		)
+
+	def test_report_groups_by_month_and_category(self):
+		"""Charges count as expenses; payments and transfer legs are excluded."""
+		report = income_expense_report(date(2026, 1, 1), date(2026, 3, 1))
+
+		self.assertEqual([row.key for row in report.months], [date(2026, 1, 1), date(2026, 2, 1), date(2026, 3, 1)])
+		self.assertEqual(
+			[(row.income, row.expense) for row in report.months],
+			[(Decimal("1000.00"), Decimal("120.00")), (Decimal("0.00"), Decimal("0.00")), (Decimal("0.00"), Decimal("30.00"))],
+		)
+		self.assertEqual(report.net, Decimal("850.00"))
+		by_category = {row.label: (row.income, row.expense) for row in report.categories}
+		self.assertEqual(by_category, {"Salary": (Decimal("1000.00"), Decimal("0.00")), "Food": (Decimal("0.00"), Decimal("150.00"))})
+
+	def test_report_is_cached_until_transactions_change(self):
+		with self.assertNumQueries(3):
+			income_expense_report(date(2026, 1, 1), date(2026, 3, 1))
+		with self.assertNumQueries(0):
+			income_expense_report(date(2026, 1, 1), date(2026, 3, 1))
+
+		Transaction.objects.create(
+			account=self.checking,
+			transaction_type=Transaction.TransactionType.INCOME,
+			amount=Decimal("5.00"),
+			category=self.salary,
+			posted_at=timezone.make_aware(datetime(2026, 2, 10, 12), timezone.get_current_timezone()),
+		)
+
+		report = income_expense_report(date(2026, 1, 1), date(2026, 3, 1))
+		self.assertEqual(report.months[1].income, Decimal("5.00"))
+
+	def test_reports_page_renders_range(self):
+		response = self.client.get(reverse("finance:reports"), {"years": 2})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(len(response.context["report"].months), 24)
+		self.assertContains(response, "By Category")
+
+
+class NetWorthTests(HouseholdTestCase):
+	def setUp(self):
+		cache.clear()
+		self.category = Category.objects.create(name="General")
+		self.checking = Account.objects.create(
+			name="Checking",
+			account_number="CHK-NW",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("1000.00"),
+		)
+		self.card = Account.objects.create(
+			name="Card",
+			account_number="CC-NW",
+			account_type=Account.AccountType.CREDIT_CARD,
+			interest_rate=Decimal("19.99"),
+			due_date=date(2026, 2, 1),
+			balance=Decimal("200.00"),
+		)
+		self.tz = timezone.get_current_timezone()
+
+	def _post(self, account, transaction_type, amount, day):
+		return Transaction.objects.create(
+			account=account,
+			transaction_type=transaction_type,
+			amount=Decimal(amount),
+			category=self.category,
+			posted_at=timezone.make_aware(datetime(day.year, day.month, day.day, 12), self.tz),
+		)
+
+	def test_series_is_anchored_on_current_balances(self):
+		"""Each day's value is today's balance minus the deltas posted after it."""
+		self._post(self.checking, Transaction.TransactionType.INCOME, "300.00", date(2026, 1, 3))
+		self._post(self.card, Transaction.TransactionType.CHARGE, "50.00", date(2026, 1, 4))
+
+		points = net_worth_series(date(2026, 1, 2), date(2026, 1, 4))
+
+		self.assertEqual(
+			[(point.assets, point.liabilities, point.net) for point in points],
+			[
+				(Decimal("700.00"), Decimal("150.00"), Decimal("550.00")),
+				(Decimal("1000.00"), Decimal("150.00"), Decimal("850.00")),
+				(Decimal("1000.00"), Decimal("200.00"), Decimal("800.00")),
+			],
+		)
+
+	def test_monthly_interval_keeps_month_ends(self):
+		points = net_worth_series(date(2026, 1, 30), date(2026, 3, 2), INTERVAL_MONTH)
+
+		self.assertEqual([point.day for point in points], [date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 2)])
+
+	def test_only_dirty_tail_is_requeried(self):
+		"""After a recent change only days from that change onwards are read again."""
+		self._post(self.checking, Transaction.TransactionType.INCOME, "300.00", date(2026, 1, 3))
+		net_worth_series(date(2026, 1, 1), date(2026, 1, 31))
+		with self.assertNumQueries(1):
+			net_worth_series(date(2026, 1, 1), date(2026, 1, 31))
+
+		late = self._post(self.checking, Transaction.TransactionType.EXPENSE, "40.00", date(2026, 1, 20))
+		with CaptureQueriesContext(connection) as queries:
+			points = net_worth_series(date(2026, 1, 1), date(2026, 1, 31))
+
+		tail_query = queries.captured_queries[0]["sql"]
+		self.assertIn("posted_at", tail_query.split("WHERE", 1)[1])
+		by_day = {point.day: point.assets for point in points}
+		self.assertEqual(by_day[date(2026, 1, 19)] - by_day[date(2026, 1, 20)], Decimal("40.00"))
+
+		late.posted_at = timezone.make_aware(datetime(2026, 1, 10, 12), self.tz)
+		late.save()
+		by_day = {point.day: point.assets for point in net_worth_series(date(2026, 1, 1), date(2026, 1, 31))}
+		self.assertEqual(by_day[date(2026, 1, 9)] - by_day[date(2026, 1, 10)], Decimal("40.00"))
+		self.assertEqual(by_day[date(2026, 1, 19)], by_day[date(2026, 1, 20)])
+
+	def test_read_racing_a_write_is_marked_stale_again_on_commit(self):
+		"""A read between the writer's mark and its commit cannot keep the pre-commit deltas."""
+		net_worth_series(date(2026, 1, 1), date(2026, 1, 31))
+
+		with self.captureOnCommitCallbacks(execute=True):
+			self._post(self.checking, Transaction.TransactionType.INCOME, "300.00", date(2026, 1, 3))
+			daily_deltas()
+			self.assertIsNone(cache.get(networth_keys()[1]))
+
+		self.assertEqual(cache.get(networth_keys()[1]), date(2026, 1, 3))
+
+	def test_evicted_epoch_does_not_revive_old_deltas(self):
+		deltas_key, _dirty_key = networth_keys()
+		cache.delete(EPOCH_KEY)
+
+		self.assertNotEqual(networth_keys()[0], deltas_key)
+
+	def test_net_worth_page_renders_chart(self):
+		response = self.client.get(reverse("finance:net-worth"), {"years": 1, "interval": "day"})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertContains(response, "<polyline")
+
+
+class ForecastTests(HouseholdTestCase):
+	def setUp(self):
+		self.category = Category.objects.create(name="General")
+		self.checking = Account.objects.create(
+			name="Checking",
+			account_number="CHK-FC",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("2000.00"),
+		)
+		self.card = Account.objects.create(
+			name="Card",
+			account_number="CC-FC",
+			account_type=Account.AccountType.CREDIT_CARD,
+			interest_rate=Decimal("24.00"),
+			due_date=date(2026, 3, 5),
+			balance=Decimal("500.00"),
+		)
+		self.today = date(2026, 4, 10)
+		self.tz = timezone.get_current_timezone()
+
+	def _post(self, memo, amount, day, transaction_type=Transaction.TransactionType.INCOME):
+		Transaction.objects.create(
+			account=self.checking,
+			transaction_type=transaction_type,
+			amount=Decimal(amount),
+			category=self.category,
+			memo=memo,
+			posted_at=timezone.make_aware(datetime(day.year, day.month, day.day, 9), self.tz),
+		)
+
+	def test_detects_monthly_and_ignores_irregular(self):
+		for month in (1, 2, 3, 4):
+			self._post("ACME Payroll", "1500.00", date(2026, month, 1))
+		for day in (date(2026, 1, 3), date(2026, 1, 9), date(2026, 3, 20)):
+			self._post("Hardware store", "42.00", day, Transaction.TransactionType.EXPENSE)
+
+		patterns = detect_recurring(self.today)
+
+		self.assertEqual([(pattern.memo, pattern.is_monthly, pattern.occurrences) for pattern in patterns], [("ACME Payroll", True, 4)])
+
+	def test_refresh_projects_patterns_due_dates_and_interest(self):
+		for offset in range(3):
+			self._post("Gym", "30.00", date(2026, 3, 6) + timedelta(days=14 * offset), Transaction.TransactionType.EXPENSE)
+
+		patterns, entries = refresh_forecast(self.today, horizon_days=30)
+
+		self.assertEqual(patterns, 1)
+		self.assertEqual(ForecastEntry.objects.count(), entries)
+		gym_days = list(
+			ForecastEntry.objects.filter(source=ForecastEntry.Source.RECURRING).values_list("due_on", flat=True)
+		)
+		self.assertEqual(gym_days, [date(2026, 4, 17), date(2026, 5, 1)])
+		due = ForecastEntry.objects.get(source=ForecastEntry.Source.DUE_DATE)
+		self.assertEqual((due.account, due.due_on, due.amount), (self.card, date(2026, 5, 5), Decimal("500.00")))
+		interest = ForecastEntry.objects.get(source=ForecastEntry.Source.INTEREST)
+		self.assertEqual((interest.due_on, interest.amount), (date(2026, 4, 30), Decimal("10.00")))
+
+	def test_forecast_view_reads_stored_entries(self):
+		refresh_forecast(self.today, horizon_days=30)
+
+		with self.assertNumQueries(1 + SESSION_QUERIES):
+			response = self.client.get(reverse("finance:forecast"))
+
+		self.assertEqual(response.status_code, 200)
+		card_forecast = response.context["forecasts"][0]
+		self.assertEqual(card_forecast["account"], self.card)
+		self.assertEqual(card_forecast["ending_balance"], Decimal("10.00"))
+
+
+class ChangeLogTests(HouseholdTestCase):
+	def setUp(self):
+		self.category = Category.objects.create(name="General")
+		self.other = Category.objects.create(name="Other")
+		self.account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-LOG",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("100.00"),
+		)
+		self.transaction = Transaction.objects.create(
+			account=self.account,
+			transaction_type=Transaction.TransactionType.EXPENSE,
+			amount=Decimal("12.50"),
+			category=self.category,
+			memo="Lunch",
+			posted_at=timezone.now().replace(second=0, microsecond=0),
+		)
+
+	def test_create_update_delete_are_logged_as_diffs(self):
+		"""Updates record only the changed fields as [old, new] pairs."""
+		transaction = Transaction.objects.get(pk=self.transaction.pk)
+		transaction.amount = Decimal("15.00")
+		transaction.save()
+		transaction.save()
+		pk = transaction.pk
+		transaction.delete()
+
+		entries = list(ChangeLog.objects.for_object(self.transaction))
+		self.assertEqual([entry.action for entry in entries], ["delete", "update", "create"])
+		self.assertEqual(entries[1].changes, {"amount": ["12.50", "15.00"]})
+		self.assertEqual(entries[2].changes["memo"], "Lunch")
+		self.assertEqual(entries[0].object_id, pk)
+
+	def test_edit_view_writes_one_entry_in_same_transaction(self):
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.post(
+				reverse("finance:transaction-update", args=[self.transaction.pk]),
+				{
+					"account": self.account.pk,
+					"transaction_type": Transaction.TransactionType.EXPENSE,
+					"amount": "12.50",
+					"category": self.category.pk,
+					"memo": "Team lunch",
+					"reference": "",
+					"posted_at": timezone.localtime(self.transaction.posted_at).strftime("%Y-%m-%dT%H:%M"),
+				},
+			)
+
+		self.assertEqual(response.status_code, 204)
+		entry = ChangeLog.objects.for_object(self.transaction).first()
+		self.assertEqual(entry.changes, {"memo": ["Lunch", "Team lunch"]})
+		inserts = [query["sql"] for query in queries.captured_queries if "finance_changelog" in query["sql"]]
+		self.assertEqual(len(inserts), 1)
+
+	def test_bulk_update_logs_changed_rows_only(self):
+		Transaction.objects.filter(pk=self.transaction.pk).set_cleared(True)
+		Transaction.objects.filter(pk=self.transaction.pk).set_cleared(True)
+
+		entries = ChangeLog.objects.for_object(self.transaction).filter(action=ChangeLog.Action.UPDATE)
+		self.assertEqual([entry.changes for entry in entries], [{"is_cleared": [False, True]}])
+
+	def test_entries_are_append_only(self):
+		entry = ChangeLog.objects.for_object(self.account).get()
+		entry.action = ChangeLog.Action.DELETE
+
+		with self.assertRaises(ValueError):
+			entry.save()
+		with self.assertRaises(ValueError):
+			entry.delete()
+
+	def test_history_view_query_count(self):
+		# One query checks the transaction is in the household, one reads its history.
+		with self.assertNumQueries(2 + SESSION_QUERIES):
+			response = self.client.get(reverse("finance:transaction-history", args=[self.transaction.pk]))
+
+		self.assertContains(response, "Created")
+
+
+class SoftDeleteTests(HouseholdTestCase):
+	def setUp(self):
+		self.category = Category.objects.create(name="General")
+		self.account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-DEL",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		self.rows = [
+			Transaction.objects.create(
+				account=self.account,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal(amount),
+				category=self.category,
+			)
+			for amount in ("5.00", "6.00", "7.00")
+		]
+
+	def test_transaction_delete_hides_row_and_offers_undo(self):
+		response = self.client.post(reverse("finance:transaction-delete", args=[self.rows[0].pk]))
+
+		self.assertEqual(response.status_code, 204)
+		undo = json.loads(response["HX-Trigger"])["showUndo"]
+		self.assertFalse(Transaction.objects.filter(pk=self.rows[0].pk).exists())
+		self.assertTrue(Transaction.all_objects.filter(pk=self.rows[0].pk).exists())
+
+		response = self.client.post(undo["url"], undo["values"])
+
+		self.assertEqual(response.status_code, 204)
+		self.assertTrue(Transaction.objects.filter(pk=self.rows[0].pk).exists())
+
+	def test_account_delete_stamps_only_the_account_and_restores_its_rows(self):
+		"""Transactions are hidden through the account at once and stamped by the worker later."""
+		soft_delete_transactions(Transaction.objects.filter(pk=self.rows[0].pk))
+
+		with CaptureQueriesContext(connection) as queries:
+			response = self.client.post(reverse("finance:account-delete", args=[self.account.pk]))
+
+		self.assertEqual(response.status_code, 204)
+		self.assertFalse(any(query["sql"].startswith('UPDATE "finance_transaction"') for query in queries))
+		self.assertFalse(Account.objects.filter(pk=self.account.pk).exists())
+		self.assertEqual(Transaction.objects.filter(account_id=self.account.pk).count(), 0)
+		self.assertEqual(Transaction.all_objects.filter(account=self.account, deleted_at__isnull=True).count(), 2)
+		self.assertNotContains(self.client.get(reverse("finance:account-list"), HTTP_HX_REQUEST="true"), "CHK-DEL")
+
+		self.assertEqual(run_pending(), 1)
+		deleted_at = Account.all_objects.get(pk=self.account.pk).deleted_at
+		self.assertEqual(Transaction.all_objects.filter(account=self.account, deleted_at=deleted_at).count(), 2)
+
+		response = self.client.post(reverse("finance:account-restore", args=[self.account.pk]))
+
+		self.assertEqual(response.status_code, 204)
+		self.assertEqual(
+			sorted(Transaction.objects.filter(account=self.account).values_list("pk", flat=True)),
+			[self.rows[1].pk, self.rows[2].pk],
+		)
+
+	def test_stamping_stops_once_the_account_is_restored(self):
+		when = soft_delete_account(self.account)
+		restore_account(Account.all_objects.get(pk=self.account.pk))
+
+		self.assertEqual(stamp_deleted_account(self.account.pk, when.isoformat()), 0)
+		self.assertEqual(Transaction.objects.filter(account=self.account).count(), 3)
+
+	def test_stamping_runs_in_batches(self):
+		when = soft_delete_account(self.account)
+		batches = []
+
+		stamped = stamp_deleted_account(self.account.pk, when, batch_size=2, progress=batches.append)
+
+		self.assertEqual(stamped, 3)
+		self.assertEqual(batches, [2, 3])
+		self.assertEqual(ChangeLog.objects.filter(model="finance.transaction", action="update").count(), 3)
+
+	def test_account_number_is_free_once_deleted(self):
+		data = {
+			"name": "Replacement",
+			"account_number": "CHK-DEL",
+			"account_type": Account.AccountType.CHECKING,
+			"routing_number": "111000025",
+			"balance": "0.00",
+		}
+		self.assertFalse(AccountForm(data).is_valid())
+
+		soft_delete_account(self.account)
+		self.assertTrue(AccountForm(data).is_valid())
+		AccountForm(data).save()
+
+		response = self.client.post(reverse("finance:account-restore", args=[self.account.pk]))
+		self.assertEqual(response.status_code, 409)
+		with self.assertRaises(ValidationError):
+			restore_account(Account.all_objects.get(pk=self.account.pk))
+
+	def test_purge_removes_old_rows_in_batches(self):
+		old = timezone.now() - timedelta(days=45)
+		soft_delete_account(self.account, when=old)
+		keep = Transaction.objects.create(
+			account=Account.objects.create(
+				name="Savings",
+				account_number="SAV-DEL",
+				account_type=Account.AccountType.SAVINGS,
+				routing_number="111000025",
+				interest_rate=Decimal("1.00"),
+				balance=Decimal("0.00"),
+			),
+			transaction_type=Transaction.TransactionType.INCOME,
+			amount=Decimal("1.00"),
+			category=self.category,
+		)
+		soft_delete_transactions(Transaction.objects.filter(pk=keep.pk))
+		batches = []
+
+		purged = purge_deleted(timedelta(days=30), batch_size=2, progress=batches.append)
+
+		self.assertEqual(purged, (3, 1))
+		self.assertEqual(batches, [2, 3])
+		self.assertFalse(Account.all_objects.filter(pk=self.account.pk).exists())
+		self.assertTrue(Transaction.all_objects.filter(pk=keep.pk).exists())
+
+
+class BackgroundTaskTests(HouseholdTestCase):
+	def setUp(self):
+		self.category = Category.objects.create(name="Groceries")
+		account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-TASK",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		self.row = Transaction.objects.create(
+			account=account,
+			transaction_type=Transaction.TransactionType.EXPENSE,
+			amount=Decimal("12.00"),
+			memo="Corner Market",
+			category=Category.objects.create(name="Uncategorized"),
+		)
+		CategorizationRule.objects.create(pattern="market", category=self.category)
+
+	def _register(self, name, func, **options):
+		task(name, **options)(func)
+		self.addCleanup(REGISTRY.pop, name, None)
+
+	def test_worker_runs_task_and_records_result_and_progress(self):
+		queued = enqueue("recategorize")
+
+		self.assertEqual(run_pending("test-worker"), 1)
+
+		queued.refresh_from_db()
+		self.assertEqual(queued.status, BackgroundTask.Status.SUCCEEDED)
+		self.assertEqual(queued.result, {"scanned": 1, "changed": 1})
+		self.assertEqual(queued.progress_done, 1)
+		self.assertEqual(queued.worker, "test-worker")
+		self.row.refresh_from_db()
+		self.assertEqual(self.row.category, self.category)
+
+	def test_failed_task_is_retried_with_backoff_then_marked_failed(self):
+		def explode(context):
+			raise RuntimeError("boom")
+
+		self._register("test_explode", explode, max_attempts=2)
+		queued = enqueue("test_explode")
+
+		run_pending()
+		queued.refresh_from_db()
+		self.assertEqual(queued.status, BackgroundTask.Status.QUEUED)
+		self.assertEqual(queued.attempts, 1)
+		self.assertGreater(queued.run_after, timezone.now())
+		self.assertIn("boom", queued.error)
+		self.assertEqual(run_pending(), 0)
+
+		BackgroundTask.objects.filter(pk=queued.pk).update(run_after=timezone.now())
+		run_pending()
+		queued.refresh_from_db()
+		self.assertEqual(queued.status, BackgroundTask.Status.FAILED)
+		self.assertEqual(queued.attempts, 2)
+		self.assertIsNotNone(queued.finished_at)
+
+	def test_concurrency_limit_and_expired_lease(self):
+		"""A running task blocks its name until it finishes or its lease runs out."""
+		running = enqueue("pair_transfers")
+		claimed = claim_next("worker-a")
+		self.assertEqual(claimed.pk, running.pk)
+		waiting = enqueue("pair_transfers")
+
+		self.assertIsNone(claim_next("worker-b"))
+
+		BackgroundTask.objects.filter(pk=running.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+		claimed = claim_next("worker-b")
+
+		self.assertEqual(claimed.pk, running.pk)
+		self.assertEqual(claimed.attempts, 2)
+		waiting.refresh_from_db()
+		self.assertEqual(waiting.status, BackgroundTask.Status.QUEUED)
+
+	def test_worker_refreshes_connections_between_tasks(self):
+		task = enqueue("pair_transfers")
+		with mock.patch("finance.management.commands.run_worker.close_old_connections") as close:
+			call_command("run_worker", "--once", stdout=StringIO())
+
+		task.refresh_from_db()
+		self.assertEqual(task.status, BackgroundTask.Status.SUCCEEDED)
+		self.assertEqual(close.call_count, 2)
+
+	def test_enqueue_view_returns_status_partial_that_polls_until_done(self):
+		response = self.client.post(reverse("finance:task-enqueue", args=["recategorize"]), HTTP_HX_REQUEST="true")
+
+		self.assertEqual(response.status_code, 202)
+		queued = BackgroundTask.objects.get()
+		status_url = reverse("finance:task-status", args=[queued.pk])
+		self.assertContains(response, status_url, status_code=202)
+		self.assertContains(response, "every 2s", status_code=202)
+
+		run_pending()
+		response = self.client.get(status_url, HTTP_HX_REQUEST="true")
+
+		self.assertNotContains(response, "every 2s")
+		self.assertIn("transactionsChanged", json.loads(response["HX-Trigger"]))
+
+	def test_enqueue_view_rejects_tasks_not_exposed_to_the_ui(self):
+		for name in ("purge_deleted", "missing"):
+			response = self.client.post(reverse("finance:task-enqueue", args=[name]))
+			self.assertEqual(response.status_code, 404)
+		self.assertFalse(BackgroundTask.objects.exists())
+
+
+class JinjaRowTemplateTests(HouseholdTestCase):
+	PARTIALS = (
+		"finance/partials/transaction_rows.html",
+		"finance/partials/account_rows.html",
+		"finance/partials/category_rows.html",
+	)
+
+	def setUp(self):
+		self.category = Category.objects.create(name="Kids' <Activities> & \"Camps\"")
+		self.checking = Account.objects.create(
+			name="O'Brien & Co <Joint>",
+			account_number="CHK-J1",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("1234567.895"),
+		)
+		self.card = Account.objects.create(
+			name="Rewards Card",
+			account_number="CC-J1",
+			account_type=Account.AccountType.CREDIT_CARD,
+			balance=Decimal("-0.004"),
+			interest_rate=Decimal("19.99"),
+			due_date=date(2026, 3, 9),
+		)
+		posted = timezone.make_aware(datetime(2026, 1, 5))
+		for hours, minutes, amount, memo in (
+			(0, 0, "0.10", "Midnight <script>"),
+			(12, 0, "1000.00", "Noon \"quoted\""),
+			(9, 5, "1234567.89", ""),
+			(23, 59, "0.01", "Trader Joe's"),
+		):
+			Transaction.objects.create(
+				account=self.checking,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal(amount),
+				category=self.category,
+				memo=memo,
+				reference="R&D" if memo else "",
+				posted_at=posted + timedelta(hours=hours, minutes=minutes),
+				is_cleared=bool(memo),
+			)
+		create_transfer(
+			from_account=self.checking,
+			to_account=self.card,
+			amount=Decimal("50.00"),
+			category=self.category,
+		)
+
+	def _contexts(self):
+		month_start = timezone.make_aware(datetime(2026, 1, 1))
+		transactions = Transaction.objects.select_related("account", "category").order_by("pk")
+		categories = Category.objects.annotate(
+			usage_count=Count("transactions"), deleted_count=Count("transactions")
+		).order_by("name")
+		return (
+			{"transactions": transactions, "selectable": True},
+			{"accounts": Account.objects.with_activity(month_start)},
+			{"categories": categories},
+		)
+
+	def test_jinja_partials_match_django_output(self):
+		transactions, accounts, categories = self._contexts()
+		cases = (
+			(self.PARTIALS[0], transactions),
+			(self.PARTIALS[0], {**transactions, "selectable": False}),
+			(self.PARTIALS[1], accounts),
+			(self.PARTIALS[2], categories),
+		)
+		for template_name, context in cases:
+			for rows in (context, {key: [] for key in context}):
+				with self.subTest(template=template_name, selectable=rows.get("selectable"), empty=not rows[next(iter(rows))]):
+					self.assertEqual(
+						render_to_string(template_name, rows, using="jinja2"),
+						render_to_string(template_name, rows, using="django"),
+					)
+
+	def test_every_row_partial_is_compared(self):
+		"""A row partial added to either engine must get a twin and a place in PARTIALS."""
+		for directory in (settings.BASE_DIR / "templates", settings.BASE_DIR / "jinja2"):
+			with self.subTest(directory=directory.name):
+				found = {
+					path.relative_to(directory).as_posix()
+					for path in directory.glob("finance/partials/*_rows.html")
+				}
+				self.assertEqual(found, set(self.PARTIALS))
+
+	def test_formatting_helpers(self):
+		self.assertEqual(money(Decimal("-1234.565")), "-1,234.57")
+		self.assertEqual(money(Decimal("-0.001")), "0.00")
+		self.assertEqual(short_time(datetime(2026, 1, 1, 13, 0)), "1 p.m.")
+		self.assertEqual(short_time(datetime(2026, 1, 1, 0, 30)), "12:30 a.m.")
+
+	def test_row_views_use_configured_engine(self):
+		url = reverse("finance:transaction-list")
+
+		with override_settings(ROW_TEMPLATE_ENGINE="jinja2"):
+			jinja = self.client.get(url, HTTP_HX_REQUEST="true")
+		with override_settings(ROW_TEMPLATE_ENGINE="django"):
+			django = self.client.get(url, HTTP_HX_REQUEST="true")
+
+		self.assertEqual(jinja.content, django.content)
+		self.assertContains(jinja, "Trader Joe&#x27;s")
+
+
+class AdminScalingTests(HouseholdTestCase):
+	def setUp(self):
+		self.client.force_login(
+			get_user_model().objects.create_superuser("admin", "admin@example.com", "password")
+		)
+		self.category = Category.objects.create(name="General")
+		self.account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-ADMIN",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		self.other = Account.objects.create(
+			name="Savings",
+			account_number="SAV-ADMIN",
+			account_type=Account.AccountType.SAVINGS,
+			routing_number="111000025",
+			interest_rate=Decimal("4.00"),
+			balance=Decimal("0.00"),
+		)
+		Transaction.objects.bulk_create(
+			Transaction(
+				account=self.account if index % 3 else self.other,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal("1.00"),
+				category=self.category,
+				memo=f"Row {index}",
+				posted_at=timezone.now() - timedelta(days=index),
+			)
+			for index in range(45)
+		)
+
+	def test_account_page_inlines_only_recent_transactions(self):
+		response = self.client.get(reverse("admin:finance_account_change", args=[self.account.pk]))
+
+		formset = response.context["inline_admin_formsets"][0].formset
+		self.assertEqual(len(formset.forms), 20)
+		self.assertEqual(formset.forms[0].instance.memo, "Row 1")
+		self.assertContains(response, f"?account__id__exact={self.account.pk}")
+
+	def test_transaction_list_filters_by_account_with_autocomplete(self):
+		url = reverse("admin:finance_transaction_changelist")
+
+		response = self.client.get(url)
+		self.assertContains(response, "admin-autocomplete")
+		self.assertContains(response, reverse("admin:autocomplete"))
+
+		response = self.client.get(url, {"account__id__exact": self.other.pk})
+		self.assertEqual(response.context["cl"].result_count, 15)
+
+	def test_unfiltered_count_uses_estimate_above_threshold(self):
+		live = Transaction.objects.all()
+		Transaction.objects.filter(memo="Row 0").update(deleted_at=timezone.now())
+
+		with mock.patch.object(EstimatedCountPaginator, "exact_below", 10):
+			with self.assertNumQueries(1):
+				estimated = EstimatedCountPaginator(live, 10).count
+			filtered = EstimatedCountPaginator(live.filter(account=self.other), 10).count
+
+		self.assertGreaterEqual(estimated, 44)
+		self.assertEqual(filtered, 14)
+		self.assertEqual(EstimatedCountPaginator(live, 10).count, 44)
+
+
+class PartitionTests(HouseholdTestCase):
+	def test_partitions_cover_local_calendar_months(self):
+		with timezone.override("America/New_York"):
+			start, end = month_bounds(date(2024, 12, 15))
+			sql = create_partition_sql(date(2024, 12, 1))
+
+		self.assertEqual(start.isoformat(), "2024-12-01T00:00:00-05:00")
+		self.assertEqual(end.isoformat(), "2025-01-01T00:00:00-05:00")
+		self.assertEqual(partition_name(date(2024, 12, 1)), "finance_transaction_p2024_12")
+		self.assertIn("FROM ('2024-12-01T00:00:00-05:00') TO ('2025-01-01T00:00:00-05:00')", sql)
+
+	@skipUnless(connection.vendor != "postgresql", "Non-PostgreSQL backends only")
+	def test_command_refuses_other_backends(self):
+		with self.assertRaisesMessage(CommandError, "needs PostgreSQL"):
+			call_command("partition_transactions", stdout=StringIO())
+
+	@skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+	def test_month_view_prunes_to_one_partition(self):
+		category = Category.objects.create(name="General")
+		account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-PART",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		old = Transaction.objects.create(
+			account=account,
+			transaction_type=Transaction.TransactionType.EXPENSE,
+			amount=Decimal("5.00"),
+			category=category,
+			posted_at=timezone.now() - timedelta(days=400),
+		)
+		call_command("partition_transactions", "--convert", stdout=StringIO())
+
+		start, end = month_bounds(timezone.localdate())
+		plan = Transaction.objects.filter(posted_at__gte=start, posted_at__lt=end).explain()
+		self.assertIn(partition_name(timezone.localdate()), plan)
+		self.assertNotIn(partition_name(timezone.localtime(old.posted_at).date()), plan)
+
+		Transaction.objects.create(
+			account=account,
+			transaction_type=Transaction.TransactionType.EXPENSE,
+			amount=Decimal("6.00"),
+			category=category,
+		)
+		self.assertEqual(Transaction.objects.count(), 2)
+
+		call_command(
+			"partition_transactions",
+			"--detach-before",
+			timezone.localdate().strftime("%Y-%m"),
+			stdout=StringIO(),
+		)
+		self.assertEqual(Transaction.objects.count(), 1)
+
+	@skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+	def test_row_estimate_sums_the_partitions(self):
+		category = Category.objects.create(name="General")
+		account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-ESTIMATE",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		call_command("partition_transactions", "--convert", stdout=StringIO())
+		for days in (0, 40, 400):
+			Transaction.objects.create(
+				account=account,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal("5.00"),
+				category=category,
+				posted_at=timezone.now() - timedelta(days=days),
+			)
+
+		with connection.cursor() as cursor:
+			cursor.execute(f"ANALYZE {Transaction._meta.db_table}")
+
+		self.assertEqual(estimated_row_count(Transaction), 3)
+
+	@skipUnless(connection.vendor == "postgresql", "PostgreSQL only")
+	def test_new_month_takes_its_rows_from_the_default_partition(self):
+		category = Category.objects.create(name="General")
+		account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-DEFAULT",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		call_command("partition_transactions", "--convert", "--months-ahead", "0", stdout=StringIO())
+		later = add_months(timezone.localdate().replace(day=1), 2)
+		Transaction.objects.create(
+			account=account,
+			transaction_type=Transaction.TransactionType.EXPENSE,
+			amount=Decimal("5.00"),
+			category=category,
+			posted_at=month_bounds(later)[0],
+		)
+
+		call_command("partition_transactions", "--months-ahead", "2", stdout=StringIO())
+
+		with connection.cursor() as cursor:
+			cursor.execute(f"SELECT COUNT(*) FROM {partition_name(later)}")
+			self.assertEqual(cursor.fetchone()[0], 1)
+			cursor.execute("SELECT COUNT(*) FROM finance_transaction_default")
+			self.assertEqual(cursor.fetchone()[0], 0)
+		self.assertEqual(Transaction.objects.count(), 1)
+
+
+class ArchiveTests(HouseholdTestCase):
+	def setUp(self):
+		cache.clear()
+		self.food = Category.objects.create(name="Food")
+		self.salary = Category.objects.create(name="Salary")
+		self.checking = Account.objects.create(
+			name="Checking",
+			account_number="CHK-ARC",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("1000.00"),
+		)
+		self.card = Account.objects.create(
+			name="Card",
+			account_number="CC-ARC",
+			account_type=Account.AccountType.CREDIT_CARD,
+			interest_rate=Decimal("19.99"),
+			due_date=date(2026, 3, 9),
+			balance=Decimal("0.00"),
+		)
+		self.tz = timezone.get_current_timezone()
+		self.year = timezone.localdate().year - 3
+		rows = [
+			(self.checking, Transaction.TransactionType.INCOME, "900.00", self.salary, 1, True),
+			(self.checking, Transaction.TransactionType.EXPENSE, "40.00", self.food, 1, True),
+			(self.checking, Transaction.TransactionType.EXPENSE, "15.00", self.food, 2, False),
+			(self.card, Transaction.TransactionType.CHARGE, "60.00", self.food, 3, True),
+		]
+		for account, transaction_type, amount, category, month, cleared in rows:
+			Transaction.objects.create(
+				account=account,
+				transaction_type=transaction_type,
+				amount=Decimal(amount),
+				category=category,
+				is_cleared=cleared,
+				posted_at=timezone.make_aware(datetime(self.year, month, 10, 12), self.tz),
+			)
+		self.recent = Transaction.objects.create(
+			account=self.checking,
+			transaction_type=Transaction.TransactionType.EXPENSE,
+			amount=Decimal("5.00"),
+			category=self.food,
+			is_cleared=True,
+		)
+
+	def test_archive_keeps_reports_and_net_worth_exact(self):
+		first, last = date(self.year, 1, 1), date(self.year, 12, 1)
+		report = income_expense_report(first, last)
+		month_ends = net_worth_series(first, date(self.year, 12, 31), INTERVAL_MONTH)
+
+		self.assertEqual(archive_transactions(self.year, batch_size=2), 3)
+
+		self.assertEqual(
+			sorted(Transaction.objects.values_list("amount", flat=True)), [Decimal("5.00"), Decimal("15.00")]
+		)
+		self.assertEqual(ArchivedTransaction.objects.count(), 3)
+		self.assertEqual(MonthlySummary.objects.count(), 3)
+		archived_report = income_expense_report(first, last)
+		self.assertEqual(
+			[(row.income, row.expense) for row in archived_report.months],
+			[(row.income, row.expense) for row in report.months],
+		)
+		self.assertEqual(
+			{row.label: row.net for row in archived_report.categories},
+			{row.label: row.net for row in report.categories},
+		)
+		self.assertEqual(net_worth_series(first, date(self.year, 12, 31), INTERVAL_MONTH), month_ends)
+
+	def test_archived_month_is_read_on_demand(self):
+		archive_transactions(self.year)
+
+		response = self.client.get(
+			reverse("finance:account-transactions", args=[self.checking.pk]),
+			{"month": f"{self.year}-01"},
+		)
+
+		self.assertContains(response, "900.00")
+		self.assertContains(response, "Archived", count=2)
+		self.assertNotContains(response, 'title="Edit"')
+
+		response = self.client.get(reverse("finance:account-list"))
+		self.assertContains(response, "4 transactions")
+
+	def test_merge_moves_archived_rows_and_summaries(self):
+		archive_transactions(self.year)
+		groceries = Category.objects.create(name="Groceries")
+
+		response = self.client.post(reverse("finance:category-merge", args=[self.food.pk]), {"target": groceries.pk})
+
+		self.assertEqual(response.status_code, 204)
+		self.assertEqual(ArchivedTransaction.objects.filter(category=groceries).count(), 2)
+		self.assertEqual(
+			sorted(MonthlySummary.objects.filter(category=groceries).values_list("total", flat=True)),
+			[Decimal("40.00"), Decimal("60.00")],
+		)
+
+	def test_open_year_cannot_be_archived(self):
+		with self.assertRaisesMessage(CommandError, "closed years"):
+			call_command("archive_transactions", "--through-year", str(timezone.localdate().year), stdout=StringIO())
+
+
+class SyncTests(HouseholdTestCase):
+	def setUp(self):
+		self.category = Category.objects.create(name="General")
+		self.account = Account.objects.create(
+			name="Checking",
+			account_number="CHK-SYNC",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		self.rows = [
+			Transaction.objects.create(
+				account=self.account,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal(amount),
+				category=self.category,
+			)
+			for amount in ("5.00", "6.00", "7.00")
+		]
+
+	def sync(self, cursor="", **params):
+		with self.settings(SYNC_SETTLE_SECONDS=0):
+			response = self.client.get(reverse("finance:sync"), {"cursor": cursor, **params})
+		self.assertEqual(response.status_code, 200)
+		return response.json()
+
+	def test_follow_up_sync_returns_only_changed_rows(self):
+		first = self.sync()
+
+		self.assertFalse(first["reset"])
+		self.assertFalse(first["has_more"])
+		self.assertEqual([row["id"] for row in first["transactions"]["updated"]], [row.pk for row in self.rows])
+		self.assertEqual(first["transactions"]["updated"][0]["amount"], "5.00")
+		self.assertIn(self.category.pk, [row["id"] for row in first["categories"]["updated"]])
+
+		idle = self.sync(first["cursor"])
+		self.assertEqual(idle["transactions"], {"updated": [], "deleted": []})
+		self.assertEqual(idle["categories"], {"updated": [], "deleted": []})
+
+		self.rows[1].memo = "Groceries"
+		self.rows[1].save()
+		changed = self.sync(idle["cursor"])
+
+		self.assertEqual([row["memo"] for row in changed["transactions"]["updated"]], ["Groceries"])
+		self.assertEqual(changed["categories"]["updated"], [])
+
+	def test_limit_pages_through_rows_sharing_a_timestamp(self):
+		stamp = timezone.now() - timedelta(minutes=1)
+		Transaction.all_objects.update(updated_at=stamp)
+
+		first = self.sync(limit=2)
+		rest = self.sync(first["cursor"], limit=2)
+
+		self.assertTrue(first["has_more"])
+		self.assertFalse(rest["has_more"])
+		seen = [row["id"] for page in (first, rest) for row in page["transactions"]["updated"]]
+		self.assertEqual(seen, [row.pk for row in self.rows])
+
+	def test_deletions_are_reported_once(self):
+		cursor = self.sync()["cursor"]
+
+		deleted_ids = [self.rows[0].pk, self.rows[1].pk]
+		soft_delete_transactions(Transaction.objects.filter(pk=self.rows[0].pk))
+		self.rows[1].delete()
+		spare = Category.objects.create(name="Spare")
+		spare_id = spare.pk
+		spare.delete()
+		changes = self.sync(cursor)
+
+		self.assertEqual(changes["transactions"]["updated"], [])
+		self.assertEqual(sorted(changes["transactions"]["deleted"]), deleted_ids)
+		self.assertEqual(changes["categories"]["deleted"], [spare_id])
+		self.assertEqual(self.sync(changes["cursor"])["transactions"]["deleted"], [])
+
+	def test_purge_and_account_cascade_leave_tombstones(self):
+		cursor = self.sync()["cursor"]
+		ids = [row.pk for row in self.rows]
+		soft_delete_transactions(
+			Transaction.objects.filter(pk=self.rows[0].pk),
+			when=timezone.now() - timedelta(days=60),
+		)
+		purge_deleted()
+		self.account.delete()
+
+		self.assertEqual(
+			sorted(Tombstone.objects.filter(model="finance.transaction").values_list("object_id", flat=True)),
+			ids,
+		)
+		self.assertEqual(sorted(set(self.sync(cursor)["transactions"]["deleted"])), ids)
+
+	def test_recent_writes_wait_out_the_settle_lag(self):
+		now = timezone.now()
+
+		page = sync_changes(now=now)
+		self.assertEqual(page["transactions"]["updated"], [])
+
+		later = sync_changes(page["cursor"], now=now + timedelta(seconds=settings.SYNC_SETTLE_SECONDS + 1))
+		self.assertEqual(len(later["transactions"]["updated"]), 3)
+
+	def test_cursor_older_than_tombstone_retention_resets(self):
+		stale_at = timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1)
+		cursor = encode_cursor(
+			{
+				"at": stale_at,
+				"transactions": (stale_at, 0),
+				"categories": (stale_at, 0),
+				"tombstones": (stale_at, 0),
+			}
+		)
+		changes = self.sync(cursor)
+
+		self.assertTrue(changes["reset"])
+		self.assertEqual(len(changes["transactions"]["updated"]), 3)
+
+	def test_bad_cursor_or_limit_is_rejected(self):
+		self.assertEqual(self.client.get(reverse("finance:sync"), {"cursor": "not-a-cursor"}).status_code, 400)
+		self.assertEqual(self.client.get(reverse("finance:sync"), {"limit": "all"}).status_code, 400)
+
+	def test_purge_prunes_expired_tombstones(self):
+		Tombstone.objects.create(
+			model="finance.transaction",
+			object_id=999,
+			deleted_at=timezone.now() - TOMBSTONE_RETENTION - timedelta(days=1),
+		)
+		Tombstone.objects.create(model="finance.transaction", object_id=998)
+
+		purge_deleted()
+
+		self.assertEqual(list(Tombstone.objects.values_list("object_id", flat=True)), [998])
+
+
+class TenancyTests(HouseholdTestCase):
+	def setUp(self):
+		cache.clear()
+		self.account = Account.objects.create(
+			name="Ours",
+			account_number="SHARED-1",
+			account_type=Account.AccountType.CHECKING,
+			routing_number="111000025",
+			balance=Decimal("0.00"),
+		)
+		self.other = Household.objects.create(name="Neighbours")
+		with tenancy.activate(self.other):
+			self.other_account = Account.objects.create(
+				name="Theirs",
+				account_number="SHARED-1",
+				account_type=Account.AccountType.CHECKING,
+				routing_number="111000025",
+				balance=Decimal("0.00"),
+			)
+			self.other_category = Category.objects.create(name="Theirs")
+			Transaction.objects.create(
+				account=self.other_account,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal("9.00"),
+				category=self.other_category,
+				posted_at=timezone.now(),
+			)
+
+	def test_managers_only_see_the_active_household(self):
+		self.assertEqual(list(Account.objects.all()), [self.account])
+		self.assertFalse(Category.objects.filter(pk=self.other_category.pk).exists())
+		self.assertFalse(Transaction.all_objects.filter(account=self.other_account).exists())
+		self.assertEqual(self.other_account.household, self.other)
+		with tenancy.activate(tenancy.UNSCOPED):
+			self.assertEqual(Account.objects.filter(account_number="SHARED-1").count(), 2)
+
+	def test_transactions_take_their_accounts_household(self):
+		with tenancy.activate(tenancy.UNSCOPED):
+			moved = Transaction.objects.get(account=self.other_account)
+			self.assertEqual(moved.household, self.other)
+			moved.account = self.account
+			moved.save()
+
+		self.assertEqual(Transaction.objects.get().household_id, self.household.pk)
+
+	def test_unscoped_recategorize_keeps_rules_in_their_household(self):
+		groceries = Category.objects.create(name="Groceries")
+		CategorizationRule.objects.create(name="Market", category=groceries, pattern="market")
+		with tenancy.activate(self.other):
+			theirs = Transaction.objects.create(
+				account=self.other_account,
+				transaction_type=Transaction.TransactionType.EXPENSE,
+				amount=Decimal("4.00"),
+				category=self.other_category,
+				memo="Corner market",
+			)
+
+		with tenancy.activate(tenancy.UNSCOPED):
+			call_command("recategorize", stdout=StringIO())
+			self.assertFalse(Transaction.objects.exclude(category__household=F("household")).exists())
+		theirs.refresh_from_db()
+		self.assertEqual(theirs.category, self.other_category)
+
+	def test_recategorize_needs_a_household_for_a_shared_slug(self):
+		Category.objects.create(name="Theirs")
+		with tenancy.activate(tenancy.UNSCOPED):
+			with self.assertRaisesMessage(CommandError, "--only-category needs --household"):
+				call_command("recategorize", only_category="theirs", stdout=StringIO())
+			call_command("recategorize", only_category="theirs", household=self.other.pk, stdout=StringIO())
+
+	def test_unscoped_pairing_keeps_transfers_in_their_household(self):
+		legs = [
+			Transaction.objects.create(
+				account=self.account,
+				transaction_type=Transaction.TransactionType.TRANSFER,
+				amount=Decimal("60.00"),
+				category=Category.objects.create(name="Transfers"),
+			)
+		]
+		with tenancy.activate(self.other):
+			legs.append(
+				Transaction.objects.create(
+					account=self.other_account,
+					transaction_type=Transaction.TransactionType.TRANSFER,
+					amount=Decimal("60.00"),
+					category=self.other_category,
+				)
+			)
+
+		with tenancy.activate(tenancy.UNSCOPED):
+			call_command("pair_transfers", stdout=StringIO())
+			self.assertFalse(Transaction.objects.filter(pk__in=[leg.pk for leg in legs], transfer_id__isnull=False).exists())
+
+	def test_other_households_pages_are_not_found(self):
+		response = self.client.get(reverse("finance:account-list"), HTTP_HX_REQUEST="true")
+		self.assertContains(response, "Ours")
+		self.assertNotContains(response, "Theirs")
+		response = self.client.get(reverse("finance:account-transactions", args=[self.other_account.pk]))
+		self.assertEqual(response.status_code, 404)
+
+	def test_forms_reject_other_households_rows(self):
+		form = TransactionForm()
+		self.assertNotIn(self.other_account, form.fields["account"].queryset)
+		self.assertNotIn(self.other_category, form.fields["category"].queryset)
+
+		response = self.client.post(
+			reverse("finance:transaction-create"),
+			{
+				"account": self.other_account.pk,
+				"transaction_type": Transaction.TransactionType.EXPENSE,
+				"amount": "5.00",
+				"category": self.other_category.pk,
+				"posted_at": "2026-01-05T09:00",
+			},
+		)
+
+		errors = response.context["form"].errors
+		self.assertIn("account", errors)
+		self.assertIn("category", errors)
+		with tenancy.activate(self.other):
+			self.assertEqual(Transaction.objects.count(), 1)
+
+	def test_anonymous_users_are_sent_to_login(self):
+		self.client.logout()
+		response = self.client.get(reverse("finance:account-list"))
+		self.assertRedirects(response, f"{reverse('login')}?next={reverse('finance:account-list')}")
+
+	def test_users_without_a_household_are_refused(self):
+		self.client.force_login(get_user_model().objects.create_user(username="stranger"))
+		response = self.client.get(reverse("finance:account-list"))
+		self.assertEqual(response.status_code, 403)
+
+	def test_cached_values_are_kept_per_household(self):
+		finance_cache.set("report", "ours", [finance_cache.ACCOUNTS])
+		with tenancy.activate(self.other):
+			self.assertIsNone(finance_cache.get("report", [finance_cache.ACCOUNTS]))
+			finance_cache.set("report", "theirs", [finance_cache.ACCOUNTS])
+			finance_cache.invalidate(finance_cache.ACCOUNTS)
+		self.assertEqual(finance_cache.get("report", [finance_cache.ACCOUNTS]), "ours")
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTests(SimpleTestCase):
+	def setUp(self):
+		self.router = PrimaryReplicaRouter()
+		self.factory = RequestFactory()
+
+	def _read_alias_during(self, request):
+		seen = {}
+
+		def view(request):
+			seen["alias"] = self.router.db_for_read(Transaction)
+			return HttpResponse(status=204)
+
+		response = ReplicaReadsMiddleware(view)(request)
+		return seen["alias"], response
+
+	def test_reads_outside_requests_stay_on_primary(self):
+		self.assertEqual(self.router.db_for_read(Transaction), "default")
+		with replica_reads():
+			self.assertEqual(self.router.db_for_read(Transaction), "replica1")
+			self.assertEqual(self.router.db_for_write(Transaction), "default")
+		self.assertTrue(self.router.allow_migrate("default", "finance"))
+		self.assertFalse(self.router.allow_migrate("replica1", "finance"))
+
+	def test_get_reads_from_replica_and_post_pins_primary(self):
+		alias, _ = self._read_alias_during(self.factory.get("/finance/transactions/"))
+		self.assertEqual(alias, "replica1")
+
+		alias, response = self._read_alias_during(self.factory.post("/finance/transactions/1/delete/"))
+		self.assertEqual(alias, "default")
+		self.assertEqual(response.cookies[STICKY_COOKIE]["max-age"], 10)
+
+		refetch = self.factory.get("/finance/transactions/")
+		refetch.COOKIES[STICKY_COOKIE] = response.cookies[STICKY_COOKIE].value
+		alias, _ = self._read_alias_during(refetch)
+		self.assertEqual(alias, "default")
+
+	@override_settings(DATABASE_REPLICAS=[])
+	def test_without_replicas_everything_uses_primary(self):
+		alias, response = self._read_alias_during(self.factory.post("/finance/transactions/1/delete/"))
+
+		self.assertEqual(alias, "default")
+		self.assertNotIn(STICKY_COOKIE, response.cookies)
+
+	def test_cached_values_are_computed_on_primary(self):
+		cache.clear()
+		with replica_reads():
+			alias = finance_cache.get_or_set(
+				"routing", lambda: self.router.db_for_read(Transaction), [finance_cache.TRANSACTIONS]
+			)
+			self.assertEqual(self.router.db_for_read(Transaction), "replica1")
+		self.assertEqual(alias, "default")
+
+	def test_sync_reads_from_primary(self):
+		def changes(*args, **kwargs):
+			return {"alias": self.router.db_for_read(Transaction)}
+
+		with mock.patch("finance.views.sync_changes", changes):
+			response = ReplicaReadsMiddleware(SyncView.as_view())(self.factory.get("/finance/sync/"))
+
+		self.assertEqual(json.loads(response.content), {"alias": "default"})
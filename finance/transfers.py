@@ -0,0 +1,215 @@
+"""Transfers between accounts.
+
+A transfer is stored as two linked legs that share a ``transfer_id``: the
+outgoing leg on the source account and the incoming leg on the destination.
+Credit card and loan accounts only accept charges and payments, so their legs
+use those types instead of ``TRANSFER``.
+
+Creating a transfer moves both balances. The legs are deleted and restored
+together, which moves the balances back and forth again (see
+``finance.deletion``). Their account, type, amount and posting time cannot be
+edited; delete the transfer and create a new one instead.
+"""
+
+import uuid
+from collections import deque
+from datetime import timedelta
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import F, Min, Q, Sum
+from django.utils import timezone
+
+from . import cache as finance_cache
+from . import networth
+from .models import Account, ChangeLog, Transaction
+
+CREDIT_ACCOUNT_TYPES = (Account.AccountType.CREDIT_CARD, Account.AccountType.LOAN)
+DEFAULT_PAIRING_WINDOW = timedelta(days=3)
+
+
+def _leg_type(account, direction):
+    if account.account_type in CREDIT_ACCOUNT_TYPES:
+        if direction == Transaction.TransferDirection.OUT:
+            return Transaction.TransactionType.CHARGE
+        return Transaction.TransactionType.PAYMENT
+    return Transaction.TransactionType.TRANSFER
+
+
+def create_transfer(
+    *,
+    from_account,
+    to_account,
+    amount,
+    category,
+    posted_at=None,
+    memo="",
+    reference="",
+    is_cleared=False,
+):
+    """Create both legs of a transfer and move the balances atomically.
+
+    Returns ``(outgoing_leg, incoming_leg)``.
+    """
+    transfer_id = uuid.uuid4()
+    posted_at = posted_at or timezone.now()
+    legs = [
+        Transaction(
+            account=account,
+            transaction_type=_leg_type(account, direction),
+            amount=amount,
+            category=category,
+            memo=memo,
+            reference=reference,
+            posted_at=posted_at,
+            is_cleared=is_cleared,
+            transfer_id=transfer_id,
+            transfer_direction=direction,
+        )
+        for account, direction in (
+            (from_account, Transaction.TransferDirection.OUT),
+            (to_account, Transaction.TransferDirection.IN),
+        )
+    ]
+    with transaction.atomic():
+        _shift_balances({leg.account_id: leg.signed_amount for leg in legs})
+        for leg in legs:
+            leg.save()
+            leg.account.refresh_from_db(fields=["balance"])
+    return legs[0], legs[1]
+
+
+def _shift_balances(deltas):
+    """Add ``{account_id: amount}`` to the account balances, logging each change."""
+    # Lock balances in a stable order so concurrent transfers cannot deadlock.
+    for account_id in sorted(deltas):
+        Account.objects.filter(pk=account_id).update(balance=F("balance") + deltas[account_id])
+    balances = dict(Account.objects.filter(pk__in=deltas).values_list("pk", "balance"))
+    for account_id in sorted(balances):
+        ChangeLog.objects.create(
+            model=ChangeLog.objects.label_for(Account),
+            object_id=account_id,
+            action=ChangeLog.Action.UPDATE,
+            changes={"balance": [balances[account_id] - deltas[account_id], balances[account_id]]},
+        )
+    if deltas:
+        finance_cache.invalidate(finance_cache.ACCOUNTS)
+
+
+def with_partner_legs(queryset, candidates):
+    """``queryset`` plus the rows of ``candidates`` that share a transfer with it."""
+    transfer_ids = queryset.filter(transfer_id__isnull=False).values("transfer_id")
+    return candidates.filter(Q(pk__in=queryset.values("pk")) | Q(transfer_id__in=transfer_ids))
+
+
+def shift_transfer_balances(queryset, sign):
+    """Apply (``sign=1``) or reverse (``sign=-1``) the balance moves of the transfer legs in ``queryset``."""
+    totals = (
+        queryset.filter(transfer_id__isnull=False)
+        .values("account_id")
+        .annotate(total=Sum(Transaction.signed_amount_expression()))
+        .order_by()
+    )
+    _shift_balances({row["account_id"]: sign * row["total"] for row in totals})
+
+
+def _compatible(left, right):
+    if left["household_id"] != right["household_id"] or left["account_id"] == right["account_id"]:
+        return False
+    directions = (left["transfer_direction"], right["transfer_direction"])
+    return not (all(directions) and directions[0] == directions[1])
+
+
+def _outgoing_first(earlier, later):
+    if (
+        earlier["transfer_direction"] == Transaction.TransferDirection.IN
+        or later["transfer_direction"] == Transaction.TransferDirection.OUT
+    ):
+        return later, earlier
+    return earlier, later
+
+
+def find_transfer_pairs(rows, window=DEFAULT_PAIRING_WINDOW):
+    """Pair unlinked transfer rows by amount and posting time with a sort-merge pass.
+
+    ``rows`` must be ordered by ``(household_id, amount, posted_at)``. Within
+    each household and amount run a sliding window of unmatched rows is kept;
+    every new row is paired with the oldest compatible row (same household,
+    different account, opposite or unknown direction) posted no more than
+    ``window`` earlier. Returns a list of
+    ``(outgoing_pk, incoming_pk)`` tuples. A leg's own direction wins; when
+    neither leg has one, the earlier leg is taken as the outgoing one.
+    """
+    pairs = []
+    for _key, run in groupby(rows, key=lambda row: (row["household_id"], row["amount"])):
+        pending = deque()
+        for row in run:
+            while pending and row["posted_at"] - pending[0]["posted_at"] > window:
+                pending.popleft()
+            match = next((candidate for candidate in pending if _compatible(candidate, row)), None)
+            if match is None:
+                pending.append(row)
+                continue
+            pending.remove(match)
+            outgoing, incoming = _outgoing_first(match, row)
+            pairs.append((outgoing["pk"], incoming["pk"]))
+    return pairs
+
+
+def pair_unlinked_transfers(window=DEFAULT_PAIRING_WINDOW, *, dry_run=False, batch_size=500):
+    """Link existing unpaired ``TRANSFER`` rows and set their directions; returns the number of pairs found."""
+    rows = (
+        Transaction.objects.filter(
+            transaction_type=Transaction.TransactionType.TRANSFER,
+            transfer_id__isnull=True,
+        )
+        .order_by("household_id", "amount", "posted_at", "pk")
+        .values("pk", "household_id", "account_id", "amount", "posted_at", "transfer_direction")
+        .iterator(chunk_size=2000)
+    )
+    pairs = find_transfer_pairs(rows, window)
+    if dry_run or not pairs:
+        return len(pairs)
+
+    now = timezone.now()
+    updates = []
+    for outgoing, incoming in pairs:
+        transfer_id = uuid.uuid4()
+        updates.extend(
+            Transaction(pk=pk, transfer_id=transfer_id, transfer_direction=direction, updated_at=now)
+            for pk, direction in (
+                (outgoing, Transaction.TransferDirection.OUT),
+                (incoming, Transaction.TransferDirection.IN),
+            )
+        )
+    directions = dict(
+        Transaction.objects.filter(pk__in=[update.pk for update in updates]).values_list("pk", "transfer_direction")
+    )
+    with transaction.atomic():
+        ChangeLog.objects.bulk_create(
+            (
+                ChangeLog(
+                    model=ChangeLog.objects.label_for(Transaction),
+                    object_id=update.pk,
+                    action=ChangeLog.Action.UPDATE,
+                    changes={
+                        "transfer_id": [None, update.transfer_id],
+                        "transfer_direction": [directions[update.pk], update.transfer_direction],
+                    },
+                    changed_at=now,
+                )
+                for update in updates
+            ),
+            batch_size=batch_size,
+        )
+        Transaction.objects.bulk_update(
+            updates, ["transfer_id", "transfer_direction", "updated_at"], batch_size=batch_size
+        )
+        # An outgoing leg now counts against its account's history.
+        networth.mark_dirty_at(
+            Transaction.objects.filter(pk__in=[outgoing for outgoing, _incoming in pairs]).aggregate(
+                earliest=Min("posted_at")
+            )["earliest"]
+        )
+    finance_cache.invalidate(finance_cache.TRANSACTIONS)
+    return len(pairs)
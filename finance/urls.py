@@ -1,20 +1,36 @@
 from django.urls import path
 
+from .models import Account, Transaction
 from .views import (
     AccountCreateView,
     AccountDeleteView,
     AccountDetailView,
     AccountListView,
+    AccountRestoreView,
     AccountTransactionTableView,
     AccountUpdateView,
     CategoryCreateView,
     CategoryDeleteView,
     CategoryListView,
+    CategoryMergeView,
     CategoryUpdateView,
+    ChangeHistoryView,
+    ForecastView,
+    NetWorthView,
+    ReconcileBulkView,
+    ReconcileView,
+    ReportsView,
+    SyncView,
+    TaskEnqueueView,
+    TaskStatusView,
+    TransactionBulkActionView,
     TransactionCreateView,
     TransactionDeleteView,
     TransactionListView,
+    TransactionRestoreView,
     TransactionUpdateView,
+    TransferCreateView,
+    UpcomingDueView,
 )
 
 app_name = "finance"
@@ -25,17 +41,41 @@ urlpatterns = [
     path("accounts/add/", AccountCreateView.as_view(), name="account-create"),
     path("accounts/<int:pk>/edit/", AccountUpdateView.as_view(), name="account-update"),
     path("accounts/<int:pk>/delete/", AccountDeleteView.as_view(), name="account-delete"),
+    path("accounts/<int:pk>/restore/", AccountRestoreView.as_view(), name="account-restore"),
     path(
         "accounts/<int:pk>/transactions/",
         AccountTransactionTableView.as_view(),
         name="account-transactions",
     ),
+    path("accounts/<int:pk>/reconcile/", ReconcileView.as_view(), name="account-reconcile"),
+    path("accounts/<int:pk>/history/", ChangeHistoryView.as_view(model=Account), name="account-history"),
+    path(
+        "accounts/<int:pk>/reconcile/bulk/",
+        ReconcileBulkView.as_view(),
+        name="account-reconcile-bulk",
+    ),
     path("categories/", CategoryListView.as_view(), name="category-list"),
     path("categories/add/", CategoryCreateView.as_view(), name="category-create"),
     path("categories/<int:pk>/edit/", CategoryUpdateView.as_view(), name="category-update"),
     path("categories/<int:pk>/delete/", CategoryDeleteView.as_view(), name="category-delete"),
+    path("categories/<int:pk>/merge/", CategoryMergeView.as_view(), name="category-merge"),
     path("transactions/", TransactionListView.as_view(), name="transaction-list"),
+    path("transactions/bulk/", TransactionBulkActionView.as_view(), name="transaction-bulk"),
     path("transactions/add/", TransactionCreateView.as_view(), name="transaction-create"),
+    path("transactions/restore/", TransactionRestoreView.as_view(), name="transaction-restore"),
     path("transactions/<int:pk>/edit/", TransactionUpdateView.as_view(), name="transaction-update"),
     path("transactions/<int:pk>/delete/", TransactionDeleteView.as_view(), name="transaction-delete"),
+    path(
+        "transactions/<int:pk>/history/",
+        ChangeHistoryView.as_view(model=Transaction),
+        name="transaction-history",
+    ),
+    path("transfers/add/", TransferCreateView.as_view(), name="transfer-create"),
+    path("reports/", ReportsView.as_view(), name="reports"),
+    path("reports/net-worth/", NetWorthView.as_view(), name="net-worth"),
+    path("reports/forecast/", ForecastView.as_view(), name="forecast"),
+    path("tasks/<slug:name>/run/", TaskEnqueueView.as_view(), name="task-enqueue"),
+    path("tasks/<int:pk>/", TaskStatusView.as_view(), name="task-status"),
+    path("sync/", SyncView.as_view(), name="sync"),
+    path("dashboard/upcoming-due/", UpcomingDueView.as_view(), name="upcoming-due"),
 ]
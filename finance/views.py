@@ -1,16 +1,46 @@
 import json
 from calendar import monthrange
 from datetime import date, datetime, time
+from decimal import Decimal
 
-from django.http import HttpResponse
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, render
+from django.template.defaultfilters import pluralize
 from django.urls import reverse
 from django.utils import timezone
 from django.views import View
-from django.db.models import ProtectedError
-
-from .forms import AccountForm, CategoryForm, TransactionForm
-from .models import Account, Category, Transaction
+from django.db.models import Count, ProtectedError, Q
+
+from household.db_routing import replica_reads
+
+from . import cache as finance_cache
+from .archive import archived_between
+from .dashboard import parse_due_window, upcoming_due_accounts
+from .deletion import restore_account, restore_transactions, soft_delete_account, soft_delete_transactions
+from .forms import (
+	AccountForm,
+	CategoryForm,
+	CategoryMergeForm,
+	ReconcileBulkForm,
+	ReconcileForm,
+	TransactionBulkForm,
+	TransactionForm,
+	TransactionRestoreForm,
+	TransferForm,
+)
+from .models import Account, BackgroundTask, Category, ChangeLog, ForecastEntry, Transaction
+from .networth import INTERVAL_DAY, INTERVAL_MONTH, chart_points, current_totals, net_worth_series
+from .reports import RANGE_YEARS, income_expense_report, parse_range_years, range_for_years
+from .sync import DEFAULT_LIMIT, MAX_LIMIT, InvalidCursor, sync_changes
+from .tasks import REGISTRY, enqueue
+from .transfers import with_partner_legs
+
+
+def render_rows(request, template_name, context):
+	"""Render a row partial with the engine named by ``settings.ROW_TEMPLATE_ENGINE``."""
+	return render(request, template_name, context, using=settings.ROW_TEMPLATE_ENGINE)
 
 
 class AccountListView(View):
@@ -18,10 +48,14 @@ class AccountListView(View):
 	partial_name = "finance/partials/account_rows.html"
 
 	def get(self, request, *args, **kwargs):
-		accounts = Account.objects.all()
+		month_start = timezone.make_aware(
+			datetime.combine(timezone.localdate().replace(day=1), time.min),
+			timezone.get_current_timezone(),
+		)
+		accounts = Account.objects.with_activity(month_start)
 		context = {"accounts": accounts}
 		if request.htmx:
-			return render(request, self.partial_name, context)
+			return render_rows(request, self.partial_name, context)
 		return render(request, self.template_name, context)
 
 
@@ -102,9 +136,31 @@ class AccountDeleteView(View):
 
 	def post(self, request, pk, *args, **kwargs):
 		account = self.get_object(pk)
-		account.delete()
+		soft_delete_account(account)
+		payload = {
+			"accountsChanged": {},
+			"closeAccountModal": {},
+			"showUndo": {
+				"message": f"Deleted {account.name}.",
+				"url": reverse("finance:account-restore", args=[account.pk]),
+			},
+		}
 		response = HttpResponse(status=204)
-		response["HX-Trigger"] = "{\"accountsChanged\": {}, \"closeAccountModal\": {}}"
+		response["HX-Trigger"] = json.dumps(payload)
+		return response
+
+
+class AccountRestoreView(View):
+	def post(self, request, pk, *args, **kwargs):
+		account = get_object_or_404(Account.all_objects.filter(deleted_at__isnull=False), pk=pk)
+		try:
+			restore_account(account)
+		except ValidationError as exc:
+			return HttpResponse(" ".join(exc.messages), status=409)
+		response = HttpResponse(status=204)
+		response["HX-Trigger"] = json.dumps(
+			{"accountsChanged": {}, "transactionsChanged": {"accounts": [account.pk]}}
+		)
 		return response
 
 
@@ -113,10 +169,14 @@ class CategoryListView(View):
 	partial_name = "finance/partials/category_rows.html"
 
 	def get(self, request, *args, **kwargs):
-		categories = Category.objects.order_by("name")
+		categories = Category.objects.annotate(
+			usage_count=Count("transactions", filter=Q(transactions__deleted_at__isnull=True)),
+			# Deleted rows can still be restored, so they keep the category from being deleted.
+			deleted_count=Count("transactions", filter=Q(transactions__deleted_at__isnull=False)),
+		).order_by("name")
 		context = {"categories": categories}
 		if request.htmx:
-			return render(request, self.partial_name, context)
+			return render_rows(request, self.partial_name, context)
 		return render(request, self.template_name, context)
 
 
@@ -251,10 +311,18 @@ class CategoryDeleteView(View):
 		try:
 			category.delete()
 		except ProtectedError:
+			error = "Cannot delete a category while it is used by transactions."
+			in_category = Transaction.all_objects.filter(category=category)
+			if in_category.exists() and not in_category.filter(deleted_at__isnull=True).exists():
+				error = (
+					"Cannot delete a category while deleted transactions that can still be restored use it. "
+					"Merging moves them too."
+				)
 			context = {
 				"category": category,
 				"action": reverse("finance:category-delete", args=[category.pk]),
-				"error": "Cannot delete a category while it is used by transactions.",
+				"error": error,
+				"merge_url": reverse("finance:category-merge", args=[category.pk]),
 				"target": "#modal-body",
 			}
 			return render(request, self.template_name, context, status=400)
@@ -267,6 +335,44 @@ class CategoryDeleteView(View):
 		return response
 
 
+class CategoryMergeView(View):
+	form_class = CategoryMergeForm
+	template_name = "finance/partials/category_merge.html"
+
+	def get_object(self, pk):
+		return get_object_or_404(Category, pk=pk)
+
+	def _context(self, category, form):
+		return {
+			"category": category,
+			"form": form,
+			# Deleted transactions move too, so a later restore finds its category.
+			"usage_count": Transaction.all_objects.filter(category=category).count(),
+			"action": reverse("finance:category-merge", args=[category.pk]),
+		}
+
+	def get(self, request, pk, *args, **kwargs):
+		category = self.get_object(pk)
+		form = self.form_class(source=category)
+		return render(request, self.template_name, self._context(category, form))
+
+	def post(self, request, pk, *args, **kwargs):
+		category = self.get_object(pk)
+		form = self.form_class(request.POST, source=category)
+		if form.is_valid():
+			source_id = category.pk
+			target, _moved = form.save()
+			payload = {
+				"categoriesChanged": {"action": "deleted", "id": source_id, "mergedInto": target.id},
+				"transactionsChanged": {"accounts": []},
+				"closeAccountModal": {},
+			}
+			response = HttpResponse(status=204)
+			response["HX-Trigger"] = json.dumps(payload)
+			return response
+		return render(request, self.template_name, self._context(category, form), status=400)
+
+
 class AccountDetailView(View):
 	template_name = "finance/account_detail.html"
 
@@ -332,6 +438,9 @@ class AccountTransactionTableView(View):
 			.filter(account=account, posted_at__range=(start_dt, end_dt))
 			.order_by("-posted_at", "-id")
 		)
+		archived = archived_between(account, start_dt, end_dt)
+		if archived:
+			transactions = sorted([*transactions, *archived], key=lambda row: (row.posted_at, row.pk), reverse=True)
 		context = {
 			"account": account,
 			"transactions": transactions,
@@ -360,14 +469,65 @@ class TransactionListView(View):
 		transactions, selected_account = self.get_queryset(request)
 		context = {
 			"transactions": transactions,
-			"accounts": Account.objects.all(),
 			"selected_account": selected_account or "",
+			"selectable": True,
 		}
 		if request.htmx:
-			return render(request, self.partial_name, context)
+			return render_rows(request, self.partial_name, context)
+		context.update(
+			{
+				"accounts": finance_cache.get_or_set(
+					"account-choices",
+					lambda: list(Account.objects.only("id", "name")),
+					[finance_cache.ACCOUNTS],
+				),
+				"categories": finance_cache.get_or_set(
+					"active-category-choices",
+					lambda: list(Category.objects.filter(is_active=True).only("id", "name")),
+					[finance_cache.CATEGORIES],
+				),
+				"bulk_actions": TransactionBulkForm.base_fields["action"].choices,
+			}
+		)
 		return render(request, self.template_name, context)
 
 
+class TransactionBulkActionView(View):
+	error_template_name = "finance/partials/transaction_bulk_errors.html"
+
+	def post(self, request, *args, **kwargs):
+		form = TransactionBulkForm(request.POST)
+		if not form.is_valid():
+			return render(request, self.error_template_name, {"form": form}, status=400)
+		account_ids = form.save()
+		payload = {"transactionsChanged": {"accounts": account_ids}}
+		if form.cleaned_data["action"] == TransactionBulkForm.ACTION_DELETE:
+			count = len(form.cleaned_data["ids"])
+			payload["showUndo"] = {
+				"message": f"Deleted {count} transaction{pluralize(count)}.",
+				"url": reverse("finance:transaction-restore"),
+				"values": {"ids": form.cleaned_data["ids"]},
+			}
+		response = HttpResponse(status=204)
+		response["HX-Trigger"] = json.dumps(payload)
+		return response
+
+
+class TransactionRestoreView(View):
+	def post(self, request, *args, **kwargs):
+		form = TransactionRestoreForm(request.POST)
+		if not form.is_valid():
+			return HttpResponse(status=400)
+		queryset = Transaction.all_objects.filter(pk__in=form.cleaned_data["ids"])
+		account_ids = sorted(
+			set(with_partner_legs(queryset, Transaction.all_objects.all()).values_list("account_id", flat=True))
+		)
+		restore_transactions(queryset)
+		response = HttpResponse(status=204)
+		response["HX-Trigger"] = json.dumps({"transactionsChanged": {"accounts": account_ids}})
+		return response
+
+
 class TransactionCreateView(View):
 	form_class = TransactionForm
 	template_name = "finance/partials/transaction_form.html"
@@ -409,6 +569,44 @@ class TransactionCreateView(View):
 		return render(request, self.template_name, context, status=400)
 
 
+class TransferCreateView(View):
+	form_class = TransferForm
+	template_name = "finance/partials/transaction_form.html"
+
+	def get_initial(self, request):
+		initial = {}
+		account_id = request.GET.get("account")
+		if account_id:
+			initial["from_account"] = account_id
+		return initial
+
+	def _context(self, form):
+		return {
+			"form": form,
+			"title": "New Transfer",
+			"action": reverse("finance:transfer-create"),
+		}
+
+	def get(self, request, *args, **kwargs):
+		form = self.form_class(initial=self.get_initial(request))
+		return render(request, self.template_name, self._context(form))
+
+	def post(self, request, *args, **kwargs):
+		form = self.form_class(request.POST)
+		if form.is_valid():
+			outgoing, incoming = form.save()
+			response = HttpResponse(status=204)
+			response["HX-Trigger"] = json.dumps(
+				{
+					"transactionsChanged": {"accounts": [outgoing.account_id, incoming.account_id]},
+					"accountsChanged": {},
+					"closeAccountModal": {},
+				}
+			)
+			return response
+		return render(request, self.template_name, self._context(form), status=400)
+
+
 class TransactionUpdateView(View):
 	form_class = TransactionForm
 	template_name = "finance/partials/transaction_form.html"
@@ -423,6 +621,7 @@ class TransactionUpdateView(View):
 			"form": form,
 			"title": "Edit Transaction",
 			"action": reverse("finance:transaction-update", args=[transaction.pk]),
+			"history_url": reverse("finance:transaction-history", args=[transaction.pk]),
 		}
 		return render(request, self.template_name, context)
 
@@ -446,6 +645,7 @@ class TransactionUpdateView(View):
 			"form": form,
 			"title": "Edit Transaction",
 			"action": reverse("finance:transaction-update", args=[transaction.pk]),
+			"history_url": reverse("finance:transaction-history", args=[transaction.pk]),
 		}
 		return render(request, self.template_name, context, status=400)
 
@@ -466,12 +666,254 @@ class TransactionDeleteView(View):
 
 	def post(self, request, pk, *args, **kwargs):
 		transaction = self.get_object(pk)
-		account_id = transaction.account_id
-		transaction.delete()
+		queryset = Transaction.objects.filter(pk=transaction.pk)
+		account_ids = sorted(
+			set(with_partner_legs(queryset, Transaction.objects.all()).values_list("account_id", flat=True))
+		)
+		soft_delete_transactions(queryset)
 		response = HttpResponse(status=204)
 		payload = {
-			"transactionsChanged": {"accounts": [account_id] if account_id else []},
+			"transactionsChanged": {"accounts": account_ids},
 			"closeAccountModal": {},
+			"showUndo": {
+				"message": "Transaction deleted.",
+				"url": reverse("finance:transaction-restore"),
+				"values": {"ids": [transaction.pk]},
+			},
 		}
 		response["HX-Trigger"] = json.dumps(payload)
 		return response
+
+
+class UpcomingDueView(View):
+	template_name = "finance/partials/upcoming_due.html"
+	window_options = (7, 14, 30, 60, 90)
+
+	@classmethod
+	def get_context(cls, request):
+		days = parse_due_window(request.GET.get("days"))
+		return {
+			"upcoming_due": upcoming_due_accounts(days),
+			"due_window_days": days,
+			"due_window_options": cls.window_options,
+		}
+
+	def get(self, request, *args, **kwargs):
+		return render(request, self.template_name, self.get_context(request))
+
+
+class ChangeHistoryView(View):
+	"""Field-level history for one account or transaction, including deleted ones."""
+
+	model = None
+	template_name = "finance/partials/change_history.html"
+
+	def get(self, request, pk, *args, **kwargs):
+		# all_objects is household-scoped, so this hides other households' history.
+		get_object_or_404(self.model.all_objects, pk=pk)
+		entries = ChangeLog.objects.filter(
+			model=ChangeLog.objects.label_for(self.model),
+			object_id=pk,
+		).order_by("-changed_at", "-id")
+		context = {
+			"entries": entries,
+			"title": f"{self.model._meta.verbose_name.title()} #{pk} History",
+		}
+		return render(request, self.template_name, context)
+
+
+class ReportsView(View):
+	template_name = "finance/reports.html"
+	partial_name = "finance/partials/report_body.html"
+
+	def get(self, request, *args, **kwargs):
+		years = parse_range_years(request.GET.get("years"))
+		start, end = range_for_years(years)
+		context = {
+			"report": income_expense_report(start, end),
+			"range_years": years,
+			"range_options": RANGE_YEARS,
+		}
+		if request.htmx:
+			return render(request, self.partial_name, context)
+		return render(request, self.template_name, context)
+
+
+class NetWorthView(View):
+	template_name = "finance/net_worth.html"
+	partial_name = "finance/partials/net_worth_chart.html"
+	chart_width = 800
+	chart_height = 200
+
+	def get(self, request, *args, **kwargs):
+		years = parse_range_years(request.GET.get("years"))
+		interval = request.GET.get("interval")
+		if interval not in (INTERVAL_DAY, INTERVAL_MONTH):
+			interval = INTERVAL_MONTH if years > 1 else INTERVAL_DAY
+		start, _last_month = range_for_years(years)
+		end = timezone.localdate()
+		points = net_worth_series(start, end, interval)
+		assets, liabilities = current_totals()
+		context = {
+			"points": points,
+			"chart_points": chart_points(points, self.chart_width, self.chart_height),
+			"chart_width": self.chart_width,
+			"chart_height": self.chart_height,
+			"assets": assets,
+			"liabilities": liabilities,
+			"net_worth": assets - liabilities,
+			"range_years": years,
+			"range_options": RANGE_YEARS,
+			"interval": interval,
+		}
+		if request.htmx:
+			return render(request, self.partial_name, context)
+		return render(request, self.template_name, context)
+
+
+class ForecastView(View):
+	template_name = "finance/forecast.html"
+
+	def get(self, request, *args, **kwargs):
+		entries = (
+			ForecastEntry.objects.select_related("account")
+			.filter(account__deleted_at__isnull=True)
+			.order_by("account__name", "account_id", "due_on", "id")
+		)
+		forecasts = []
+		for entry in entries:
+			if not forecasts or forecasts[-1]["account"].pk != entry.account_id:
+				forecasts.append({"account": entry.account, "rows": [], "ending_balance": entry.account.balance})
+			forecast = forecasts[-1]
+			forecast["ending_balance"] += entry.signed_amount
+			forecast["rows"].append({"entry": entry, "balance": forecast["ending_balance"]})
+		context = {
+			"forecasts": forecasts,
+			"generated_at": entries[0].generated_at if forecasts else None,
+		}
+		return render(request, self.template_name, context)
+
+
+class TaskEnqueueView(View):
+	"""Queue one of the UI-safe background tasks and start polling its status."""
+
+	template_name = "finance/partials/task_status.html"
+	allowed_tasks = ("recategorize", "refresh_forecast", "pair_transfers")
+
+	def post(self, request, name, *args, **kwargs):
+		if name not in self.allowed_tasks:
+			return HttpResponse(status=404)
+		task = enqueue(name)
+		return render(request, self.template_name, {"task": task, "label": REGISTRY[name].label}, status=202)
+
+
+class TaskStatusView(View):
+	template_name = "finance/partials/task_status.html"
+	finished_triggers = {
+		"recategorize": {"transactionsChanged": {"accounts": []}},
+		"pair_transfers": {"transactionsChanged": {"accounts": []}},
+	}
+
+	def get(self, request, pk, *args, **kwargs):
+		task = get_object_or_404(BackgroundTask, pk=pk)
+		spec = REGISTRY.get(task.name)
+		response = render(
+			request,
+			self.template_name,
+			{"task": task, "label": spec.label if spec else task.name},
+		)
+		if task.status == BackgroundTask.Status.SUCCEEDED and task.name in self.finished_triggers:
+			response["HX-Trigger"] = json.dumps(self.finished_triggers[task.name])
+		return response
+
+
+class SyncView(View):
+	"""Changed and deleted transactions and categories since ``?cursor=``; see ``finance.sync``.
+
+	Reads the primary: a lagging replica would move the cursor past rows it has not seen yet.
+	"""
+
+	def get(self, request, *args, **kwargs):
+		try:
+			limit = min(max(int(request.GET.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+		except ValueError:
+			return JsonResponse({"error": "limit must be an integer."}, status=400)
+		try:
+			with replica_reads(False):
+				changes = sync_changes(request.GET.get("cursor"), limit=limit)
+		except InvalidCursor as exc:
+			return JsonResponse({"error": str(exc)}, status=400)
+		return JsonResponse(changes)
+
+
+class ReconcileMixin:
+	template_name = "finance/reconcile.html"
+	partial_name = "finance/partials/reconcile_panel.html"
+
+	def _default_period(self):
+		first_day = timezone.localdate().replace(day=1)
+		last_day = first_day.replace(day=monthrange(first_day.year, first_day.month)[1])
+		return {"start": first_day, "end": last_day}
+
+	def _period_bounds(self, start: date, end: date):
+		tz = timezone.get_current_timezone()
+		return (
+			timezone.make_aware(datetime.combine(start, time.min), tz),
+			timezone.make_aware(datetime.combine(end, time.max), tz),
+		)
+
+	def _panel_context(self, account, data):
+		start_dt, end_dt = self._period_bounds(data["start"], data["end"])
+		period = Transaction.objects.filter(account=account, posted_at__range=(start_dt, end_dt))
+		transactions = list(period.select_related("category").order_by("is_cleared", "posted_at", "id"))
+		cleared_total = sum(
+			(transaction.signed_amount for transaction in transactions if transaction.is_cleared),
+			Decimal("0.00"),
+		)
+		opening_balance = data.get("opening_balance") or Decimal("0.00")
+		statement_balance = data.get("statement_balance")
+		target = None if statement_balance is None else statement_balance - opening_balance
+		return {
+			"account": account,
+			"transactions": transactions,
+			"uncleared_count": sum(1 for transaction in transactions if not transaction.is_cleared),
+			"cleared_total": cleared_total,
+			"statement_target": target,
+			"difference": None if target is None else target - cleared_total,
+			"period": data,
+			"bulk_url": reverse("finance:account-reconcile-bulk", args=[account.pk]),
+		}
+
+
+class ReconcileView(ReconcileMixin, View):
+	def get(self, request, pk, *args, **kwargs):
+		account = get_object_or_404(Account, pk=pk)
+		form = ReconcileForm(request.GET or None, initial=self._default_period())
+		if form.is_bound and form.is_valid():
+			data = form.cleaned_data
+		else:
+			data = self._default_period()
+		context = self._panel_context(account, data)
+		context["form"] = form
+		if request.htmx:
+			return render(request, self.partial_name, context)
+		return render(request, self.template_name, context)
+
+
+class ReconcileBulkView(ReconcileMixin, View):
+	def post(self, request, pk, *args, **kwargs):
+		account = get_object_or_404(Account, pk=pk)
+		form = ReconcileBulkForm(request.POST)
+		if not form.is_valid():
+			return HttpResponse(form.errors.as_text(), status=400)
+		data = form.cleaned_data
+		start_dt, end_dt = self._period_bounds(data["start"], data["end"])
+		is_cleared = data["action"] == ReconcileBulkForm.ACTION_CLEAR
+		Transaction.objects.filter(
+			account=account,
+			posted_at__range=(start_dt, end_dt),
+			pk__in=data["ids"],
+		).set_cleared(is_cleared)
+		response = render(request, self.partial_name, self._panel_context(account, data))
+		response["HX-Trigger"] = json.dumps({"transactionsChanged": {"accounts": [account.pk]}})
+		return response
@@ -0,0 +1,73 @@
+"""Primary/replica database routing.
+
+Writes, migrations and anything running inside a transaction use the
+``default`` (primary) database. ``ReplicaReadsMiddleware`` lets the reads of
+a safe (GET/HEAD/OPTIONS) request go to one of ``settings.DATABASE_REPLICAS``.
+Every other caller keeps reading from the primary, including POST handlers,
+management commands and the background worker.
+
+Read-your-writes: an unsafe request sets a short-lived cookie. While the
+cookie is present, that browser's reads also stay on the primary, so the
+htmx refetch that follows a ``transactionsChanged`` trigger sees the write
+even if the replicas lag behind.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+STICKY_COOKIE = "primary_pinned"
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    """Allow (or forbid) replica reads for the duration of the block."""
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        if not replicas or not _replica_reads.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadsMiddleware:
+    """Route safe requests' reads to replicas, except right after the same client wrote."""
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in self.SAFE_METHODS
+        with replica_reads(safe and STICKY_COOKIE not in request.COOKIES):
+            response = self.get_response(request)
+        if not safe and settings.DATABASE_REPLICAS:
+            response.set_cookie(
+                STICKY_COOKIE,
+                "1",
+                max_age=settings.REPLICA_STICKY_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
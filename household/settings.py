@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -35,6 +35,7 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     'django.contrib.humanize',
     'django_htmx',
@@ -45,10 +46,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'django.middleware.gzip.GZipMiddleware',
+    'household.db_routing.ReplicaReadsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'finance.tenancy.HouseholdMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
@@ -69,25 +74,119 @@ TEMPLATES = [
             ],
         },
     },
+    {
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [BASE_DIR / 'jinja2'],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'finance.jinja2.environment',
+        },
+    },
 ]
 
+# Engine for the large htmx row partials: "django" renders the ones in templates/,
+# "jinja2" the copies under jinja2/ (same output, several times faster).
+ROW_TEMPLATE_ENGINE = config("ROW_TEMPLATE_ENGINE", default="django")
+
 WSGI_APPLICATION = 'household.wsgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
+DB_ENGINE = config("DB_ENGINE", default="postgresql")
+
+if DB_ENGINE == "sqlite":
+    # Single-household profile: one file on local disk, tuned for a handful of
+    # concurrent web workers. The init_command runs on every new connection.
+    # SQLITE_TIMEOUT (seconds) is the only lock wait: sqlite3 turns it into
+    # the connection's busy timeout, so no busy_timeout PRAGMA is set here.
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config("SQLITE_PATH", default=str(BASE_DIR / "db.sqlite3")),
+            "OPTIONS": {
+                "init_command": (
+                    "PRAGMA journal_mode=WAL;"
+                    "PRAGMA synchronous=NORMAL;"
+                    f"PRAGMA mmap_size={config('SQLITE_MMAP_SIZE', default=134217728, cast=int)};"
+                ),
+                "transaction_mode": "IMMEDIATE",
+                "timeout": config("SQLITE_TIMEOUT", default=20, cast=int),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config("DB_NAME"),
+            "USER": config("DB_USER"),
+            "PASSWORD": config("DB_PASSWORD"),
+            "HOST": config("DB_HOST", default="127.0.0.1"),
+            "PORT": config("DB_PORT", default="5432"),
+        }
+    }
+    # Read replicas, e.g. DB_REPLICA_HOSTS=10.0.0.2,10.0.0.3. Pointing one at
+    # DB_HOST gives a local primary/replica pair for trying the routing out.
+    for _index, _host in enumerate(config("DB_REPLICA_HOSTS", default="", cast=Csv()), start=1):
+        DATABASES[f"replica{_index}"] = {
+            **DATABASES["default"],
+            "HOST": _host,
+            "TEST": {"MIRROR": "default"},
+        }
+
+# Safe requests read from the replicas; a client that just wrote keeps
+# reading from the primary for REPLICA_STICKY_SECONDS (see household/db_routing.py).
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != "default"]
+DATABASE_ROUTERS = ["household.db_routing.PrimaryReplicaRouter"]
+REPLICA_STICKY_SECONDS = config("REPLICA_STICKY_SECONDS", default=10, cast=int)
+
+# Sync pages stop this far short of now so rows stamped by a write that has
+# not committed yet are not skipped (see finance/sync.py). Keep it above the
+# longest write transaction, such as a large import or a worker batch.
+SYNC_SETTLE_SECONDS = config("SYNC_SETTLE_SECONDS", default=60, cast=int)
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+#
+# REDIS_URL selects a shared Redis cache for multi-process deployments.
+# Without it, CACHE_BACKEND=file keeps entries on local disk (shared by all
+# workers on one box) and the default locmem cache works fully offline.
+
+REDIS_URL = config("REDIS_URL", default="")
+CACHE_BACKEND = config("CACHE_BACKEND", default="redis" if REDIS_URL else "locmem")
+
+if CACHE_BACKEND == "redis":
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    }
+elif CACHE_BACKEND == "file":
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": config("CACHE_DIR", default=str(BASE_DIR / ".cache")),
+    }
+else:
+    _default_cache = {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "household",
+    }
+
+CACHES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": config("DB_NAME"),
-        "USER": config("DB_USER"),
-        "PASSWORD": config("DB_PASSWORD"),
-        "HOST": config("DB_HOST", default="127.0.0.1"),
-        "PORT": config("DB_PORT", default="5432"),
+        **_default_cache,
+        "KEY_PREFIX": config("CACHE_KEY_PREFIX", default="household"),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=300, cast=int),
     }
 }
 
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+# Finance pages need a signed-in household member (see finance/tenancy.py).
+LOGIN_URL = "login"
+LOGIN_REDIRECT_URL = "home"
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -123,9 +222,28 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/6.0/howto/static-files/
 
 STATIC_URL = 'static/'
-STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# With STATIC_MANIFEST=True, collectstatic writes content-hashed copies plus
+# .gz/.br variants, and WhiteNoise serves the hashed names with a far-future
+# immutable Cache-Control header. Turn it on in deployments that run
+# collectstatic. Development and test runs have no collected manifest, so they
+# keep the plain storage.
+STATIC_MANIFEST = config("STATIC_MANIFEST", default=False, cast=bool)
+
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": (
+            "whitenoise.storage.CompressedManifestStaticFilesStorage"
+            if STATIC_MANIFEST
+            else "django.contrib.staticfiles.storage.StaticFilesStorage"
+        ),
+    },
+}
+
 TAILWIND_APP_NAME = 'theme'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
@@ -21,6 +21,7 @@ from .views import HomeView, ServerTimeView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('accounts/', include('django.contrib.auth.urls')),
     path('', HomeView.as_view(), name='home'),
     path('server-time/', ServerTimeView.as_view(), name='server-time'),
     path('finance/', include('finance.urls')),
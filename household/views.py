@@ -3,10 +3,17 @@ from django.template.loader import render_to_string
 from django.utils import timezone
 from django.views.generic import TemplateView, View
 
+from finance.views import UpcomingDueView
+
 
 class HomeView(TemplateView):
     template_name = "home.html"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(UpcomingDueView.get_context(self.request))
+        return context
+
 
 class ServerTimeView(View):
     """Return a DaisyUI badge snippet with the current server time."""
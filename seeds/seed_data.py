@@ -6,13 +6,15 @@ this script via `python manage.py shell` or a dedicated management command.
 
 from __future__ import annotations
 
+import uuid
 from datetime import datetime
 from decimal import Decimal
 
 from django.db import transaction
 from django.utils import timezone
 
-from finance.models import Account, Category, Transaction
+from finance import tenancy
+from finance.models import Account, Category, Household, Transaction
 
 
 def _aware_datetime(year: int, month: int, day: int) -> datetime:
@@ -99,26 +101,44 @@ def seed_transactions() -> None:
         },
     )
 
-    Transaction.objects.update_or_create(
+    # Savings -> checking transfer, booked as two linked legs. Earlier seeds
+    # recorded it as a savings expense; drop that row so reseeding converts it.
+    transfer_posted_at = _aware_datetime(2026, 1, 28)
+    Transaction.objects.filter(
         account=savings,
-        posted_at=_aware_datetime(2026, 1, 28),
+        posted_at=transfer_posted_at,
         transaction_type=Transaction.TransactionType.EXPENSE,
-        amount=Decimal("100.00"),
-        category=transfer_category,
-        defaults={
-            "memo": "Transfer to Checking",
-            "is_cleared": True,
-        },
-    )
+        memo="Transfer to Checking",
+    ).delete()
+    transfer_id = uuid.uuid5(uuid.NAMESPACE_URL, "household-seed/transfer/2026-01-28")
+    for account, direction in (
+        (savings, Transaction.TransferDirection.OUT),
+        (checking, Transaction.TransferDirection.IN),
+    ):
+        Transaction.objects.update_or_create(
+            account=account,
+            transfer_id=transfer_id,
+            defaults={
+                "posted_at": transfer_posted_at,
+                "transaction_type": Transaction.TransactionType.TRANSFER,
+                "transfer_direction": direction,
+                "amount": Decimal("100.00"),
+                "category": transfer_category,
+                "memo": "Transfer to Checking",
+                "is_cleared": True,
+            },
+        )
 
 
 
 def main() -> None:
     """Run the full seeding routine inside a single atomic transaction."""
     with transaction.atomic():
-        seed_categories()
-        seed_accounts()
-        seed_transactions()
+        household, _ = Household.objects.get_or_create(name="Demo Household")
+        with tenancy.activate(household):
+            seed_categories()
+            seed_accounts()
+            seed_transactions()
 
 
 if __name__ == "__main__":
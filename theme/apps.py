@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class ThemeConfig(AppConfig):
     name = 'theme'
+
+    def ready(self):
+        from . import checks  # noqa: F401
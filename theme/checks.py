@@ -0,0 +1,19 @@
+from pathlib import Path
+
+from django.core.checks import Tags, Warning, register
+
+BUILT_STYLESHEET = Path(__file__).resolve().parent / "static" / "css" / "dist" / "styles.css"
+
+
+@register(Tags.staticfiles)
+def check_built_stylesheet(app_configs, **kwargs):
+    """Warn when the committed build predates the daisyUI plugin, since no CDN copy backs it up."""
+    if not BUILT_STYLESHEET.exists() or "daisyUI" in BUILT_STYLESHEET.read_text(encoding="utf-8"):
+        return []
+    return [
+        Warning(
+            "theme/static/css/dist/styles.css was built without the daisyUI plugin.",
+            hint="Run `python manage.py tailwind install` to fetch daisyui.mjs and rebuild the stylesheet.",
+            id="theme.W001",
+        )
+    ]